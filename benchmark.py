@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+import utils
+from confusion_matrix import ConfusionMatrix
+from dataset import Dataset
+from decision_tree import DecisionTree
+
+
+def generate_dataset(path: str, rows: int, features: int, cardinality: int, labels: int, noise: float = 0.1,
+                     seed: int = 0) -> None:
+    """Generates a synthetic categorical dataset and writes it as a csv file to the given path.
+
+    Feature values are drawn uniformly from cardinality distinct values. Label of an example is determined by
+    the values of the first (up to) three features, and with the probability given by noise it is replaced
+    with a uniformly drawn label. The same arguments always generate the same dataset.
+
+    :param path: path of the csv file
+    :param rows: number of examples
+    :param features: number of features
+    :param cardinality: number of distinct values of each feature
+    :param labels: number of distinct class labels
+    :param noise: probability of an example having a random label
+    :param seed: seed of the random number generator
+    """
+
+    generator: random.Random = random.Random(seed)
+    with open(path, "w") as csv_file:
+        csv_file.write(",".join([f"feature{i + 1}" for i in range(features)] + ["label"]) + "\n")
+        for _ in range(rows):
+            values: list[int] = [generator.randrange(cardinality) for _ in range(features)]
+            label: int = sum((i + 1) * value for i, value in enumerate(values[:3])) % labels
+            if generator.random() < noise:
+                label = generator.randrange(labels)
+            csv_file.write(",".join([f"v{value}" for value in values] + [f"c{label}"]) + "\n")
+
+
+def measure(function: Callable, repeat: int = 1) -> tuple[dict[str, float], object]:
+    """Measures the execution time and the peak memory allocation of the given function.
+
+    :param function: function without arguments to be measured
+    :param repeat: number of executions. The fastest execution time is reported.
+    :return: measurements ("seconds" and "peak_memory" in bytes), and the result of the last execution
+    """
+
+    seconds: list[float] = []
+    result: object = None
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        result = function()
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()  # memory is measured separately, since tracing slows the execution down
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(seconds), "peak_memory": peak_memory}, result
+
+
+def run_benchmarks(rows: int = 10000, features: int = 10, cardinality: int = 5, labels: int = 3,
+                   noise: float = 0.1, max_depth: Optional[int] = None, repeat: int = 3,
+                   seed: int = 0) -> dict[str, dict[str, float]]:
+    """Runs the benchmarks of the training and prediction pipeline on synthetic datasets.
+
+    Training and test datasets of the given shape are generated, and loading, fitting, prediction, formatting
+    of the branches and construction of the confusion matrix are measured.
+
+    :param rows: number of examples of the training dataset. Test dataset has a quarter as many.
+    :param features: number of features
+    :param cardinality: number of distinct values of each feature
+    :param labels: number of distinct class labels
+    :param noise: probability of an example having a random label
+    :param max_depth: depth limit of the decision tree
+    :param repeat: number of executions of each benchmark
+    :param seed: seed of the dataset generator
+    :return: measurements, indexed by benchmark names
+    """
+
+    results: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        train_path: str = os.path.join(directory, "train.csv")
+        test_path: str = os.path.join(directory, "test.csv")
+        generate_dataset(train_path, rows, features, cardinality, labels, noise, seed)
+        generate_dataset(test_path, max(rows // 4, 1), features, cardinality, labels, noise, seed + 1)
+
+        results["load"], train_dataset = measure(lambda: utils.load_dataset(train_path), repeat)
+        test_dataset: Dataset = utils.load_dataset(test_path)
+
+    results["fit"], decision_tree = measure(lambda: DecisionTree(max_depth).fit(train_dataset), repeat)
+    results["predict"], predictions = measure(lambda: decision_tree.predict(test_dataset), repeat)
+    results["format_branches"], _ = measure(lambda: utils.format_branches(decision_tree.root), repeat)
+    results["confusion_matrix"], _ = measure(lambda: ConfusionMatrix(
+        test_dataset.label_space, test_dataset.label_sample, predictions["predictions"]), repeat)
+    return results
+
+
+def find_regressions(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]],
+                     threshold: float) -> list[str]:
+    """Compares the results of the benchmarks against the baseline.
+
+    :param results: measurements of the current run
+    :param baseline: measurements of the baseline run
+    :param threshold: maximum allowed relative increase of a measurement, e.g. 0.2 for 20%
+    :return: descriptions of all the measurements that increased by more than the threshold
+    """
+
+    regressions: list[str] = []
+    for benchmark, measurements in results.items():
+        for measurement, value in measurements.items():
+            baseline_value: Optional[float] = baseline.get(benchmark, {}).get(measurement)
+            if baseline_value and value > baseline_value * (1 + threshold):
+                regressions.append(f"{benchmark} {measurement}: {value:.6g} (baseline {baseline_value:.6g}, "
+                                   f"+{(value / baseline_value - 1) * 100:.1f}%)")
+    return regressions
+
+
+def main() -> None:
+    """Runs the benchmarks, writes the results as json and compares them against a baseline, if provided.
+
+    Written json contains the parameters of the run and the measurements, so that a file written by one
+    run can be used as the baseline of another one.
+
+    Exits with status 1 if any of the measurements regressed by more than the threshold.
+
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Benchmarks of the ID3 decision tree.")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--features", type=int, default=10)
+    parser.add_argument("--cardinality", type=int, default=5)
+    parser.add_argument("--labels", type=int, default=3)
+    parser.add_argument("--noise", type=float, default=0.1)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="path of the json file the results are written to")
+    parser.add_argument("--baseline", help="path of the json file with the baseline results")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="maximum allowed relative increase of a measurement over the baseline")
+    args: argparse.Namespace = parser.parse_args()
+
+    parameters: dict[str, object] = {name: value for name, value in vars(args).items()
+                                     if name not in ("output", "baseline", "threshold")}
+    results: dict[str, dict[str, float]] = run_benchmarks(**parameters)
+    report: dict[str, dict] = {"parameters": parameters, "results": results}
+    print(json.dumps(report, indent=2))
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline, "r") as baseline_file:
+            baseline: dict[str, dict] = json.load(baseline_file)
+        if baseline["parameters"] != parameters:
+            print("Baseline was measured with different parameters: " + str(baseline["parameters"]), file=sys.stderr)
+        regressions: list[str] = find_regressions(results, baseline["results"], args.threshold)
+        if regressions:
+            print("Regressions:\n" + "\n".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
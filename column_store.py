@@ -0,0 +1,528 @@
+import itertools
+import json
+import math
+import mmap
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+_METADATA_FILE: str = "metadata.json"
+_LABELS_FILE: str = "labels.bin"
+
+MISSING: str = ""  # value of an empty cell, which is stored as missing
+MISSING_CODE: int = 2 ** 32 - 1  # code of a missing value in a categorical column
+# columns are stored sparsely once they have this many rows, of which more than half are missing, and densely again
+# once more than three quarters of their values are known
+_SPARSE_MIN_ROWS: int = 1024
+
+
+class ColumnStore:
+    """Columnar storage of classified examples, in which every column is dictionary-encoded.
+
+    Each categorical feature, as well as the class label, is stored as an array of unsigned integer codes. Every
+    such column has a single vocabulary shared by all datasets built on top of the store, so that a value is
+    stored as a string only once, no matter how many examples it occurs in. Numeric features are stored as
+    arrays of floating point values.
+
+    Missing values (empty cells) are not a part of any vocabulary. They are stored as MISSING_CODE in categorical
+    columns and as NaN in numeric columns, so that they are told apart from the other values by the codes alone.
+
+    Column whose values are mostly missing is stored as a SparseColumn, which holds only its known values, so the
+    memory it takes scales with the number of known values. Columns are checked whenever the number of rows
+    doubles, so each column is converted a logarithmic number of times at most.
+
+    Every row is an example of weight 1, unless it is appended with another weight, e.g. to stand for several
+    identical examples at once. Weights are stored only if some row has a weight other than 1.
+
+    A store can also be opened from a directory of column files written by ColumnFileWriter. Columns of such a
+    store are memory-mapped, so the examples are read from the disk on demand instead of being held in memory,
+    and no examples can be appended to it.
+
+    """
+
+    def __init__(self, feature_names: list[str], class_label: str, numeric_features: Iterable[str] = (),
+                 sparse: bool = True) -> None:
+        """Creates an empty store for examples with the given features and class label.
+
+        :param feature_names: names of the features, in the order in which their values are provided
+        :param class_label: name of the class label
+        :param numeric_features: names of the features whose values are numbers
+        :param sparse: whether the columns whose values are mostly missing are stored sparsely
+        """
+
+        self.__feature_names: list[str] = list(feature_names)
+        self.__class_label: str = class_label
+        numeric_features: set[str] = set(numeric_features)
+        for feature_name in numeric_features:
+            if feature_name not in self.__feature_names:
+                raise ValueError("Feature " + feature_name + " is not a part of the dataset")
+        self.__numeric: list[bool] = [feature_name in numeric_features for feature_name in self.__feature_names]
+        self.__columns: list[array] = [array("d" if numeric else "I") for numeric in self.__numeric]
+        self.__vocabularies: list[list[str]] = [[] for _ in self.__feature_names]
+        self.__codes: list[dict[str, int]] = [{} for _ in self.__feature_names]
+        self.__labels: array = array("I")
+        self.__label_vocabulary: list[str] = []
+        self.__label_codes: dict[str, int] = {}
+        self.__weights: Optional[array] = None  # weight of every row, if some row has a weight other than 1
+        self.__directory: Optional[str] = None  # directory of the column files, if the store is memory-mapped
+        self.__sparse: bool = sparse
+
+    @classmethod
+    def open(cls, directory: str):
+        """Opens the store of the column files in the given directory, memory-mapping the columns.
+
+        :param directory: directory written by ColumnFileWriter
+        :return: read-only store of the examples in the column files
+        """
+
+        with open(os.path.join(directory, _METADATA_FILE), "r") as metadata_file:
+            metadata: dict = json.load(metadata_file)
+        feature_names: list[str] = metadata["feature_names"]
+        store: ColumnStore = cls(feature_names, metadata["class_label"],
+                                 [name for name, numeric in zip(feature_names, metadata["numeric"]) if numeric])
+        rows: int = metadata["rows"]
+        store.__columns = [_map_column(os.path.join(directory, _column_file(column)), "d" if numeric else "I", rows)
+                           for column, numeric in enumerate(store.__numeric)]
+        store.__labels = _map_column(os.path.join(directory, _LABELS_FILE), "I", rows)
+        store.__vocabularies = metadata["vocabularies"]
+        store.__codes = [{value: code for code, value in enumerate(vocabulary)} for vocabulary in store.__vocabularies]
+        store.__label_vocabulary = metadata["label_vocabulary"]
+        store.__label_codes = {label: code for code, label in enumerate(store.__label_vocabulary)}
+        store.__directory = directory
+        return store
+
+    def __reduce__(self):
+        if self.__directory is not None:  # memory-mapped columns are mapped again, rather than copied
+            return ColumnStore.open, (self.__directory,)
+        return super().__reduce__()
+
+    @property
+    def feature_names(self) -> list[str]:
+        return self.__feature_names
+
+    @property
+    def class_label(self) -> str:
+        return self.__class_label
+
+    @property
+    def columns(self) -> list:
+        """Returns the encoded feature columns, indexed in the same order as the feature names.
+
+        :return: list of arrays of value codes, or of values for numeric features, or of sparse columns of either
+        """
+
+        return self.__columns
+
+    @property
+    def numeric(self) -> list[bool]:
+        """Returns whether each of the feature columns is numeric.
+
+        :return: list of flags, indexed in the same order as the feature names
+        """
+
+        return self.__numeric
+
+    @property
+    def vocabularies(self) -> list[list[str]]:
+        """Returns the vocabularies of the feature columns, which map value codes back to the values.
+
+        :return: list of vocabularies, one for each feature column. Vocabularies of numeric columns are empty.
+        """
+
+        return self.__vocabularies
+
+    @property
+    def labels(self) -> array:
+        """Returns the encoded class label column.
+
+        :return: array of label codes
+        """
+
+        return self.__labels
+
+    @property
+    def label_vocabulary(self) -> list[str]:
+        return self.__label_vocabulary
+
+    @property
+    def memory_mapped(self) -> bool:
+        """Returns whether the columns are memory-mapped from column files, so no examples can be appended.
+
+        :return: whether the store was opened from column files
+        """
+
+        return self.__directory is not None
+
+    @property
+    def weights(self) -> Optional[array]:
+        """Returns the weights of the rows.
+
+        :return: array of the weights, or None if every row has the weight 1
+        """
+
+        return self.__weights
+
+    def append(self, feature_values: list[str], label: str, weight: int = 1) -> int:
+        """Encodes the given example and appends it to the store.
+
+        :param feature_values: values of the features, in the order of the feature names
+        :param label: class label of the example
+        :param weight: weight of the example, i.e. the number of identical examples it stands for
+        :return: row index of the appended example
+        """
+
+        if self.__directory is not None:
+            raise ValueError("Examples cannot be appended to a store of memory-mapped column files")
+        if len(feature_values) != len(self.__feature_names):
+            raise ValueError(f"Expected {len(self.__feature_names)} feature values, got {len(feature_values)}")
+        if weight < 1:
+            raise ValueError(f"Weight of an example must be positive, got {weight}")
+        # numbers are parsed before any value is encoded, and the values are encoded before any of them is stored,
+        # so that an invalid value leaves the store, including its vocabularies, unchanged
+        numbers: dict[int, float] = {column: parse_number(value) for column, value in enumerate(feature_values)
+                                     if self.__numeric[column] and value != MISSING}
+        encoded: list = [numbers.get(column, math.nan) if self.__numeric[column]
+                         else MISSING_CODE if value == MISSING else self.encode(column, value)
+                         for column, value in enumerate(feature_values)]
+        for column, value in enumerate(encoded):
+            self.__columns[column].append(value)
+        if weight != 1 and self.__weights is None:
+            self.__weights = array("I", [1]) * len(self.__labels)
+        if self.__weights is not None:
+            self.__weights.append(weight)
+        self.__labels.append(self.encode_label(label))
+        rows: int = len(self.__labels)
+        if self.__sparse and rows >= _SPARSE_MIN_ROWS and rows & (rows - 1) == 0:  # number of rows has doubled
+            self.__convert_columns()
+        return rows - 1
+
+    def __convert_columns(self) -> None:
+        """Stores the columns whose values are mostly missing sparsely, and the other columns densely."""
+
+        rows: int = len(self.__labels)
+        for index, (column, numeric) in enumerate(zip(self.__columns, self.__numeric)):
+            if isinstance(column, SparseColumn):
+                if len(column.rows) * 4 > rows * 3:
+                    self.__columns[index] = column.to_dense()
+                continue
+            known: int = sum(value == value for value in column) if numeric else rows - column.count(MISSING_CODE)
+            if known * 2 < rows:
+                self.__columns[index] = SparseColumn.from_dense(column)
+
+    def add_weight(self, row: int, weight: int) -> None:
+        """Increases the weight of the given row, e.g. when an identical example is seen again.
+
+        :param row: row index of the example
+        :param weight: weight added to the example
+        """
+
+        if self.__directory is not None:
+            raise ValueError("Examples cannot be changed in a store of memory-mapped column files")
+        if weight < 1:
+            raise ValueError(f"Weight of an example must be positive, got {weight}")
+        if self.__weights is None:
+            self.__weights = array("I", [1]) * len(self.__labels)
+        self.__weights[row] += weight
+
+    def encode(self, column: int, value: str) -> int:
+        """Returns the code of the value within the vocabulary of the given column, extending the vocabulary
+        if the value was not seen before.
+
+        :param column: index of the feature column
+        :param value: value to be encoded
+        :return: code of the value
+        """
+
+        codes: dict[str, int] = self.__codes[column]
+        code: int = codes.get(value, -1)
+        if code < 0:
+            code = codes[value] = len(codes)
+            self.__vocabularies[column].append(value)
+        return code
+
+    def decode(self, column: int, value) -> str:
+        """Returns the string representation of a value stored in the given column.
+
+        :param column: index of the feature column
+        :param value: value code, or value of a numeric column
+        :return: feature value, or MISSING for missing values
+        """
+
+        if self.__numeric[column]:
+            return MISSING if value != value else format_number(value)
+        return MISSING if value == MISSING_CODE else self.__vocabularies[column][value]
+
+    def encode_label(self, label: str) -> int:
+        """Returns the code of the class label, extending the label vocabulary if the label was not seen before.
+
+        :param label: label to be encoded
+        :return: code of the label
+        """
+
+        code: int = self.__label_codes.get(label, -1)
+        if code < 0:
+            code = self.__label_codes[label] = len(self.__label_codes)
+            self.__label_vocabulary.append(label)
+        return code
+
+    def copy(self, rows: Iterable[int], weights: Optional[Iterable[int]] = None):
+        """Copies the given rows into a new in-memory store, which shares no columns with this one.
+
+        Values keep their codes, so the vocabularies are copied as they are, together with the values which occur
+        only in the rows that are not copied.
+
+        :param rows: row indices of the copied examples
+        :param weights: weights of the copied examples, replacing the ones they have in this store
+        :return: store of the copied examples, to which new examples can be appended
+        """
+
+        rows: list[int] = list(rows)
+        if weights is not None:
+            weights = array("I", weights)
+            if len(weights) != len(rows) or any(weight < 1 for weight in weights):
+                raise ValueError("Every copied example must have a positive weight")
+        store: ColumnStore = ColumnStore(self.__feature_names, self.__class_label,
+                                         [name for name, numeric in zip(self.__feature_names, self.__numeric)
+                                          if numeric])
+        store.__columns = [array("d" if numeric else "I", map(column.__getitem__, rows))
+                           for column, numeric in zip(self.__columns, self.__numeric)]
+        store.__sparse = self.__sparse
+        store.__vocabularies = [list(vocabulary) for vocabulary in self.__vocabularies]
+        store.__codes = [{value: code for code, value in enumerate(vocabulary)} for vocabulary in store.__vocabularies]
+        store.__labels = array("I", map(self.__labels.__getitem__, rows))
+        store.__label_vocabulary = list(self.__label_vocabulary)
+        store.__label_codes = dict(self.__label_codes)
+        if store.__sparse and len(rows) >= _SPARSE_MIN_ROWS:
+            store.__convert_columns()
+        if weights is not None:
+            store.__weights = weights if any(weight != 1 for weight in weights) else None
+        elif self.__weights is not None:
+            store.__weights = array("I", map(self.__weights.__getitem__, rows))
+        return store
+
+    def column_index(self, feature_name: str) -> int:
+        """Returns the index of the column storing the feature with the given name.
+
+        :param feature_name: name of the feature
+        :return: index of the column
+        """
+
+        return self.__feature_names.index(feature_name)
+
+    def __len__(self) -> int:
+        return len(self.__labels)
+
+
+class SparseColumn:
+    """Column which stores only its known values, together with the indices of their rows, in increasing order.
+
+    Value of a row is looked up by a binary search, and the missing values are MISSING_CODE, or NaN in a numeric
+    column, as in a dense column. Known values can also be read directly, so that the datasets count them without
+    going through the rows whose values are missing.
+
+    """
+
+    __slots__ = ("__rows", "__values", "__length")
+
+    def __init__(self, typecode: str) -> None:
+        """Creates an empty column.
+
+        :param typecode: array typecode of the values, "I" for value codes and "d" for numbers
+        """
+
+        self.__rows: array = array("I")
+        self.__values: array = array(typecode)
+        self.__length: int = 0
+
+    @classmethod
+    def from_dense(cls, column: array):
+        """Creates the sparse column of the known values of a dense column.
+
+        :param column: array of value codes or numbers
+        :return: sparse column of the same values
+        """
+
+        sparse_column: SparseColumn = cls(column.typecode)
+        known: list[bool] = [value == value for value in column] if column.typecode == "d" \
+            else [value != MISSING_CODE for value in column]
+        sparse_column.__rows = array("I", itertools.compress(range(len(column)), known))
+        sparse_column.__values = array(column.typecode, itertools.compress(column, known))
+        sparse_column.__length = len(column)
+        return sparse_column
+
+    def to_dense(self) -> array:
+        """Returns the values of all the rows.
+
+        :return: array of value codes or numbers, with the missing values included
+        """
+
+        column: array = array(self.__values.typecode, [self.__missing()]) * self.__length
+        for row, value in zip(self.__rows, self.__values):
+            column[row] = value
+        return column
+
+    @property
+    def rows(self) -> array:
+        """Returns the indices of the rows whose values are known.
+
+        :return: row indices, in increasing order
+        """
+
+        return self.__rows
+
+    @property
+    def values(self) -> array:
+        """Returns the known values, in the order of their rows.
+
+        :return: value codes or numbers
+        """
+
+        return self.__values
+
+    def append(self, value) -> None:
+        if (value == value) if self.__values.typecode == "d" else value != MISSING_CODE:  # known value
+            self.__rows.append(self.__length)
+            self.__values.append(value)
+        self.__length += 1
+
+    def __missing(self):
+        return math.nan if self.__values.typecode == "d" else MISSING_CODE
+
+    def __getitem__(self, row: int):
+        position: int = bisect_left(self.__rows, row)
+        if position < len(self.__rows) and self.__rows[position] == row:
+            return self.__values[position]
+        return self.__missing()
+
+    def __len__(self) -> int:
+        return self.__length
+
+
+class ColumnFileWriter:
+    """Writer of examples into a directory of column files, which can be opened by ColumnStore.open.
+
+    Every feature column, as well as the class label column, is written into its own file of little-endian
+    value codes, or of 64-bit floating point values for numeric features. Examples are encoded in memory and
+    written out in chunks, so only the vocabularies and a single chunk of examples are held in memory at once.
+    Vocabularies are written together with the other metadata when the writer is closed.
+
+    """
+
+    def __init__(self, directory: str, feature_names: list[str], class_label: str,
+                 numeric_features: Iterable[str] = (), chunk_size: int = 100000) -> None:
+        """Creates the directory of column files, which is overwritten if it already exists.
+
+        :param directory: directory of the column files
+        :param feature_names: names of the features, in the order in which their values are provided
+        :param class_label: name of the class label
+        :param numeric_features: names of the features whose values are numbers
+        :param chunk_size: number of examples encoded in memory before they are written out
+        """
+
+        self.__directory: str = directory
+        # columns of a chunk are written out as they are, so they are never stored sparsely
+        self.__store: ColumnStore = ColumnStore(feature_names, class_label, numeric_features, sparse=False)
+        self.__chunk_size: int = chunk_size
+        self.__rows: int = 0
+        os.makedirs(directory, exist_ok=True)
+        self.__paths: list[str] = [os.path.join(directory, _column_file(column))
+                                   for column in range(len(feature_names))] + [os.path.join(directory, _LABELS_FILE)]
+        for path in self.__paths:
+            open(path, "wb").close()
+
+    def append(self, feature_values: list[str], label: str) -> None:
+        """Encodes the given example and appends it to the column files.
+
+        :param feature_values: values of the features, in the order of the feature names
+        :param label: class label of the example
+        """
+
+        self.__store.append(feature_values, label)
+        if len(self.__store) >= self.__chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the encoded examples out to the column files."""
+
+        self.__rows += len(self.__store)
+        for path, column in zip(self.__paths, self.__store.columns + [self.__store.labels]):
+            values: array = column
+            if sys.byteorder != "little":
+                values = array(column.typecode, column)
+                values.byteswap()
+            with open(path, "ab") as column_file:
+                values.tofile(column_file)
+            del column[:]  # only the vocabularies of the store are retained
+
+    def close(self) -> int:
+        """Writes out the remaining examples and the metadata of the column files.
+
+        :return: number of written examples
+        """
+
+        self.flush()
+        metadata: dict = {"feature_names": self.__store.feature_names, "class_label": self.__store.class_label,
+                          "numeric": self.__store.numeric, "rows": self.__rows,
+                          "vocabularies": self.__store.vocabularies, "label_vocabulary": self.__store.label_vocabulary}
+        with open(os.path.join(self.__directory, _METADATA_FILE), "w") as metadata_file:
+            json.dump(metadata, metadata_file)
+        return self.__rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+
+
+def _column_file(column: int) -> str:
+    return f"column{column}.bin"
+
+
+def _map_column(path: str, typecode: str, rows: int):
+    """Memory-maps a column file.
+
+    :param path: path of the column file
+    :param typecode: array typecode of the values in the file
+    :param rows: number of values in the file
+    :return: read-only sequence of the values, backed by the file
+    """
+
+    if rows == 0:  # empty files cannot be memory-mapped
+        return array(typecode)
+    with open(path, "rb") as column_file:
+        buffer: mmap.mmap = mmap.mmap(column_file.fileno(), 0, access=mmap.ACCESS_READ)
+    column = memoryview(buffer)[:rows * array(typecode).itemsize].cast(typecode)
+    if sys.byteorder != "little":  # files are little-endian, so the values are copied and swapped
+        column = array(typecode, column)
+        column.byteswap()
+    return column
+
+
+def parse_number(value: str) -> float:
+    """Parses the value of a numeric feature.
+
+    :param value: string representation of the value
+    :return: parsed value
+    """
+
+    try:
+        number: float = float(value)
+    except ValueError:
+        number: float = math.nan
+    if math.isnan(number):
+        raise ValueError("Value " + repr(value) + " of a numeric feature is not a number")
+    return number
+
+
+def format_number(value: float) -> str:
+    """Formats the value of a numeric feature, omitting the decimal part of whole numbers.
+
+    :param value: value to be formatted
+    :return: string representation of the value
+    """
+
+    return str(int(value)) if value.is_integer() else repr(value)
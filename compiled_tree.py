@@ -0,0 +1,392 @@
+import itertools
+import math
+import mmap
+import struct
+import sys
+from array import array
+from collections import deque
+from typing import Iterator, Optional, Sequence, Union
+
+from column_store import MISSING_CODE, format_number
+from dataset import Dataset
+from node import Node, Leaf
+
+
+_MAGIC: bytes = b"ID3T"
+_VERSION: int = 1
+_HEADER: struct.Struct = struct.Struct("<4sIIIII")  # magic, version, nodes, branches, features, labels
+
+
+class CompiledTree:
+    """Flat, array-based representation of a fitted decision tree, used for fast batch inference.
+
+    Nodes are numbered in breadth-first order, and the compiled tree can be saved into a binary file and
+    memory-mapped back for predictions. For every node, the index of its feature (-1 for leaves) and its
+    label are stored, where the label of an inner node is its most frequent label, used as a fallback for unseen
+    values. Branches of the node occupy the range child_offsets[node]:child_offsets[node + 1] of the branch arrays,
+    which store the integer code of the branch value within the feature's vocabulary and the index of the child.
+    Nodes of numeric features also store their threshold (NaN for other nodes), and have two branches: the first
+    one for the values lower than or equal to the threshold, and the second one for the other values. Inner nodes
+    store the index of the child that the examples with missing values follow (-1 if there is none).
+
+    """
+
+    def __init__(self, feature_names: list[str], vocabularies: list[list[str]], labels: list[str],
+                 node_features: Sequence[int], node_labels: Sequence[int], child_offsets: Sequence[int],
+                 branch_values: Sequence[int], branch_children: Sequence[int],
+                 node_thresholds: Sequence[float], node_defaults: Sequence[int]) -> None:
+        """Creates the compiled tree from its arrays.
+
+        Arrays can be any integer sequences, such as instances of array or memoryviews of a memory-mapped model file.
+
+        :param feature_names: names of the features that the nodes split by
+        :param vocabularies: branch values of every feature, indexed by the value codes
+        :param labels: class labels, indexed by the label codes
+        :param node_features: feature index of every node, or -1 for leaves
+        :param node_labels: label code of every leaf, or the code of the most frequent label of every inner node
+        :param child_offsets: start of the branches of every node within the branch arrays, followed by the
+            total number of branches
+        :param branch_values: value code of every branch
+        :param branch_children: index of the child node of every branch
+        :param node_thresholds: threshold of every node of a numeric feature, or NaN for other nodes
+        :param node_defaults: index of the default child of every inner node, or -1 for leaves and the nodes
+            without a default branch
+        """
+
+        self.__feature_names: list[str] = feature_names
+        self.__vocabularies: list[list[str]] = vocabularies
+        self.__labels: list[str] = labels
+        self.__node_features: Sequence[int] = node_features
+        self.__node_labels: Sequence[int] = node_labels
+        self.__child_offsets: Sequence[int] = child_offsets
+        self.__branch_values: Sequence[int] = branch_values
+        self.__branch_children: Sequence[int] = branch_children
+        self.__node_thresholds: Sequence[float] = node_thresholds
+        self.__node_defaults: Sequence[int] = node_defaults
+        self.__numeric: list[bool] = [False] * len(feature_names)  # whether the features are numeric
+        self.__branches: Optional[str] = None  # formatted branches, kept as the compiled tree never changes
+        for feature, threshold in zip(node_features, node_thresholds):
+            if threshold == threshold:  # not NaN
+                self.__numeric[feature] = True
+
+    @classmethod
+    def from_tree(cls, root: Union[Node, Leaf]):
+        """Compiles the tree with the given root.
+
+        Branches of every node are stored in the order in which they were added to the node.
+
+        :param root: root of a fitted decision tree
+        :return: compiled decision tree
+        """
+
+        feature_names: list[str] = []
+        vocabularies: list[list[str]] = []
+        labels: list[str] = []
+        node_features: array = array("i")
+        node_labels: array = array("I")
+        child_offsets: array = array("I", [0])
+        branch_values: array = array("I")
+        branch_children: array = array("I")
+        node_thresholds: array = array("d")
+        node_defaults: array = array("i")
+
+        feature_indices: dict[str, int] = {}
+        value_codes: list[dict[str, int]] = []
+        label_codes: dict[str, int] = {}
+
+        def encode(codes: dict[str, int], values: list[str], value: str) -> int:
+            if value not in codes:
+                codes[value] = len(values)
+                values.append(value)
+            return codes[value]
+
+        queue: deque[Union[Node, Leaf]] = deque([root])
+        node_count: int = 1
+        while queue:
+            node: Union[Node, Leaf] = queue.popleft()
+            if isinstance(node, Leaf):
+                node_features.append(-1)
+                node_thresholds.append(math.nan)
+                node_defaults.append(-1)
+                node_labels.append(encode(label_codes, labels, node.label))
+                child_offsets.append(len(branch_values))
+                continue
+            if node.feature not in feature_indices:
+                feature_indices[node.feature] = len(feature_names)
+                feature_names.append(node.feature)
+                vocabularies.append([])
+                value_codes.append({})
+            feature: int = feature_indices[node.feature]
+            node_features.append(feature)
+            node_thresholds.append(math.nan if node.threshold is None else node.threshold)
+            node_labels.append(encode(label_codes, labels, node.most_frequent_label))
+            node_defaults.append(-1)
+            for branch_value, child_node in node.children():
+                branch_value: str
+                child_node: Union[Node, Leaf]
+
+                if branch_value == node.default_branch:
+                    node_defaults[-1] = node_count
+                branch_values.append(encode(value_codes[feature], vocabularies[feature], branch_value))
+                branch_children.append(node_count)
+                queue.append(child_node)
+                node_count += 1
+            child_offsets.append(len(branch_values))
+
+        return cls(feature_names, vocabularies, labels, node_features, node_labels, child_offsets,
+                   branch_values, branch_children, node_thresholds, node_defaults)
+
+    def save(self, path: str) -> None:
+        """Saves the compiled tree into a binary file at the given path.
+
+        The file starts with a header of the magic bytes and the format version, followed by the number of nodes,
+        branches, features and labels. Node thresholds follow as little-endian 64-bit floats, and default children,
+        node and branch arrays as little-endian 32-bit integers, so that they can be used in place when the file is
+        memory-mapped.
+        String tables of feature names, labels and the vocabulary of each feature are stored at the end.
+
+        :param path: path of the model file
+        """
+
+        with open(path, "wb") as model_file:
+            model_file.write(_HEADER.pack(_MAGIC, _VERSION, len(self.__node_features), len(self.__branch_values),
+                                          len(self.__feature_names), len(self.__labels)))
+            for values, typecode in ((self.__node_thresholds, "d"), (self.__node_defaults, "i"),
+                                     (self.__node_features, "i"), (self.__node_labels, "I"),
+                                     (self.__child_offsets, "I"), (self.__branch_values, "I"),
+                                     (self.__branch_children, "I")):
+                values = array(typecode, values)
+                if sys.byteorder != "little":
+                    values.byteswap()
+                model_file.write(values.tobytes())
+            for strings in (self.__feature_names, self.__labels, *self.__vocabularies):
+                model_file.write(_encode_strings(strings))
+
+    @classmethod
+    def load(cls, path: str):
+        """Loads the compiled tree from a binary file created by the save method.
+
+        The file is memory-mapped and node and branch arrays are used directly from the mapped memory, so they
+        are shared by all the processes that load the same file. Only the string tables are decoded.
+
+        :param path: path of the model file
+        :return: compiled decision tree
+        """
+
+        with open(path, "rb") as model_file:
+            buffer: mmap.mmap = mmap.mmap(model_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(buffer) < _HEADER.size:
+            raise ValueError("File " + path + " is not a decision tree model")
+        magic, version, node_count, branch_count, feature_count, label_count = _HEADER.unpack_from(buffer)
+        if magic != _MAGIC:
+            raise ValueError("File " + path + " is not a decision tree model")
+        if version != _VERSION:
+            raise ValueError(f"Unsupported model version {version}, expected {_VERSION}")
+
+        offset: int = _HEADER.size
+        arrays: list[Sequence] = []
+        for length, typecode in ((node_count, "d"), (node_count, "i"), (node_count, "i"), (node_count, "I"),
+                                 (node_count + 1, "I"), (branch_count, "I"), (branch_count, "I")):
+            size: int = array(typecode).itemsize * length
+            values: Sequence = memoryview(buffer)[offset:offset + size].cast(typecode)
+            if sys.byteorder != "little":
+                values = array(typecode, values)
+                values.byteswap()
+            arrays.append(values)
+            offset += size
+
+        feature_names, offset = _decode_strings(buffer, offset)
+        labels, offset = _decode_strings(buffer, offset)
+        vocabularies: list[list[str]] = []
+        for _ in range(feature_count):
+            vocabulary, offset = _decode_strings(buffer, offset)
+            vocabularies.append(vocabulary)
+        if len(labels) != label_count:
+            raise ValueError("File " + path + " is not a valid decision tree model")
+
+        node_thresholds, node_defaults, *arrays = arrays
+        return cls(feature_names, vocabularies, labels, *arrays, node_thresholds, node_defaults)
+
+    @property
+    def feature_names(self) -> list[str]:
+        return self.__feature_names
+
+    def __len__(self) -> int:
+        return len(self.__node_features)
+
+    def memory_footprint(self) -> int:
+        """Estimates the memory held by the compiled tree. Arrays of a memory-mapped model file are included,
+        although their pages are shared with the page cache.
+
+        :return: size of the arrays and the string tables, in bytes
+        """
+
+        size: int = sum(memoryview(values).nbytes for values in (
+            self.__node_features, self.__node_labels, self.__child_offsets, self.__branch_values,
+            self.__branch_children, self.__node_thresholds, self.__node_defaults))
+        for strings in itertools.chain([self.__feature_names, self.__labels], self.__vocabularies):
+            size += sys.getsizeof(strings) + sum(sys.getsizeof(string) for string in strings)
+        return size
+
+    def predict_batch(self, dataset: Dataset) -> list[str]:
+        """Predicts the class labels of all the examples of the given dataset.
+
+        Examples are routed through the tree level by level: the examples that reached some inner node are
+        partitioned among its children by looking up the integer codes of their values, which are translated from
+        the dataset's vocabulary into the tree's vocabulary once per feature. Examples whose value was unseen in the
+        training procedure are labeled with the most frequent label of the node, and the numeric values of the
+        features the tree splits as categorical are looked up as formatted by column_store.format_number. Values of
+        numeric features are compared with the thresholds of the nodes, and the ones that are not numbers are
+        handled as unseen values. Examples whose value is missing, or is not a number for a numeric feature, follow
+        the default branch of the node, if it has one, and are labeled with its most frequent label otherwise.
+
+        :param dataset: examples to be classified
+        :return: predicted class labels, in the order of the examples
+        """
+
+        # value codes of the examples, translated into the tree's vocabularies, or the values of numeric features
+        columns: list[Union[list, None]] = []
+        numeric_features: set[str] = set(dataset.numeric_features)
+        for feature, feature_name in enumerate(self.__feature_names):
+            if feature_name not in dataset.feature_names:
+                columns.append(None)  # every example is missing the feature
+                continue
+            if self.__numeric[feature]:
+                columns.append(dataset.numeric_column(feature_name))
+                continue
+            tree_codes: dict[str, int] = {value: code for code, value in enumerate(self.__vocabularies[feature])}
+            if feature_name in numeric_features:  # formatted numbers are looked up, as the predict method does
+                translated: dict[float, int] = {}
+                column: list[int] = []
+                for value in dataset.numeric_column(feature_name):
+                    if value != value:  # missing value
+                        column.append(-2)
+                        continue
+                    code: Optional[int] = translated.get(value)
+                    if code is None:
+                        code = translated[value] = tree_codes.get(format_number(value), -1)
+                    column.append(code)
+                columns.append(column)
+                continue
+            codes, vocabulary = dataset.encoded_column(feature_name)
+            translation: dict[int, int] = {code: tree_codes.get(value, -1) for code, value in enumerate(vocabulary)}
+            translation[MISSING_CODE] = -2  # missing value
+            columns.append(list(map(translation.__getitem__, codes)))
+
+        predictions: list[int] = [0] * len(dataset)
+        level: dict[int, list[int]] = {0: list(range(len(dataset)))} if len(dataset) > 0 else {}
+        while level:
+            next_level: dict[int, list[int]] = {}
+            for node, positions in level.items():
+                feature: int = self.__node_features[node]
+                if feature < 0:  # leaf
+                    for position in positions:
+                        predictions[position] = self.__node_labels[node]
+                    continue
+                default: int = self.__node_defaults[node]
+                column: Union[list, None] = columns[feature]
+                if column is None:  # feature that is missing from the dataset
+                    if default >= 0:
+                        next_level.setdefault(default, []).extend(positions)
+                    else:
+                        for position in positions:
+                            predictions[position] = self.__node_labels[node]
+                    continue
+                start, end = self.__child_offsets[node], self.__child_offsets[node + 1]
+                threshold: float = self.__node_thresholds[node]
+                if threshold == threshold:  # numeric feature
+                    lower_positions: list[int] = next_level.setdefault(self.__branch_children[start], [])
+                    upper_positions: list[int] = next_level.setdefault(self.__branch_children[start + 1], [])
+                    for position in positions:
+                        value: float = column[position]
+                        if value <= threshold:
+                            lower_positions.append(position)
+                        elif value > threshold:
+                            upper_positions.append(position)
+                        elif default >= 0:  # NaN
+                            next_level[default].append(position)
+                        else:
+                            predictions[position] = self.__node_labels[node]
+                    continue
+                lookup: dict[int, int] = dict(zip(self.__branch_values[start:end], self.__branch_children[start:end]))
+                lookup[-2] = default  # missing values follow the default branch
+                for position in positions:
+                    child: int = lookup.get(column[position], -1)
+                    if child < 0:  # unseen value
+                        predictions[position] = self.__node_labels[node]
+                    elif child in next_level:
+                        next_level[child].append(position)
+                    else:
+                        next_level[child] = [position]
+            level = next_level
+
+        return [self.__labels[label] for label in predictions]
+
+    def branches(self) -> str:
+        """Formats the branches of the compiled tree, in the same way as utils.format_branches does for the tree
+        it was compiled from. Branches are formatted only once, on the first call.
+
+        :return: string representation of all branches
+        """
+
+        if self.__branches is None:
+            self.__branches = "\n".join(self.iter_branches())
+        return self.__branches
+
+    def iter_branches(self) -> Iterator[str]:
+        """Formats the branches of the compiled tree lazily, in the same way as utils.iter_branches does for the
+        tree it was compiled from.
+
+        :return: generator of the branches, without line terminators
+        """
+
+        if self.__node_features[0] < 0:  # depth was limited to 0
+            yield self.__labels[self.__node_labels[0]]
+            return
+
+        path: list[str] = []  # formatted parts of the current path
+        stack: list[tuple[int, int, str]] = [(0, 0, "")]  # (node, depth, part of the path leading to the node)
+        while stack:
+            node, depth, part = stack.pop()
+            del path[max(depth - 1, 0):]
+            if depth > 0:
+                path.append(part)
+            feature: int = self.__node_features[node]
+            if feature < 0:  # leaf -> create output entry
+                yield " ".join(path + [self.__labels[self.__node_labels[node]]])
+                continue
+            start, end = self.__child_offsets[node], self.__child_offsets[node + 1]
+            for branch in range(end - 1, start - 1, -1):  # reversed, so that the first branch is popped first
+                value: str = self.__vocabularies[feature][self.__branch_values[branch]]
+                relation: str = "" if self.__numeric[feature] else "="  # numeric branch values contain the relation
+                stack.append((self.__branch_children[branch], depth + 1,
+                              f"{depth + 1}:{self.__feature_names[feature]}{relation}{value}"))
+
+
+def _encode_strings(strings: list[str]) -> bytes:
+    """Encodes the list of strings as a string table: the number of strings and the end offset of each string,
+    as little-endian 32-bit integers, followed by the UTF-8 encoded strings.
+
+    :param strings: strings to be encoded
+    :return: encoded string table
+    """
+
+    encoded: list[bytes] = [string.encode("utf-8") for string in strings]
+    offsets: list[int] = list(itertools.accumulate(len(string) for string in encoded))
+    return struct.pack(f"<I{len(offsets)}I", len(offsets), *offsets) + b"".join(encoded)
+
+
+def _decode_strings(buffer, offset: int) -> tuple[list[str], int]:
+    """Decodes the string table stored at the given offset of the buffer.
+
+    :param buffer: buffer containing the string table
+    :param offset: offset of the string table
+    :return: decoded strings, and the offset of the end of the string table
+    """
+
+    (count,) = struct.unpack_from("<I", buffer, offset)
+    ends: tuple[int, ...] = struct.unpack_from(f"<{count}I", buffer, offset + 4)
+    start: int = offset + 4 * (count + 1)
+    strings: list[str] = [bytes(buffer[start + begin:start + end]).decode("utf-8")
+                          for begin, end in zip((0,) + ends, ends)]
+    return strings, start + (ends[-1] if ends else 0)
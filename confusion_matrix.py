@@ -1,9 +1,14 @@
+from collections import Counter
+from typing import Optional
+
+
 class ConfusionMatrix:
     """Model of a confusion matrix, represented as a two-dimensional list of integer values
 
     """
 
-    def __init__(self, label_space: set[str], expected: list[str], actual: list[str]) -> None:
+    def __init__(self, label_space: set[str], expected: list[str], actual: list[str],
+                 weights: Optional[list[int]] = None) -> None:
         """Initializes the confusion matrix to match the given parameters.
 
         Confusion matrix presents a more detailed view into some classification outcome. It accumulates
@@ -13,15 +18,42 @@ class ConfusionMatrix:
         :param label_space: list of all possible values that the predicted label can have
         :param expected: correct labels of some dataset
         :param actual: labels obtained with some classification procedure
+        :param weights: weights of the examples, i.e. the numbers of identical examples they stand for. If not
+            provided, every example is counted once.
         """
 
         self.__conf_mat: list[list[int]] = [[0 for _ in range(len(label_space))] for _ in range(len(label_space))]
         # sort the values alphabetically
-        sorted_labels: list[str] = sorted(label_space)
-        for i, v in enumerate(expected):
-            i: int
-            v: str
-            self.__conf_mat[sorted_labels.index(v)][sorted_labels.index(actual[i])] += 1
+        codes: dict[str, int] = {label: code for code, label in enumerate(sorted(label_space))}
+        # examples are counted per (expected, actual) pair in a single pass, so every label is looked up only once
+        counts: Counter = Counter()
+        if weights is None:
+            counts.update(zip(expected, actual))
+        else:
+            for pair, weight in zip(zip(expected, actual), weights):
+                counts[pair] += weight
+        for (expected_label, actual_label), count in counts.items():
+            for label in (expected_label, actual_label):
+                if label not in codes:
+                    raise ValueError("Label " + label + " is not a part of the label space")
+            self.__conf_mat[codes[expected_label]][codes[actual_label]] += count
+
+    @classmethod
+    def from_matrix(cls, matrix: list[list[int]]):
+        """Creates the confusion matrix from already accumulated counts.
+
+        :param matrix: two-dimensional list whose rows correspond to the expected labels and columns to the
+            actual labels, in the alphabetical order of the labels
+        :return: confusion matrix with the given values
+        """
+
+        confusion_matrix: ConfusionMatrix = cls(set(), [], [])
+        confusion_matrix.__conf_mat = [list(row) for row in matrix]
+        return confusion_matrix
+
+    @property
+    def matrix(self) -> list[list[int]]:
+        return self.__conf_mat
 
     def __str__(self) -> str:
         """Represents the instance of confusion matrix as a string.
@@ -32,16 +64,7 @@ class ConfusionMatrix:
         :return: string representation of the confusion matrix
         """
 
-        conf_mat_str: str = ""
-        for i in range(len(self.__conf_mat)):  # row
-            for j in range(len(self.__conf_mat)):  # col
-                conf_mat_str += str(self.__conf_mat[i][j])
-                if j != len(self.__conf_mat) - 1:
-                    conf_mat_str += " "
-            if i != len(self.__conf_mat) - 1:
-                conf_mat_str += "\n"
-
-        return conf_mat_str
+        return "\n".join(" ".join(map(str, row)) for row in self.__conf_mat)
 
     def __repr__(self):
         return self.__str__()
@@ -0,0 +1,33 @@
+import argparse
+
+import utils
+
+
+def main() -> None:
+    """Converts a csv dataset into a directory of column files, used to fit decision trees on datasets that do not
+    fit into memory.
+
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="Conversion of a csv dataset into memory-mappable column files.")
+    parser.add_argument("dataset", help="path of the csv dataset")
+    parser.add_argument("directory", help="directory the column files are written to")
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--delimiter", default=",")
+    parser.add_argument("--no-header", action="store_true", help="the first row of the dataset is an example")
+    parser.add_argument("--label-column", help="name of the class label column, the last one by default")
+    parser.add_argument("--numeric", default="", help="comma-separated names of the numeric features")
+    parser.add_argument("--detect-numeric", action="store_true",
+                        help="features whose values in the first chunk are all numbers are numeric")
+    args: argparse.Namespace = parser.parse_args()
+
+    rows: int = utils.convert_dataset(args.dataset, args.directory, args.chunk_size, args.delimiter,
+                                      not args.no_header, args.label_column,
+                                      numeric_features=[name for name in args.numeric.split(",") if name],
+                                      detect_numeric=args.detect_numeric)
+    print(f"Converted {rows} examples into {args.directory}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,92 @@
-import utils
+import itertools
+import math
+from array import array
+from collections import Counter
+from typing import Iterable, Optional
+
+from column_store import MISSING, MISSING_CODE, ColumnStore, SparseColumn, format_number
+from information_gain import best_feature, entropy_from_counts, information_gain_from_counts, most_frequent
 
 
 class Dataset:
     """Model of a dataset which stores a list of classified examples, each having a feature map and a class label.
 
+    Examples are kept in a columnar, dictionary-encoded ColumnStore. A dataset is a view into the store, defined
+    by the features it retains and the indices of the rows it contains, so grouping the dataset by some feature
+    only creates index arrays and never copies the examples themselves.
+
+    Features are either categorical or numeric. Datasets are grouped by the values of categorical features, and
+    split in two by a threshold on the values of numeric features.
+
+    Label counts of the examples are cached and kept up to date as the examples are added, so the label
+    statistics of the dataset don't require a pass over the examples.
+
+    Empty cells are missing values. They are left out of the information gain, which is scaled by the share of
+    the examples whose value is known, as in C4.5, and examples with missing values follow the default branch,
+    i.e. the largest group, when the dataset is grouped or split. Columns of the store which are mostly missing are
+    kept sparse, and the contingency tables, threshold splits and groups read only their known values, so the cost
+    of splitting by such a feature scales with the number of its known values.
+
+    Examples can have weights, so that a single example stands for a number of identical ones. Label counts,
+    contingency tables and threshold splits count every example with its weight, so a dataset of weighted examples
+    is fitted in the same way as the dataset in which every example is repeated as many times as its weight.
+
     """
 
-    def __init__(self, features: list[str]) -> None:
+    def __init__(self, features: list[str], numeric_features: Optional[list[str]] = None) -> None:
         """Creates a new instance of the dataset that will store examples with given features.
 
         :param features: Feature names of the dataset. Last feature of the list is considered to be the class label.
+        :param numeric_features: Names of the features whose values are numbers. Other features are categorical.
         """
 
         self.__feature_names: list[str] = features[:-1]
         self.__class_label: str = features[-1]
-        self.__data: list[tuple[dict[str, str], str]] = []
+        self.__store: ColumnStore = ColumnStore(self.__feature_names, self.__class_label, numeric_features or ())
+        self.__columns: list[int] = list(range(len(self.__feature_names)))  # store columns of the features
+        self.__rows: array = array("I")  # store rows of the examples
+        self.__label_counts: dict[str, int] = {}  # label counts of the first __counted_rows examples
+        self.__counted_rows: int = 0
+        self.__thresholds: Optional[tuple[int, dict[str, tuple[float, float]]]] = None  # (rows, thresholds)
+        self.__is_view: bool = False  # whether the dataset is a view into the examples of another dataset
+
+    @classmethod
+    def __view(cls, store: ColumnStore, columns: list[int], rows: array, is_view: bool = True):
+        """Creates a dataset over the given rows of the store, retaining only the features in the given columns.
+
+        :param store: store that holds the examples
+        :param columns: indices of the store columns that correspond to the features of the dataset
+        :param rows: indices of the store rows that correspond to the examples of the dataset
+        :param is_view: whether the store belongs to another dataset, so that no examples can be added to the new
+            one, nor changed through it
+        :return: dataset sharing the storage with the given store
+        """
+
+        dataset: Dataset = cls.__new__(cls)
+        dataset.__feature_names = [store.feature_names[column] for column in columns]
+        dataset.__class_label = store.class_label
+        dataset.__store = store
+        dataset.__columns = columns
+        dataset.__rows = rows
+        dataset.__label_counts = {}
+        dataset.__counted_rows = 0
+        dataset.__thresholds = None
+        dataset.__is_view = is_view
+        return dataset
+
+    @classmethod
+    def from_column_files(cls, directory: str):
+        """Opens the dataset of the column files in the given directory, written by utils.convert_dataset.
+
+        Columns are memory-mapped rather than loaded, so the dataset and all of its subsets hold only the indices
+        of their examples in memory. No examples can be added to the dataset.
+
+        :param directory: directory of the column files
+        :return: dataset of all the examples in the column files
+        """
+
+        store: ColumnStore = ColumnStore.open(directory)
+        return cls.__view(store, list(range(len(store.feature_names))), array("I", range(len(store))), False)
 
     @property
     def most_frequent_label(self) -> str:
@@ -26,13 +98,7 @@ class Dataset:
         :return: Most frequent label of the dataset.
         """
 
-        max_count: int = self.label_sample.count(
-            max(self.label_sample, key=lambda label: self.label_sample.count(label)))
-        max_count_labels: list[str] = list(
-            filter(lambda label:
-                   self.label_sample.count(label) == max_count, self.label_sample))
-        max_count_labels.sort()
-        return max_count_labels[0]
+        return most_frequent(self.__counts())
 
     @property
     def label_sample(self) -> list[str]:
@@ -41,7 +107,28 @@ class Dataset:
         :return: Labels from the dataset
         """
 
-        return [x[1] for x in self.__data]
+        labels: array = self.__store.labels
+        label_vocabulary: list[str] = self.__store.label_vocabulary
+        return [label_vocabulary[labels[row]] for row in self.__rows]
+
+    @property
+    def weights(self) -> Optional[list[int]]:
+        """Returns the weights of the examples, i.e. the numbers of identical examples they stand for.
+
+        :return: weights of the examples, or None if every example in the storage has the weight 1
+        """
+
+        weights: Optional[array] = self.__store.weights
+        return None if weights is None else list(map(weights.__getitem__, self.__rows))
+
+    @property
+    def total_weight(self) -> int:
+        """Returns the number of examples, counting every example with its weight.
+
+        :return: sum of the weights of the examples
+        """
+
+        return self.__weight(self.__rows)
 
     @property
     def label_space(self) -> set[str]:
@@ -50,7 +137,7 @@ class Dataset:
         :return: distinct values of class labels
         """
 
-        return set(self.label_sample)  # this is kinda slow but ok
+        return set(self.__counts())
 
     @property
     def feature_names(self) -> list[str]:
@@ -61,52 +148,309 @@ class Dataset:
 
         return self.__feature_names
 
-    def add_example(self, feature_values: list[str], label: str) -> None:
+    @property
+    def class_label(self) -> str:
+        """Returns the name of the class label.
+
+        :return: class label name
+        """
+
+        return self.__class_label
+
+    @property
+    def numeric_features(self) -> list[str]:
+        """Returns the names of the numeric features.
+
+        :return: numeric feature names
+        """
+
+        return [name for name, column in zip(self.__feature_names, self.__columns) if self.__store.numeric[column]]
+
+    @property
+    def rows(self) -> array:
+        """Returns the indices of the storage rows that hold the examples of the dataset.
+
+        :return: row indices of the examples
+        """
+
+        return self.__rows
+
+    @property
+    def memory_mapped(self) -> bool:
+        """Returns whether the examples are memory-mapped from column files, so no examples can be added.
+
+        :return: whether the dataset was opened from column files, or is a subset of such a dataset
+        """
+
+        return self.__store.memory_mapped
+
+    def copy(self, weights: Optional[list[int]] = None):
+        """Returns a dataset of the same examples and features, which holds its own copy of the examples.
+
+        Examples added to the copy are not added to this dataset, nor to the other datasets sharing its storage.
+
+        :param weights: weights of the examples of the copy. If not provided, the examples keep their weights.
+        :return: copy of the dataset
+        """
+
+        return Dataset.__view(self.__store.copy(self.__rows, weights), list(self.__columns),
+                              array("I", range(len(self.__rows))), False)
+
+    def subset(self, rows: array, feature_names: Optional[list[str]] = None):
+        """Returns a dataset over the given storage rows, sharing the storage with this dataset.
+
+        Row indices are copied, so the subset does not change with the given array. No examples can be added to
+        the subset, nor changed through it.
+
+        :param rows: row indices of the examples, as returned by the rows property of a dataset sharing the storage
+        :param feature_names: features retained in the subset. If not provided, all the features are retained.
+        :return: dataset of the examples in the given rows
+        """
+
+        if feature_names is None:
+            return Dataset.__view(self.__store, self.__columns, array("I", rows))
+        for feature_name in feature_names:
+            if feature_name not in self.__feature_names:
+                raise ValueError("Feature " + feature_name + " is not a part of the dataset")
+        return Dataset.__view(self.__store, [self.__store.column_index(name) for name in feature_names],
+                              array("I", rows))
+
+    def encoded_column(self, feature_name: str) -> tuple[list[int], list[str]]:
+        """Returns the encoded values of the feature with the given name, together with the feature's vocabulary.
+
+        :param feature_name: name of the feature
+        :return: value codes of the dataset examples, and the list that maps the codes to the values. Missing
+            values are represented by MISSING_CODE.
+        """
+
+        if feature_name not in self.__feature_names:
+            raise ValueError("Feature " + feature_name + " is not a part of the dataset")
+        column: int = self.__columns[self.__feature_names.index(feature_name)]
+        if self.__store.numeric[column]:
+            raise ValueError("Feature " + feature_name + " is numeric")
+        return list(map(self.__store.columns[column].__getitem__, self.__rows)), self.__store.vocabularies[column]
+
+    def numeric_column(self, feature_name: str) -> list[float]:
+        """Returns the values of the feature with the given name as numbers.
+
+        Values of a categorical feature are parsed once per distinct value. Missing values and the values which
+        are not numbers are represented by NaN.
+
+        :param feature_name: name of the feature
+        :return: values of the dataset examples
+        """
+
+        if feature_name not in self.__feature_names:
+            raise ValueError("Feature " + feature_name + " is not a part of the dataset")
+        column: int = self.__columns[self.__feature_names.index(feature_name)]
+        if self.__store.numeric[column]:
+            return list(map(self.__store.columns[column].__getitem__, self.__rows))
+        numbers: list[float] = []
+        for value in self.__store.vocabularies[column]:
+            try:
+                numbers.append(float(value))
+            except ValueError:
+                numbers.append(math.nan)
+        return [numbers[code] if code != MISSING_CODE else math.nan
+                for code in map(self.__store.columns[column].__getitem__, self.__rows)]
+
+    def decode_value(self, feature_name: str, code: int) -> str:
+        """Returns the value of a categorical feature with the given code.
+
+        :param feature_name: name of the feature
+        :param code: value code, as used by the encoded_column and contingency_tables methods
+        :return: value of the feature, or MISSING
+        """
+
+        if feature_name not in self.__feature_names:
+            raise ValueError("Feature " + feature_name + " is not a part of the dataset")
+        return self.__store.decode(self.__columns[self.__feature_names.index(feature_name)], code)
+
+    def add_example(self, feature_values: list[str], label: str, weight: int = 1) -> None:
         """Adds the given example into the dataset.
 
         Feature values are sequentially matched against feature names of the dataset.
 
         :param feature_values: Feature realizations of the example
         :param label: class label of the example
+        :param weight: weight of the example, i.e. the number of identical examples it stands for
         """
 
-        self.__data.append((dict(zip(self.__feature_names, feature_values)), label))
+        if self.__is_view:
+            raise ValueError("Examples cannot be added to a dataset obtained by grouping or subsetting another one")
+        self.__rows.append(self.__store.append(feature_values, label, weight))
+        if self.__counted_rows == len(self.__rows) - 1:  # label counts are up to date
+            self.__label_counts[label] = self.__label_counts.get(label, 0) + weight
+            self.__counted_rows += 1
+
+    def add_weight(self, position: int, weight: int = 1) -> None:
+        """Increases the weight of the example at the given position, e.g. when an identical example is seen again.
+
+        Statistics cached by the other datasets over the same examples are not updated, so the weights should be
+        adjusted only while the dataset is being built.
+
+        :param position: position of the example within the dataset
+        :param weight: weight added to the example
+        """
 
-    def __add_example(self, feature_map: dict[str, str], label: str) -> None:
-        self.__data.append((feature_map, label))
+        if self.__is_view:
+            raise ValueError("Examples cannot be changed in a dataset obtained by grouping or subsetting another one")
+        row: int = self.__rows[position]
+        self.__store.add_weight(row, weight)
+        if position < self.__counted_rows:
+            label: str = self.__store.label_vocabulary[self.__store.labels[row]]
+            self.__label_counts[label] += weight
+        self.__thresholds = None
 
-    def group_by_feature(self, feature_name: str) -> dict:
+    def group_by_feature(self, feature_name: str, default: Optional[str] = None) -> dict:
         """groups the dataset by distinct values of a feature defined by the given feature name.
 
+        Examples whose value of the feature is missing are added to the group of the default value.
+
         :param feature_name: name of the feature to group by
+        :param default: value whose group receives the examples with missing values. If not provided, the value
+            of the largest group is used (the first one, if there are multiple such groups).
         :return: dict[str, Dataset] - dataset grouped by the given feature's values
         """
 
         if feature_name not in self.__feature_names:
             raise ValueError("Feature " + feature_name + " is not a part of the dataset")
-        grouped: dict[str, Dataset] = {}
+        position: int = self.__feature_names.index(feature_name)
+        if self.__store.numeric[self.__columns[position]]:
+            raise ValueError("Feature " + feature_name + " is numeric, so it can only be split by a threshold")
+        column = self.__store.columns[self.__columns[position]]
+        vocabulary: list[str] = self.__store.vocabularies[self.__columns[position]]
+        # retain all but the feature by which the grouping is done
+        columns: list[int] = self.__columns[:position] + self.__columns[position + 1:]
+
+        # a single pass over the rows, or over the known values of a sparse column, collecting the row indices of
+        # every distinct value
+        column_index: int = self.__columns[position]
+        known: Optional[tuple[list[int], list[int]]] = self.__known_values(column_index,
+                                                                            self.__positions([column_index]))
+        grouped_rows: dict[int, array] = {}
+        for row, code in zip(self.__rows, map(column.__getitem__, self.__rows)) if known is None \
+                else zip(map(self.__rows.__getitem__, known[0]), known[1]):
+            rows: array = grouped_rows.get(code)
+            if rows is None:
+                rows = grouped_rows[code] = array("I")
+            rows.append(row)
+
+        missing: bool = grouped_rows.pop(MISSING_CODE, None) is not None if known is None \
+            else len(known[0]) < len(self.__rows)
+        if missing:
+            if default is None:
+                default_code: Optional[int] = max(grouped_rows, key=lambda code: self.__weight(grouped_rows[code]),
+                                                  default=None)
+            else:
+                default_code: Optional[int] = self.__store.encode(self.__columns[position], default)
+            if default_code is not None and known is None:  # rows are kept in the order of the dataset
+                grouped_rows[default_code] = array("I", (row for row in self.__rows
+                                                         if column[row] == default_code or column[row] == MISSING_CODE))
+            elif default_code is not None:
+                grouped_rows[default_code] = self.__merge_missing(known[0], [code != default_code
+                                                                             for code in known[1]])
+
+        grouped: dict[str, Dataset] = {vocabulary[code]: Dataset.__view(self.__store, columns, rows)
+                                       for code, rows in grouped_rows.items()}
+        return grouped
+
+    def group_by_threshold(self, feature_name: str, threshold: float, default: Optional[str] = None) -> dict:
+        """Splits the dataset in two by comparing the values of a numeric feature with the given threshold.
+
+        Unlike grouping by a categorical feature, the feature is retained in the split datasets, so that they can
+        be split by it again. Examples whose value of the feature is missing are added to the default side.
+
+        :param feature_name: name of the numeric feature to split by
+        :param threshold: threshold of the split
+        :param default: key of the side which receives the examples with missing values. If not provided, the
+            larger side is used (the lower one, if both are of the same size).
+        :return: dict[str, Dataset] - dataset of the examples with the value lower than or equal to the threshold,
+            indexed by "<=threshold", and the dataset of the other examples, indexed by ">threshold". Datasets
+            without examples are omitted.
+        """
 
-        # a single dictionary pass:
-        for feature_map, label in self.__data:  # for (feature_map, label) in self._data:
-            feature_map: dict[str, str] = dict(feature_map)
-            label: str
-            feature_value = feature_map[feature_name]
-
-            #   create new dictionary of features, retaining all but the feature by which the grouping is done
-            new_feature_map: dict[str, str] = feature_map.copy()
-            del new_feature_map[feature_name]
-            #   if a given feature tuple already has a dataset:
-            if feature_value in grouped:
-                dataset: Dataset = grouped[feature_value]
-                #   add the (new_features, label) into the dataset
-                dataset.__add_example(new_feature_map, label)
+        if feature_name not in self.__feature_names:
+            raise ValueError("Feature " + feature_name + " is not a part of the dataset")
+        column_index: int = self.__columns[self.__feature_names.index(feature_name)]
+        if not self.__store.numeric[column_index]:
+            raise ValueError("Feature " + feature_name + " is not numeric")
+        column = self.__store.columns[column_index]
+
+        known: Optional[tuple[list[int], list[float]]] = self.__known_values(column_index,
+                                                                              self.__positions([column_index]))
+        lower_rows: array = array("I")
+        upper_rows: array = array("I")
+        missing_rows: array = array("I")
+        for row, value in zip(self.__rows, map(column.__getitem__, self.__rows)) if known is None \
+                else zip(map(self.__rows.__getitem__, known[0]), known[1]):
+            (lower_rows if value <= threshold else upper_rows if value > threshold else missing_rows).append(row)
+        if missing_rows or known is not None and len(known[0]) < len(self.__rows):
+            lower: bool = self.__weight(lower_rows) >= self.__weight(upper_rows) if default is None \
+                else default.startswith("<=")
+            # rows are kept in the order of the dataset
+            if known is not None:
+                rows: array = self.__merge_missing(known[0], [(value > threshold) == lower for value in known[1]])
+                lower_rows, upper_rows = (rows, upper_rows) if lower else (lower_rows, rows)
+            elif lower:
+                lower_rows = array("I", (row for row in self.__rows if not column[row] > threshold))
             else:
-                dataset: Dataset = Dataset([*new_feature_map.keys(), self.__class_label])
-                dataset.__add_example(new_feature_map, label)
-                grouped[feature_value] = dataset
+                upper_rows = array("I", (row for row in self.__rows if not column[row] <= threshold))
 
+        grouped: dict[str, Dataset] = {}
+        for relation, rows in (("<=", lower_rows), (">", upper_rows)):
+            if rows:
+                grouped[relation + format_number(threshold)] = Dataset.__view(self.__store, self.__columns, rows)
         return grouped
 
+    def __positions(self, columns: Iterable[int]) -> Optional[dict[int, int]]:
+        """Returns the position of every row within the dataset, which is needed to read the known values of the
+        sparse columns.
+
+        :param columns: store columns whose values are to be read
+        :return: positions indexed by the rows, or None if none of the columns is sparse, or if some row occurs
+            in the dataset more than once, e.g. in a bootstrap sample
+        """
+
+        if not any(isinstance(self.__store.columns[column], SparseColumn) for column in columns):
+            return None
+        positions: dict[int, int] = dict(zip(self.__rows, range(len(self.__rows))))
+        return positions if len(positions) == len(self.__rows) else None
+
+    def __known_values(self, column: int, positions: Optional[dict[int, int]]) -> Optional[tuple[list[int], list]]:
+        """Reads the known values of a sparse column within the dataset, without going through the rows whose
+        values are missing.
+
+        :param column: index of the store column
+        :param positions: position of every row within the dataset, as returned by the __positions method
+        :return: positions of the examples whose value is known, in increasing order, and their values. None if the
+            column is dense, or if looking the values up row by row is cheaper.
+        """
+
+        store_column = self.__store.columns[column]
+        if positions is None or not isinstance(store_column, SparseColumn) \
+                or len(store_column.rows) >= len(self.__rows):
+            return None
+        known: list[tuple[int, object]] = sorted((positions[row], value)
+                                                 for row, value in zip(store_column.rows, store_column.values)
+                                                 if row in positions)
+        return [position for position, _ in known], [value for _, value in known]
+
+    def __merge_missing(self, known_positions: list[int], excluded: list[bool]) -> array:
+        """Returns the rows of the dataset whose value is missing, merged with the rows of a group, in the order
+        of the dataset.
+
+        :param known_positions: positions of the examples whose value is known
+        :param excluded: whether each of the examples with a known value is left out of the group
+        :return: rows of the group and of the examples with missing values
+        """
+
+        selected: bytearray = bytearray(b"\x01") * len(self.__rows)
+        for position, exclude in zip(known_positions, excluded):
+            if exclude:
+                selected[position] = 0
+        return array("I", itertools.compress(self.__rows, selected))
+
     def filter_by_feature(self, feature_name: str, feature_value: str):
         """Returns a new dataset containing only the examples for which the feature with the given name
         has the given value.
@@ -123,7 +467,7 @@ class Dataset:
 
     def __str__(self) -> str:
         return "Features: " + str(self.__feature_names) + "\n" + \
-               "Class label: " + self.__class_label + "\n" + "Data: " + str(self.__data)
+               "Class label: " + self.__class_label + "\n" + "Data: " + str(list(self))
 
     def __repr__(self):
         return self.__str__()
@@ -135,7 +479,7 @@ class Dataset:
         :return: Entropy of the dataset
         """
 
-        return utils.entropy(self.label_sample)
+        return entropy_from_counts(self.__counts().values())
 
     def information_gain(self, feature_name: str) -> float:
         """Returns the expected information gain from grouping the dataset by values of the feature with the given name.
@@ -148,11 +492,165 @@ class Dataset:
         :return: information gain from grouping the dataset by the given feature
         """
 
-        groups: dict[str, Dataset] = self.group_by_feature(feature_name)
-        ig: float = self.entropy
-        for dataset in groups.values():
-            ig -= dataset.entropy * len(dataset.__data) / len(self.__data)
-        return ig
+        if feature_name not in self.__feature_names:
+            raise ValueError("Feature " + feature_name + " is not a part of the dataset")
+        return self.information_gains()[feature_name]
+
+    def information_gains(self) -> dict[str, float]:
+        """Returns the information gain of every feature of the dataset.
+
+        Rather than grouping the dataset by each of the features, a contingency table of feature values and class
+        labels is counted for every categorical feature, and all the information gains are computed from the counts.
+        Information gain of a numeric feature is the one of its best threshold split, and numeric features that
+        cannot split the dataset are omitted, as well as the features whose values are all missing.
+
+        :return: information gain from splitting the dataset by each of the features, indexed by feature names
+        """
+
+        label_counts: dict[str, int] = self.label_counts
+        information_gains: dict[str, float] = {
+            feature_name: information_gain_from_counts(label_counts.values(), table)
+            for feature_name, table in self.contingency_tables().items() if table}
+        for feature_name, (_, information_gain) in self.thresholds().items():
+            information_gains[feature_name] = information_gain
+        return {feature_name: information_gains[feature_name] for feature_name in self.__feature_names
+                if feature_name in information_gains}
+
+    def thresholds(self) -> dict[str, tuple[float, float]]:
+        """Returns the best threshold split of every numeric feature of the dataset.
+
+        Examples are sorted once by the values of each feature, and the label counts of the examples below
+        every candidate threshold are obtained by a single scan over the sorted examples. Candidate thresholds
+        lie in the middle between consecutive distinct values, and the lowest one among the thresholds with the
+        highest information gain is chosen. Results are cached until new examples are added.
+
+        :return: threshold and its information gain, indexed by the names of the numeric features which have
+            at least two distinct known values
+        """
+
+        if self.__thresholds is not None and self.__thresholds[0] == len(self.__rows):
+            return self.__thresholds[1]
+
+        labels: list[int] = list(map(self.__store.labels.__getitem__, self.__rows))
+        weights: Optional[list[int]] = self.weights
+        label_counts: dict[int, int] = Counter(labels) if weights is None else _weighted_counts(labels, weights)
+        thresholds: dict[str, tuple[float, float]] = {}
+        positions: Optional[dict[int, int]] = self.__positions(
+            [column for column in self.__columns if self.__store.numeric[column]])
+        for feature_name, column in zip(self.__feature_names, self.__columns):
+            if not self.__store.numeric[column]:
+                continue
+            sparse_values: Optional[tuple[list[int], list[float]]] = self.__known_values(column, positions)
+            known_positions: Optional[list[int]] = None  # positions of the known values, if some are missing
+            if sparse_values is None:
+                values: list[float] = list(map(self.__store.columns[column].__getitem__, self.__rows))
+                if any(value != value for value in values):
+                    known_positions = [position for position, value in enumerate(values) if value == value]
+            else:  # only the known values of a sparse column are read
+                values: list[float] = [math.nan] * len(self.__rows)
+                for position, value in zip(*sparse_values):
+                    values[position] = value
+                if len(sparse_values[0]) < len(self.__rows):
+                    known_positions = sparse_values[0]
+            known: dict[int, int] = label_counts  # label counts of the examples whose value is known
+            if known_positions is not None:  # missing values are left out of the split
+                order: list[int] = sorted(known_positions, key=values.__getitem__)
+                known = Counter(labels[position] for position in order) if weights is None \
+                    else _weighted_counts([labels[position] for position in order],
+                                          [weights[position] for position in order])
+            else:
+                order: list[int] = sorted(range(len(values)), key=values.__getitem__)
+            lower_counts: dict[int, int] = {}
+            upper_counts: dict[int, int] = dict(known)
+            best: Optional[tuple[float, float]] = None
+            for position, following in zip(order, order[1:]):
+                label: int = labels[position]
+                weight: int = 1 if weights is None else weights[position]
+                lower_counts[label] = lower_counts.get(label, 0) + weight
+                upper_counts[label] -= weight
+                value, next_value = values[position], values[following]
+                if value == next_value:
+                    continue  # not a boundary between distinct values
+                ig: float = information_gain_from_counts(label_counts.values(), {0: lower_counts, 1: upper_counts},
+                                                         known.values())
+                if best is None or ig > best[1]:
+                    threshold: float = (value + next_value) / 2
+                    best = (threshold if threshold < next_value else value, ig)
+            if best is not None:
+                thresholds[feature_name] = best
+
+        self.__thresholds = (len(self.__rows), thresholds)
+        return thresholds
+
+    @property
+    def label_counts(self) -> dict[str, int]:
+        """Returns the number of occurrences of each class label within the dataset.
+
+        Labels are ordered by their first occurrence within the dataset.
+
+        :return: number of occurrences, indexed by labels
+        """
+
+        return dict(self.__counts())
+
+    def __counts(self) -> dict[str, int]:
+        """Returns the cached label counts, after counting the labels of the examples added since the
+        last call.
+
+        :return: number of occurrences, indexed by labels
+        """
+
+        if self.__counted_rows != len(self.__rows):
+            label_vocabulary: list[str] = self.__store.label_vocabulary
+            new_rows: list[int] = list(itertools.islice(self.__rows, self.__counted_rows, None))
+            new_labels = map(self.__store.labels.__getitem__, new_rows)
+            weights: Optional[array] = self.__store.weights
+            counts: dict[int, int] = Counter(new_labels) if weights is None \
+                else _weighted_counts(new_labels, map(weights.__getitem__, new_rows))
+            for label, count in counts.items():
+                label: str = label_vocabulary[label]
+                self.__label_counts[label] = self.__label_counts.get(label, 0) + count
+            self.__counted_rows = len(self.__rows)
+        return self.__label_counts
+
+    def contingency_tables(self) -> dict[str, dict[int, dict[int, int]]]:
+        """Counts the occurrences of class labels for every value of every feature of the dataset.
+
+        Values and labels are represented by their codes within the dataset storage. They are ordered by their
+        first occurrence within the dataset, which keeps the information gain computed from a table equal to the
+        one computed over the datasets grouped by the feature.
+
+        Known values of the sparse columns are counted directly, without going through the examples whose values
+        are missing, whenever there are fewer of them than the examples of the dataset.
+
+        :return: tables indexed by the value codes and label codes, one for each categorical feature of the dataset.
+            Examples whose value of the feature is missing are left out of its table.
+        """
+
+        labels: list[int] = list(map(self.__store.labels.__getitem__, self.__rows))
+        weights: Optional[list[int]] = self.weights
+        tables: dict[str, dict[int, dict[int, int]]] = {}
+        positions: Optional[dict[int, int]] = self.__positions(
+            [column for column in self.__columns if not self.__store.numeric[column]])
+        for feature_name, column in zip(self.__feature_names, self.__columns):
+            if self.__store.numeric[column]:
+                continue
+            sparse_values: Optional[tuple[list[int], list[int]]] = self.__known_values(column, positions)
+            table: dict[int, dict[int, int]] = {}
+            if sparse_values is None:
+                values = map(self.__store.columns[column].__getitem__, self.__rows)
+                counts: dict[tuple[int, int], int] = Counter(zip(values, labels)) if weights is None \
+                    else _weighted_counts(zip(values, labels), weights)
+            else:  # only the known values of a sparse column are counted
+                known_positions, values = sparse_values
+                known_labels = map(labels.__getitem__, known_positions)
+                counts: dict[tuple[int, int], int] = Counter(zip(values, known_labels)) if weights is None \
+                    else _weighted_counts(zip(values, known_labels), map(weights.__getitem__, known_positions))
+            for (value, label), count in counts.items():
+                table.setdefault(value, {})[label] = count
+            table.pop(MISSING_CODE, None)
+            tables[feature_name] = table
+        return tables
 
     @property
     def most_discriminatory_feature(self) -> str:
@@ -163,14 +661,48 @@ class Dataset:
 
         :return: feature name of the most discriminatory feature
         """
-        ig_argmax: str = max(self.__feature_names, key=lambda feature: self.information_gain(feature))
-        max_ig: float = self.information_gain(ig_argmax)
-        max_ig_features: list[str] = list(filter(lambda f: self.information_gain(f) == max_ig, self.__feature_names))
-        max_ig_features.sort()  # alphabetical sorting
-        return max_ig_features[0]
+
+        return best_feature(self.information_gains())
+
+    def __weight(self, rows: array) -> int:
+        """Returns the number of examples in the given rows, counting every example with its weight.
+
+        :param rows: row indices of the examples
+        :return: sum of the weights of the examples
+        """
+
+        weights: Optional[array] = self.__store.weights
+        return len(rows) if weights is None else sum(map(weights.__getitem__, rows))
 
     def __iter__(self) -> tuple[dict[str, str], str]:
-        yield from self.__data
+        columns: list[array] = [self.__store.columns[column] for column in self.__columns]
+        # numeric values are formatted, and categorical values are looked up in the vocabularies
+        decoders: list = [_format_numeric_value if self.__store.numeric[column]
+                          else {**dict(enumerate(self.__store.vocabularies[column])), MISSING_CODE: MISSING}.__getitem__
+                          for column in self.__columns]
+        labels: array = self.__store.labels
+        label_vocabulary: list[str] = self.__store.label_vocabulary
+        for row in self.__rows:
+            yield ({name: decode(column[row]) for name, column, decode in zip(self.__feature_names, columns, decoders)},
+                   label_vocabulary[labels[row]])
 
     def __len__(self) -> int:
-        return len(self.__data)
+        return len(self.__rows)
+
+
+def _weighted_counts(keys: Iterable, weights: Iterable[int]) -> dict:
+    """Sums the weights of every distinct key, like Counter does with unit weights.
+
+    :param keys: keys of the examples
+    :param weights: weights of the examples
+    :return: sum of the weights, indexed by the keys in the order of their first occurrence
+    """
+
+    counts: dict = {}
+    for key, weight in zip(keys, weights):
+        counts[key] = counts.get(key, 0) + weight
+    return counts
+
+
+def _format_numeric_value(value: float) -> str:
+    return MISSING if value != value else format_number(value)
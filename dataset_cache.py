@@ -0,0 +1,253 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Optional, Union
+
+import utils
+from dataset import Dataset
+
+_ENTRY_FILE: str = "cache.json"
+_HASH_CHUNK_SIZE: int = 1 << 20
+
+
+class DatasetCache:
+    """Cache of parsed csv datasets, which spares the repeated parsing of the same files.
+
+    Every cached dataset is stored in its own directory of column files, written by utils.convert_dataset, and is
+    loaded back by memory-mapping the columns, so a cache hit reads no more than the vocabularies up front.
+    Entries are keyed by the absolute path of the csv file and the options it is parsed with, including the size of
+    the chunks, since numeric features are detected within the first one. Every entry records the size, modification
+    time and content hash of the file it was parsed from: an entry whose file has the same size and modification
+    time is used right away, and an entry whose file was only touched, i.e. has a different modification time but
+    the same content hash, is used as well. Entries of changed files are parsed again. A file which changes while it
+    is being parsed is not cached, and is parsed again without the cache instead.
+
+    Total size of the entries is capped, and the least recently used entries are evicted when a new entry
+    exceeds the cap. The most recently stored entry is always kept, even if it exceeds the cap on its own.
+
+    Datasets loaded from the cache are memory-mapped, so no examples can be added to them, e.g. by partial fits.
+
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1 << 30) -> None:
+        """Creates the cache in the given directory, or opens the existing one.
+
+        :param directory: directory of the cache entries
+        :param max_bytes: maximum total size of the cache entries
+        """
+
+        if max_bytes < 0:
+            raise ValueError(f"Size of the cache must not be negative, got {max_bytes}")
+        self.__directory: str = directory
+        self.__max_bytes: int = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def load(self, dataset_path: str, chunk_size: int = 100000, delimiter: str = ",", header: bool = True,
+             label_column: Union[int, str, None] = None, columns: Optional[list[str]] = None,
+             numeric_features: Optional[list[str]] = None, detect_numeric: bool = False) -> Dataset:
+        """Loads the csv dataset at the given path, from the cache if it holds an up-to-date entry of the dataset,
+        or by parsing the file and storing it in the cache otherwise.
+
+        Parameters are the same as the ones of utils.load_dataset.
+
+        :return: dataset of all the examples in the file
+        """
+
+        options: dict = {"delimiter": delimiter, "header": header, "label_column": label_column, "columns": columns,
+                         "numeric_features": numeric_features, "detect_numeric": detect_numeric}
+        # numeric features are detected within the first chunk, so the chunk size is a part of the key as well
+        key_options: dict = {**options, "chunk_size": chunk_size}
+        path: str = os.path.abspath(dataset_path)
+        entry: str = os.path.join(self.__directory, _entry_key(path, key_options))
+        if self.__is_valid(entry, path):
+            os.utime(os.path.join(entry, _ENTRY_FILE))  # marks the entry as recently used
+            return Dataset.from_column_files(entry)
+
+        # the file is described before it is parsed, and checked to be unchanged afterwards, so that the size,
+        # modification time and content hash of the entry describe the content it was parsed from
+        stat: os.stat_result = os.stat(path)
+        content_hash: str = _content_hash(path)
+        # the entry is written into a temporary directory and renamed, so that it is never seen half-written
+        temporary: str = tempfile.mkdtemp(dir=self.__directory, prefix=".")
+        try:
+            utils.convert_dataset(path, temporary, chunk_size, **options)
+            parsed: os.stat_result = os.stat(path)
+            if (parsed.st_size, parsed.st_mtime_ns) != (stat.st_size, stat.st_mtime_ns):  # changed while parsed
+                shutil.rmtree(temporary, ignore_errors=True)
+                return utils.load_dataset(path, chunk_size, **options)
+            description: dict = {"path": path, "options": key_options, "size": stat.st_size,
+                                 "mtime_ns": stat.st_mtime_ns, "content_hash": content_hash,
+                                 "bytes": _directory_size(temporary)}
+            _write_description(temporary, description)
+            if os.path.isdir(entry):  # outdated entry, or one stored by another process in the meantime
+                shutil.rmtree(entry, ignore_errors=True)
+            try:
+                os.rename(temporary, entry)
+            except OSError:  # stored by another process in the meantime
+                shutil.rmtree(temporary, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+        self.__evict(keep=entry)
+        return Dataset.from_column_files(entry)
+
+    def invalidate(self, dataset_path: Optional[str] = None) -> int:
+        """Removes the entries of the csv dataset at the given path, parsed with any options, or all the entries.
+
+        :param dataset_path: path of the csv dataset. If not provided, the whole cache is cleared.
+        :return: number of removed entries
+        """
+
+        path: Optional[str] = None if dataset_path is None else os.path.abspath(dataset_path)
+        removed: int = 0
+        for entry, description in self.entries().items():
+            if path is None or description.get("path") == path:
+                shutil.rmtree(os.path.join(self.__directory, entry), ignore_errors=True)
+                removed += 1
+        return removed
+
+    def entries(self) -> dict[str, dict]:
+        """Describes the entries of the cache.
+
+        :return: description of every entry, with the "path", parsing "options", "size", "mtime_ns" and
+            "content_hash" of its csv file, its own size in "bytes" and the time of its last use in "last_used",
+            indexed by the entry names and ordered from the least to the most recently used
+        """
+
+        entries: dict[str, dict] = {}
+        for entry in os.listdir(self.__directory):
+            if entry.startswith("."):  # entry being written
+                continue
+            entry_path: str = os.path.join(self.__directory, entry, _ENTRY_FILE)
+            try:
+                with open(entry_path, "r") as entry_file:
+                    description: dict = json.load(entry_file)
+                description["last_used"] = os.stat(entry_path).st_mtime
+            except (OSError, ValueError):  # not an entry, or an entry being written or removed
+                continue
+            entries[entry] = description
+        return dict(sorted(entries.items(), key=lambda item: item[1]["last_used"]))
+
+    def __is_valid(self, entry: str, path: str) -> bool:
+        """Checks whether the cache entry is up to date with the csv file it was parsed from.
+
+        :param entry: directory of the cache entry
+        :param path: absolute path of the csv file
+        :return: whether the entry can be used
+        """
+
+        try:
+            with open(os.path.join(entry, _ENTRY_FILE), "r") as entry_file:
+                description: dict = json.load(entry_file)
+            stat: os.stat_result = os.stat(path)
+        except (OSError, ValueError):
+            return False
+        if stat.st_size != description["size"]:
+            return False
+        if stat.st_mtime_ns == description["mtime_ns"]:
+            return True
+        if _content_hash(path) != description["content_hash"]:
+            return False
+        description["mtime_ns"] = stat.st_mtime_ns  # the file was only touched, so its content is not hashed again
+        _write_description(entry, description)
+        return True
+
+    def __evict(self, keep: str) -> None:
+        """Removes the least recently used entries until the total size of the entries fits into the cap.
+
+        :param keep: directory of the entry which is never removed
+        """
+
+        entries: dict[str, dict] = self.entries()
+        total: int = sum(description["bytes"] for description in entries.values())
+        for entry, description in entries.items():
+            if total <= self.__max_bytes:
+                return
+            if os.path.join(self.__directory, entry) != keep:
+                shutil.rmtree(os.path.join(self.__directory, entry), ignore_errors=True)
+                total -= description["bytes"]
+
+
+def _entry_key(path: str, options: dict) -> str:
+    """Derives the name of the cache entry of a csv file parsed with the given options.
+
+    :param path: absolute path of the csv file
+    :param options: parsing options
+    :return: name of the entry directory
+    """
+
+    return hashlib.sha256(json.dumps({"path": path, "options": options}, sort_keys=True).encode()).hexdigest()[:32]
+
+
+def _write_description(entry: str, description: dict) -> None:
+    """Writes the description of the cache entry into a temporary file, which then replaces the description file,
+    so that other processes never read a half-written description.
+
+    :param entry: directory of the cache entry
+    :param description: description of the entry
+    """
+
+    descriptor, temporary = tempfile.mkstemp(dir=entry, prefix=".")
+    try:
+        with os.fdopen(descriptor, "w") as entry_file:
+            json.dump(description, entry_file)
+        os.replace(temporary, os.path.join(entry, _ENTRY_FILE))
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def _content_hash(path: str) -> str:
+    """Hashes the content of the file at the given path, reading it in chunks.
+
+    :param path: path of the file
+    :return: hexadecimal digest of the content
+    """
+
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as file:
+        while chunk := file.read(_HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _directory_size(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def main() -> None:
+    """Manages the cache of parsed datasets: lists its entries, loads datasets into it, or invalidates them.
+
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Cache of parsed csv datasets.")
+    parser.add_argument("--cache-dir", required=True, help="directory of the cache")
+    parser.add_argument("--max-bytes", type=int, default=1 << 30, help="maximum total size of the cache entries")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="list the cached datasets, from the least to the most recently used")
+    load_parser: argparse.ArgumentParser = commands.add_parser("load", help="parse datasets into the cache")
+    load_parser.add_argument("datasets", nargs="+", help="paths of the csv datasets")
+    invalidate_parser: argparse.ArgumentParser = commands.add_parser(
+        "invalidate", help="remove the cached entries of the given datasets, or all the entries")
+    invalidate_parser.add_argument("datasets", nargs="*", help="paths of the csv datasets")
+    args: argparse.Namespace = parser.parse_args()
+
+    cache: DatasetCache = DatasetCache(args.cache_dir, args.max_bytes)
+    if args.command == "list":
+        for entry, description in cache.entries().items():
+            print(f"{entry} {description['bytes']} {description['path']}")
+    elif args.command == "load":
+        for dataset_path in args.datasets:
+            print(f"{dataset_path}: {len(cache.load(dataset_path))} examples")
+    elif args.datasets:
+        for dataset_path in args.datasets:
+            print(f"{dataset_path}: {cache.invalidate(dataset_path)} entries removed")
+    else:
+        print(f"{cache.invalidate()} entries removed")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,24 @@
-from typing import Union, Optional
+import itertools
+import math
+import random
+import sys
+import time
+from array import array
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from multiprocessing.connection import Connection
+from typing import Callable, Iterable, Iterator, Union, Optional
 
+import distributed
+from column_store import MISSING, format_number
+from compiled_tree import CompiledTree
 from confusion_matrix import ConfusionMatrix
 from dataset import Dataset
+from information_gain import best_feature, information_gain_from_counts, most_frequent
+from metrics import Metrics
 from node import Node, Leaf
-from utils import accuracy, format_branches
+from training_observer import NodeRecord, TrainingObserver
+from utils import accuracy, iter_branches
 
 
 class DecisionTree:
@@ -13,34 +28,229 @@ class DecisionTree:
 
     """
 
-    def __init__(self, max_depth: Optional[int] = None):
+    def __init__(self, max_depth: Optional[int] = None, n_jobs: Optional[int] = None,
+                 parallel_threshold: int = 10000, observer: Optional[TrainingObserver] = None,
+                 expansion: str = "depth_first", max_features: Optional[int] = None, seed: Optional[int] = None,
+                 approximate_threshold: Optional[int] = None, sample_size: int = 10000, delta: float = 1e-7,
+                 workers: Optional[list] = None, authkey: Optional[bytes] = None, incremental: bool = False):
         """Initializes the decision tree with the given maximum depth.
 
         :param max_depth: Maximum depth of the decision tree that can be reached during the training procedure.
         All ambiguities that aren't clearly branched at the point of maximum depth will be resolved with a leaf
         node that stores the most frequent value of the classification label for the subset of the dataset
         that corresponds to the last node before the maximum depth limit.
+        :param n_jobs: Number of worker processes used to construct the subtrees during the training procedure.
+        If not provided, or lower than 2, the tree is constructed within the current process.
+        :param parallel_threshold: Minimum number of examples in the dataset of a subtree for the subtree to be
+        constructed by a worker process. Smaller subtrees are constructed within the current process.
+        :param observer: Observer notified about every node constructed during the training procedure and the
+        time spent in each of its phases. Nodes constructed by the worker processes are not observed.
+        :param expansion: Order in which the nodes are constructed, "depth_first" or "breadth_first". The tree is
+        the same in both cases, but breadth-first expansion holds the datasets of at most two levels of the tree
+        at once, while depth-first expansion holds the datasets along a single path and their siblings.
+        :param max_features: Number of features drawn at random at every node, among which the feature the node
+        splits by is chosen. If not provided, all the features are considered, and the tree is deterministic.
+        :param seed: Seed of the random number generators which draw the features and the samples. Every node has
+        a generator of its own, seeded from the seed and the path to the node, so the tree does not depend on
+        which process constructs the node. If not provided, a seed is drawn at every fit.
+        :param approximate_threshold: Minimum number of examples in the dataset of a node for the features to be
+        scored on a random sample of the examples first, as described by the __information_gains method. If not
+        provided, the features are always scored on all the examples, and the split is exact.
+        :param sample_size: Number of examples the features are scored on in the approximate mode.
+        :param delta: Tolerated probability that a feature chosen on a sample is not the best one. Lower values
+        fall back to the full scan more often.
+        :param workers: Addresses of the training workers of distributed.py, in the order of their shards. If
+        provided, the tree is fitted on the shards held by the workers, rather than on a dataset given to the fit
+        method. The tree is the same as the one fitted on the concatenated shards within a single process.
+        :param authkey: Authentication key shared with the training workers.
+        :param incremental: Whether the tree can be updated by partial fits. If so, the fit copies the training
+        dataset, so that the partial fits extend the copy rather than the caller's dataset, and every node keeps
+        the view of its examples. Trees fitted on memory-mapped column files or by the training workers cannot be
+        updated either way.
         """
 
+        if expansion not in ("depth_first", "breadth_first"):
+            raise ValueError("Expansion must be either depth_first or breadth_first, got " + expansion)
+
         self.__max_depth: int = max_depth
+        self.__n_jobs: Optional[int] = n_jobs
+        self.__parallel_threshold: int = parallel_threshold
+        self.__executor: Optional[Executor] = None
+        self.__observer: Optional[TrainingObserver] = observer
+        self.__breadth_first: bool = expansion == "breadth_first"
+        if max_features is not None and max_features < 1:
+            raise ValueError("Number of features drawn at every node must be positive.")
+        self.__max_features: Optional[int] = max_features
+        self.__seed: Optional[int] = seed
+        if sample_size < 2:
+            raise ValueError("Features must be scored on a sample of at least 2 examples.")
+        if not 0 < delta < 1:
+            raise ValueError(f"Tolerated probability must lie between 0 and 1, got {delta}")
+        self.__approximate_threshold: Optional[int] = approximate_threshold
+        self.__sample_size: int = sample_size
+        self.__delta: float = delta
+        if workers is not None and (max_features is not None or approximate_threshold is not None):
+            raise ValueError("Distributed training supports neither features drawn at random nor approximate splits.")
+        self.__workers: Optional[list] = workers
+        self.__authkey: Optional[bytes] = authkey
+        if incremental and (max_features is not None or approximate_threshold is not None):
+            raise ValueError("Decision tree with features drawn at random or approximate splits cannot be updated.")
+        self.__incremental: bool = incremental
+        # number of nodes whose features were scored on a sample, and of those that fell back to the full scan
+        self.__approximations: dict[str, int] = {"sampled_nodes": 0, "fallbacks": 0}
         self.__root: Optional[Node] = None
-        self.__branches: Optional[str] = None
+        self.__compiled: Optional[CompiledTree] = None
+        self.__branches: Optional[str] = None  # formatted branches of the fitted tree, kept for repeated predictions
+        # copy of the training dataset, extended by the partial fits, and the dataset of every node, kept only if the
+        # tree is incremental
+        self.__data: Optional[Dataset] = None
+        self.__datasets: dict[Union[Node, Leaf], Dataset] = {}
+        # label counts and contingency tables of the inner nodes, computed on the first partial fit
+        self.__statistics: dict[Node, tuple[dict[str, int], dict[str, dict[int, dict[int, int]]]]] = {}
+
+    @property
+    def root(self) -> Union[Node, Leaf, None]:
+        """Returns the root of the fitted decision tree.
+
+        :return: root of the tree, or None if the tree was not fitted
+        """
+
+        return self.__root
+
+    @property
+    def approximation_statistics(self) -> dict[str, int]:
+        """Returns how often the approximate split selection was used during the last fit.
+
+        :return: number of nodes whose features were scored on a sample ("sampled_nodes"), and the number of
+            those which fell back to scoring the features on all the examples, as the best features of the sample
+            were statistically tied ("fallbacks")
+        """
+
+        return dict(self.__approximations)
 
-    def fit(self, data: Dataset):
+    def memory_footprint(self) -> dict[str, int]:
+        """Estimates the memory held by the decision tree.
+
+        Strings shared by several nodes are counted only once. Examples of the training dataset are not counted,
+        even if the tree is incremental and holds its own copy of them, but the per-node views of them are.
+
+        :return: numbers of inner "nodes" and "leaves", and sizes in bytes of the node objects and their children
+            ("tree_bytes"), of the distinct strings they reference ("string_bytes"), of the compiled tree
+            ("compiled_bytes"), of the per-node datasets and statistics retained for the partial fits
+            ("training_state_bytes"), and their sum ("total_bytes")
+        """
+
+        footprint: dict[str, int] = {"nodes": 0, "leaves": 0, "tree_bytes": 0, "string_bytes": 0,
+                                     "compiled_bytes": 0, "training_state_bytes": 0}
+        strings: dict[int, str] = {}  # distinct strings, indexed by their identities
+        stack: list[Union[Node, Leaf]] = [self.__root] if self.__root is not None else []
+        while stack:
+            tree: Union[Node, Leaf] = stack.pop()
+            footprint["tree_bytes"] += sys.getsizeof(tree)
+            if isinstance(tree, Leaf):
+                footprint["leaves"] += 1
+                strings[id(tree.label)] = tree.label
+                continue
+            footprint["nodes"] += 1
+            children: list[tuple[str, Union[Node, Leaf]]] = list(tree.children())
+            footprint["tree_bytes"] += 2 * sys.getsizeof(tuple(children))  # branch values and children
+            if tree.threshold is not None:
+                footprint["tree_bytes"] += sys.getsizeof(tree.threshold)
+            for string in itertools.chain((tree.feature, tree.most_frequent_label), (value for value, _ in children)):
+                strings[id(string)] = string
+            stack.extend(child_node for _, child_node in children)
+        footprint["string_bytes"] = sum(sys.getsizeof(string) for string in strings.values())
+        if self.__compiled is not None:
+            footprint["compiled_bytes"] = self.__compiled.memory_footprint()
+
+        rows: dict[int, array] = {id(dataset.rows): dataset.rows for dataset in self.__datasets.values()}
+        footprint["training_state_bytes"] = sum(sys.getsizeof(dataset_rows) for dataset_rows in rows.values())
+        for label_counts, tables in self.__statistics.values():
+            footprint["training_state_bytes"] += sys.getsizeof(label_counts) + sys.getsizeof(tables) + sum(
+                sys.getsizeof(table) + sum(sys.getsizeof(counts) for counts in table.values())
+                for table in tables.values())
+        footprint["total_bytes"] = sum(footprint[name] for name in ("tree_bytes", "string_bytes", "compiled_bytes",
+                                                                    "training_state_bytes"))
+        return footprint
+
+    def fit(self, data: Union[Dataset, str, None] = None):
         """Learns the classification procedure on the provided dataset.
 
         Constructs the decision tree using the ID3 algorithm and stores the tree for future predictions.
 
-        :param data: dataset that the decision tree will be fitted to
+        :param data: dataset that the decision tree will be fitted to, or a directory of column files written by
+            utils.convert_dataset. Column files are memory-mapped, so the tree can be fitted on a dataset which
+            does not fit into memory, but it cannot be updated by partial fits. The dataset itself is never
+            changed. Not needed if the tree is fitted by the training workers.
         :return: an instance of self
         """
 
-        self.__root: Union[Node, Leaf] = self.__id3(data, data, 0)
-        self.__branches: str = format_branches(self.__root)
+        if self.__workers is not None:
+            return self.__fit_distributed()
+        if data is None:
+            raise ValueError("Dataset must be provided, unless the tree is fitted by the training workers.")
+        if isinstance(data, str):
+            data = Dataset.from_column_files(data)
+
+        if self.__incremental and not data.memory_mapped:
+            data = data.copy()  # partial fits add the new examples to the copy
+            self.__data = data
+        else:
+            self.__data = None
+        self.__datasets = {}
+        self.__statistics = {}
+        self.__approximations = {"sampled_nodes": 0, "fallbacks": 0}
+        seed: Optional[int] = None  # seed of the root, if the features or the samples are drawn at random
+        if self.__max_features is not None or self.__approximate_threshold is not None:
+            seed = random.randrange(2 ** 64) if self.__seed is None else self.__seed
+        if self.__observer is not None:
+            self.__observer.on_fit_start()
+        if self.__n_jobs is not None and self.__n_jobs > 1:
+            with ProcessPoolExecutor(self.__n_jobs, initializer=_init_worker, initargs=(data,)) as executor:
+                self.__executor = executor
+                try:
+                    self.__root: Union[Node, Leaf] = self.__id3(data, data, 0, seed)
+                finally:
+                    self.__executor = None
+        else:
+            self.__root: Union[Node, Leaf] = self.__id3(data, data, 0, seed)
+        if self.__observer is not None:
+            self.__observer.on_fit_end()
+        self.__compiled = None
+        self.__branches = None
 
         return self
 
-    def __id3(self, dataset: Dataset, parent_dataset: Dataset, depth: int) -> Union[Node, Leaf]:
+    def __fit_distributed(self):
+        """Fits the decision tree on the shards held by the training workers, as described by
+        distributed.fit_distributed. The tree cannot be updated by partial fits, as its examples stay with the
+        workers.
+
+        :return: an instance of self
+        """
+
+        connections: list[Connection] = distributed.connect_workers(self.__workers, self.__authkey)
+        try:
+            connections[0].send(("features",))
+            status, feature_names = connections[0].recv()
+            if status == "error":
+                raise ValueError("Training worker failed: " + feature_names)
+            self.__data = None
+            self.__datasets = {}
+            self.__statistics = {}
+            self.__approximations = {"sampled_nodes": 0, "fallbacks": 0}
+            self.__root: Union[Node, Leaf] = distributed.fit_distributed(connections, feature_names, self.__max_depth)
+        finally:
+            for connection in connections:
+                with connection:
+                    connection.send(("close",))
+        self.__compiled = None
+        self.__branches = None
+
+        return self
+
+    def __id3(self, dataset: Dataset, parent_dataset: Dataset, depth: int,
+              seed: Optional[int] = None) -> Union[Node, Leaf]:
         """Performs the ID3 machine learning algorithm and returns the constructed decision tree.
 
         ID3 algorithm constructs the decision tree in which each node corresponds to some feature, and
@@ -55,76 +265,621 @@ class DecisionTree:
         :param parent_dataset: dataset of the parent node in the decision tree. If the current execution of the
         method is the first one, parent dataset should be equal to the training dataset (root node has no parent)
         :param depth: depth of the node to be constructed. If called on the whole training dataset, depth should be 0
+        :param seed: seed of the random number generator of the node, from which the seeds of its descendants are
+            derived, or None if nothing is drawn at random
         :return: instance of Node corresponding to the root of the decision tree for the given dataset. Alternatively,
                 returns a Leaf node with predicted class label if the depth limit is reached, or the dataset is
                 empty, or all examples in the dataset are classified with the same value.
         """
 
+        # nodes are constructed from a work queue rather than recursively, so the depth of the tree is not
+        # limited by the recursion limit. Every node reserves the positions of its children when it is constructed,
+        # so the children keep the order of the feature values regardless of the order of the construction.
+        root: Optional[Union[Node, Leaf]] = None
+        # (dataset, parent dataset, depth, seed, parent node, position of the child) of the nodes to be constructed
+        work: deque[tuple[Dataset, Dataset, int, Optional[int], Optional[Node], int]] = deque(
+            [(dataset, parent_dataset, depth, seed, None, 0)])
+        futures: list[tuple[Node, int, Future]] = []  # subtrees constructed by the worker processes
+        nodes: list[Node] = []  # constructed inner nodes
+        while work:
+            dataset, parent_dataset, depth, seed, parent, position = work.popleft() if self.__breadth_first \
+                else work.pop()
+            tree, sub_datasets = self.__build(dataset, parent_dataset, depth, seed)
+            if self.__data is not None:  # kept for partial fits
+                self.__datasets[tree] = dataset
+            if parent is None:
+                root = tree
+            else:
+                parent.set_child(position, tree)
+            if isinstance(tree, Leaf):
+                continue
+
+            nodes.append(tree)
+            children: list[tuple[Dataset, Dataset, int, Optional[int], Optional[Node], int]] = []
+            for feature_value, sub_dataset in sub_datasets.items():
+                feature_value: str
+                sub_dataset: Dataset
+
+                child_position: int = tree.add_child(feature_value, None)  # reserves the position of the child
+                child_seed: Optional[int] = None if seed is None else _child_seed(seed, child_position)
+                # large subtrees are constructed by the worker processes, if there are any
+                if self.__executor is not None and len(sub_dataset) >= self.__parallel_threshold \
+                        and (self.__max_depth is None or depth + 1 < self.__max_depth):
+                    futures.append((tree, child_position, self.__executor.submit(
+                        _fit_subtree, self.__max_depth, depth + 1, sub_dataset.feature_names, sub_dataset.rows,
+                        self.__max_features, child_seed,
+                        (self.__approximate_threshold, self.__sample_size, self.__delta))))
+                else:
+                    children.append((sub_dataset, dataset, depth + 1, child_seed, tree, child_position))
+            # children are pushed in reverse for the depth-first expansion, so that the first one is popped first
+            work.extend(children if self.__breadth_first else reversed(children))
+        for node, position, future in futures:
+            subtree, approximations = future.result()
+            node.set_child(position, subtree)
+            for name, count in approximations.items():
+                self.__approximations[name] += count
+        for node in nodes:
+            node.compact()
+        return root
+
+    def __build(self, dataset: Dataset, parent_dataset: Dataset, depth: int,
+                seed: Optional[int] = None) -> tuple[Union[Node, Leaf], dict[str, Dataset]]:
+        """Constructs the root of the decision tree for the given dataset, as described by the __id3 method.
+
+        :param dataset: dataset for which the subtree of the decision tree is constructed.
+        :param parent_dataset: dataset of the parent node in the decision tree.
+        :param depth: depth of the node to be constructed.
+        :param seed: seed of the random number generator of the node, or None if nothing is drawn at random
+        :return: root of the decision tree for the given dataset, without its children, and the datasets of
+            its children, indexed by the branch values. Leaves have no children.
+        """
+
+        start: float = time.perf_counter() if self.__observer is not None else 0
         if self.__max_depth is None or depth < self.__max_depth:  # depth limit not reached
             if len(dataset) == 0:  # empty dataset
-                return Leaf(parent_dataset.most_frequent_label)  # most frequent label of the parent
+                return self.__leaf(dataset, depth, start, parent_dataset), {}  # most frequent label of the parent
             elif len(dataset.label_space) == 1 or len(dataset.feature_names) == 0:
                 # all examples have the same label or there is no features left in the dataset
-                return Leaf(dataset.most_frequent_label)
+                return self.__leaf(dataset, depth, start), {}
             else:
-                mdf: str = dataset.most_discriminatory_feature
-                sub_datasets: dict[str, Dataset] = dataset.group_by_feature(mdf)
-                node: Node = Node(mdf, dataset.most_frequent_label)
-                # for each child, create the corresponding decision subtree
-                for feature_value, sub_dataset in sub_datasets.items():
-                    feature_value: str
-                    sub_dataset: Dataset
-
-                    child_node: Union[Node, Leaf] = self.__id3(sub_dataset, dataset, depth + 1)  # create the subtree
-                    node.add_child(feature_value, child_node)  # add as a child
-                return node
+                generator: Optional[random.Random] = None if seed is None else random.Random(seed)
+                candidates: Dataset = dataset  # dataset of the features the node can split by
+                if self.__max_features is not None and self.__max_features < len(dataset.feature_names):
+                    drawn: set[str] = set(generator.sample(dataset.feature_names, self.__max_features))
+                    candidates = dataset.subset(dataset.rows, [feature_name for feature_name in dataset.feature_names
+                                                               if feature_name in drawn])
+                information_gains, sampled = self.__timed("information_gain", self.__information_gains, candidates,
+                                                          generator)
+                if not information_gains:  # none of the remaining numeric features can split the dataset
+                    return self.__leaf(dataset, depth, start), {}
+                mdf: str = best_feature(information_gains)
+                if mdf not in candidates.numeric_features:
+                    threshold: Optional[float] = None
+                elif sampled:  # threshold of the chosen feature is searched for among all the examples
+                    threshold: Optional[float] = candidates.subset(candidates.rows, [mdf]).thresholds()[mdf][0]
+                else:
+                    threshold: Optional[float] = candidates.thresholds()[mdf][0]
+                if threshold is None:
+                    sub_datasets: dict[str, Dataset] = self.__timed("group_by_feature", dataset.group_by_feature, mdf)
+                else:
+                    sub_datasets: dict[str, Dataset] = self.__timed("group_by_feature", dataset.group_by_threshold,
+                                                                    mdf, threshold)
+                # examples with missing values were grouped with the largest part of the dataset
+                default: str = max(sub_datasets, key=lambda value: sub_datasets[value].total_weight)
+                node: Node = Node(mdf, self.__timed("most_frequent_label", lambda: dataset.most_frequent_label),
+                                  threshold, default)
+                if self.__observer is not None:
+                    self.__observer.on_node(NodeRecord(depth, len(dataset), len(candidates.feature_names), mdf,
+                                                       information_gains[mdf], time.perf_counter() - start))
+                return node, sub_datasets
         else:  # depth limit reached
-            return Leaf(dataset.most_frequent_label)
+            return self.__leaf(dataset, depth, start), {}
+
+    def __information_gains(self, dataset: Dataset,
+                            generator: Optional[random.Random] = None) -> tuple[dict[str, float], bool]:
+        """Computes the information gains of the features the node can split by.
+
+        If the dataset has at least approximate_threshold examples, the features are scored on a random sample of
+        sample_size examples first. By the Hoeffding bound, the mean of n independent observations of a variable
+        with the range R lies within epsilon = sqrt(R^2 ln(1 / delta) / 2n) of its expected value with the
+        probability of at least 1 - delta. Information gain ranges up to R = log2 of the number of labels, so if
+        the best feature of the sample leads the runner-up by more than epsilon, it is chosen right away.
+        Otherwise, the candidates are statistically tied, and the features are scored on all the examples. A single
+        feature which splits the sample is chosen right away, while a sample that none of the features split is
+        scored again on all the examples, without being counted as a tie.
+
+        :param dataset: dataset of the node, retaining only the candidate features
+        :param generator: random number generator of the node, which draws the sample
+        :return: information gain of each feature, and whether the gains were computed on a sample
+        """
+
+        if self.__approximate_threshold is None or len(dataset) < max(self.__approximate_threshold,
+                                                                      self.__sample_size + 1):
+            return dataset.information_gains(), False
+
+        self.__approximations["sampled_nodes"] += 1
+        positions: list[int] = sorted(generator.sample(range(len(dataset)), self.__sample_size))
+        sample: Dataset = dataset.subset(array("I", map(dataset.rows.__getitem__, positions)))
+        information_gains: dict[str, float] = sample.information_gains()
+        if len(information_gains) == 1:  # the only feature that splits the sample has nothing to be tied with
+            return information_gains, True
+        if len(information_gains) >= 2:
+            best: str = best_feature(information_gains)
+            runner_up: float = max(ig for feature_name, ig in information_gains.items() if feature_name != best)
+            value_range: float = math.log2(max(len(dataset.label_space), 2))
+            epsilon: float = math.sqrt(value_range ** 2 * math.log(1 / self.__delta) / (2 * self.__sample_size))
+            if information_gains[best] - runner_up > epsilon:
+                return information_gains, True
+            self.__approximations["fallbacks"] += 1
+        return dataset.information_gains(), False
+
+    def __leaf(self, dataset: Dataset, depth: int, start: float, label_dataset: Optional[Dataset] = None) -> Leaf:
+        """Constructs a leaf which stores the most frequent label of the given dataset.
+
+        :param dataset: dataset of the leaf
+        :param depth: depth of the leaf
+        :param start: time at which the construction of the leaf started, used if there is an observer
+        :param label_dataset: dataset whose most frequent label is stored in the leaf, if not the dataset of the leaf
+        :return: constructed leaf
+        """
+
+        label_dataset: Dataset = label_dataset or dataset
+        leaf: Leaf = Leaf(self.__timed("most_frequent_label", lambda: label_dataset.most_frequent_label))
+        if self.__observer is not None:
+            self.__observer.on_node(NodeRecord(depth, len(dataset), len(dataset.feature_names), None, None,
+                                               time.perf_counter() - start))
+        return leaf
+
+    def __timed(self, phase: str, function: Callable, *args):
+        """Calls the given function, notifying the observer about the time spent in the call, if there is one.
+
+        :param phase: name of the phase of the training procedure the call belongs to
+        :param function: function to be called
+        :param args: arguments of the function
+        :return: result of the function
+        """
+
+        if self.__observer is None:
+            return function(*args)
+        start: float = time.perf_counter()
+        result = function(*args)
+        self.__observer.on_phase(phase, time.perf_counter() - start)
+        return result
+
+    def partial_fit(self, data: Dataset):
+        """Updates the fitted decision tree with new examples, as if the tree was fitted on all the examples
+        seen so far.
+
+        Only the trees created with incremental=True can be updated. New examples are added to the tree's own copy
+        of the training dataset, rather than to the dataset it was fitted on, and routed down the tree. Every inner
+        node they reach updates its label counts and contingency tables with the new examples and chooses its split
+        again. If the chosen feature is unchanged, only the children that received new examples are updated, and new
+        feature values get new subtrees. Otherwise, the subtree of the node is constructed again from all of its
+        examples. The resulting tree is the same as the one obtained by fitting on the combined dataset.
+
+        :param data: dataset of new examples, having the same features as the training dataset
+        :return: an instance of self
+        """
+
+        if self.__root is None and self.__compiled is not None:
+            raise ValueError("Decision tree loaded from a model file cannot be updated.")
+        if not self.__incremental:
+            raise ValueError("Decision tree can only be updated if it is created with incremental=True.")
+        if self.__data is None:
+            if self.__root is not None:
+                raise ValueError("Decision tree fitted on column files or by the training workers cannot be updated.")
+            return self.fit(data)
+        if set(data.feature_names) != set(self.__data.feature_names):
+            raise ValueError("New examples must have the same features as the training dataset.")
+
+        first_row: int = len(self.__data)
+        for (example, label), weight in zip(data, data.weights or itertools.repeat(1)):
+            self.__data.add_example([example[feature] for feature in self.__data.feature_names], label, weight)
+        new_rows: array = self.__data.rows[first_row:]
+
+        self.__datasets.pop(self.__root, None)  # the training dataset itself, which now contains the new rows
+        old_dataset: Dataset = self.__data.subset(self.__data.rows[:first_row])
+        self.__root = self.__update(self.__root, old_dataset, new_rows, self.__data, 0)
+        self.__compiled = None
+        self.__branches = None
+
+        return self
+
+    def __update(self, tree: Union[Node, Leaf], dataset: Dataset, new_rows: array, parent_dataset: Dataset,
+                 depth: int) -> Union[Node, Leaf]:
+        """Updates the subtree with new examples of its dataset.
+
+        :param tree: root of the subtree
+        :param dataset: dataset the subtree was constructed for
+        :param new_rows: row indices of the new examples of the dataset
+        :param parent_dataset: updated dataset of the parent node
+        :param depth: depth of the root of the subtree
+        :return: root of the updated subtree
+        """
+
+        root: Optional[Union[Node, Leaf]] = None
+        # (subtree, its dataset, new rows, updated parent dataset, depth, updated parent node, position of the child)
+        # of the subtrees to be updated, processed iteratively so that the depth of the tree is not limited
+        work: list[tuple[Union[Node, Leaf], Dataset, array, Dataset, int, Optional[Node], int]] = [
+            (tree, dataset, new_rows, parent_dataset, depth, None, 0)]
+        nodes: list[Node] = []  # updated inner nodes
+        while work:
+            tree, dataset, new_rows, parent_dataset, depth, parent, position = work.pop()
+            updated_tree: Union[Node, Leaf] = self.__update_node(tree, dataset, new_rows, parent_dataset, depth, work)
+            if parent is None:
+                root = updated_tree
+            else:
+                parent.set_child(position, updated_tree)
+            if isinstance(updated_tree, Node):
+                nodes.append(updated_tree)
+        for node in nodes:
+            node.compact()
+        return root
+
+    def __update_node(self, tree: Union[Node, Leaf], dataset: Dataset, new_rows: array, parent_dataset: Dataset,
+                      depth: int, work: list) -> Union[Node, Leaf]:
+        """Updates the root of the subtree with new examples of its dataset, as described by the __update method.
+
+        :param tree: root of the subtree
+        :param dataset: dataset the subtree was constructed for
+        :param new_rows: row indices of the new examples of the dataset
+        :param parent_dataset: updated dataset of the parent node
+        :param depth: depth of the root of the subtree
+        :param work: work list of the __update method, extended with the children that received new examples
+        :return: updated root of the subtree. Positions of the children that are yet to be updated are reserved.
+        """
+
+        updated_dataset: Dataset = dataset.subset(dataset.rows + new_rows)
+        if isinstance(tree, Leaf):
+            return self.__id3(updated_dataset, parent_dataset, depth)
+
+        label_counts, tables = self.__statistics.pop(tree, None) or (dataset.label_counts,
+                                                                     dataset.contingency_tables())
+        new_dataset: Dataset = dataset.subset(new_rows)
+        for label, count in new_dataset.label_counts.items():
+            label_counts[label] = label_counts.get(label, 0) + count
+        for feature_name, new_table in new_dataset.contingency_tables().items():
+            table: dict[int, dict[int, int]] = tables[feature_name]
+            for value, new_counts in new_table.items():
+                counts: dict[int, int] = table.setdefault(value, {})
+                for label, count in new_counts.items():
+                    counts[label] = counts.get(label, 0) + count
+
+        information_gains: dict[str, float] = {feature_name: information_gain_from_counts(label_counts.values(), table)
+                                               for feature_name, table in tables.items() if table}
+        # numeric features have no sufficient statistics, so their thresholds are searched for again
+        thresholds: dict[str, tuple[float, float]] = updated_dataset.thresholds()
+        for feature_name, (_, information_gain) in thresholds.items():
+            information_gains[feature_name] = information_gain
+        mdf: str = best_feature(information_gains)
+        threshold: Optional[float] = thresholds[mdf][0] if mdf in thresholds else None
+        if threshold is None:  # default branch is the value of the most examples (the first one, on ties)
+            value_counts: dict[int, int] = {value: sum(counts.values()) for value, counts in tables[mdf].items()}
+            default: str = updated_dataset.decode_value(mdf, max(value_counts, key=value_counts.__getitem__))
+        else:  # or the larger side of the threshold (the lower one, on ties)
+            values: list[float] = updated_dataset.numeric_column(mdf)
+            weights: Iterable[int] = updated_dataset.weights or itertools.repeat(1)
+            lower: int = 0
+            upper: int = 0
+            for value, weight in zip(values, weights):
+                if value <= threshold:
+                    lower += weight
+                elif value > threshold:
+                    upper += weight
+            default: str = ("<=" if lower >= upper else ">") + format_number(threshold)
+        if mdf != tree.feature or threshold != tree.threshold or default != tree.default_branch:
+            # the split has changed, so the subtree is constructed again
+            self.__forget(tree)
+            return self.__id3(updated_dataset, parent_dataset, depth)
+
+        def split(split_dataset: Dataset) -> dict[str, Dataset]:
+            return split_dataset.group_by_feature(mdf, default) if threshold is None \
+                else split_dataset.group_by_threshold(mdf, threshold, default)
+
+        node: Node = Node(mdf, most_frequent(label_counts), threshold, default)
+        self.__datasets[node] = updated_dataset
+        self.__statistics[node] = (label_counts, tables)
+        new_sub_datasets: dict[str, Dataset] = split(new_dataset)
+        sub_datasets: Optional[dict[str, Dataset]] = None  # computed only for subtrees constructed by workers
+        for feature_value, child_node in tree.children():
+            feature_value: str
+            child_node: Union[Node, Leaf]
 
-    def predict(self, dataset: Dataset) -> dict[str, Union[str, list[str], float, ConfusionMatrix]]:
+            if feature_value in new_sub_datasets:
+                child_dataset: Optional[Dataset] = self.__datasets.pop(child_node, None)
+                if child_dataset is None:
+                    sub_datasets = sub_datasets or split(dataset)
+                    child_dataset = sub_datasets[feature_value]
+                position: int = node.add_child(feature_value, None)  # reserves the position of the child
+                work.append((child_node, child_dataset, new_sub_datasets[feature_value].rows, updated_dataset,
+                             depth + 1, node, position))
+            else:
+                node.add_child(feature_value, child_node)
+        branch_values: set[str] = {branch_value for branch_value, _ in tree.children()}
+        for feature_value, new_sub_dataset in new_sub_datasets.items():  # values unseen in the dataset
+            if feature_value not in branch_values:
+                node.add_child(feature_value, self.__id3(new_sub_dataset, updated_dataset, depth + 1))
+        return node
+
+    def __forget(self, tree: Union[Node, Leaf]) -> None:
+        """Removes the datasets and statistics of all the nodes of the given subtree.
+
+        :param tree: root of the subtree
+        """
+
+        stack: list[Union[Node, Leaf]] = [tree]
+        while stack:
+            tree = stack.pop()
+            self.__datasets.pop(tree, None)
+            self.__statistics.pop(tree, None)
+            if isinstance(tree, Node):
+                stack.extend(child_node for _, child_node in tree.children())
+
+    def predict(self, dataset: Dataset,
+                lazy_branches: bool = False) -> dict[str, Union[str, Iterator[str], list[str], float, ConfusionMatrix]]:
         """predicts the class labels of the given test set, based on a previously fitted model.
 
+        Branches of the tree are formatted only when the predictions are made, rather than whenever the tree is
+        fitted. Every distinct example is classified only once, and the prediction is reused for its duplicates.
+        Accuracy and the confusion matrix count the examples with their weights.
+
         :param dataset: dataset consisting of
+        :param lazy_branches: whether the branches are provided as a generator of lines, as returned by the
+            iter_branches method, which can be written out by utils.write_prediction_params without formatting
+            all of them at once
         :return: list of predicted values
         """
 
-        prediction_params: dict[str, Union[str, list[str], float, ConfusionMatrix]] = {"branches": self.__branches}
-        predicted_values: list[str] = []
-        for example, label in dataset:
-            example: dict[str, str]
-            label: str
+        prediction_params: dict[str, Union[str, Iterator[str], list[str], float, ConfusionMatrix]] = {
+            "branches": self.iter_branches() if lazy_branches else self.branches()}
+        if self.__root is None:  # loaded from a model file
+            predicted_values: list[str] = self.predict_batch(dataset)
+        else:
+            predicted_values: list[str] = []
+            memo: dict[tuple[str, ...], str] = {}  # predictions of the distinct examples, indexed by their values
+            for example, label in dataset:
+                example: dict[str, str]
+                label: str
 
-            # predict the example
-            predicted_values.append(self.__label_example(example, self.__root))
+                # predict the example, unless an identical one was already predicted
+                values: tuple[str, ...] = tuple(example.values())
+                predicted_value: Optional[str] = memo.get(values)
+                if predicted_value is None:
+                    predicted_value = memo[values] = self.__label_example(example, self.__root)
+                predicted_values.append(predicted_value)
 
+        weights: Optional[list[int]] = dataset.weights
         prediction_params["predictions"]: list[str] = predicted_values
-        prediction_params["accuracy"] = accuracy(dataset.label_sample, predicted_values)
+        prediction_params["accuracy"] = accuracy(dataset.label_sample, predicted_values, weights)
         prediction_params["confusion_matrix"]: ConfusionMatrix = ConfusionMatrix(
-                dataset.label_space, dataset.label_sample, predicted_values)
+                dataset.label_space, dataset.label_sample, predicted_values, weights)
 
         return prediction_params
 
-    def __label_example(self, example: dict[str, str], node: Union[Node, Leaf]) -> str:
+    def branches(self) -> str:
+        """Formats the branches of the fitted decision tree, as described by utils.format_branches. Branches are
+        formatted once after every fit, and reused until the tree is fitted or updated again.
+
+        :return: string representation of all branches
+        """
+
+        if self.__branches is None:
+            self.__branches = "\n".join(self.iter_branches())
+        return self.__branches
+
+    def iter_branches(self) -> Iterator[str]:
+        """Formats the branches of the fitted decision tree lazily, as described by utils.iter_branches.
+
+        :return: generator of the branches, without line terminators
+        """
+
+        if self.__root is None:
+            if self.__compiled is None:
+                raise ValueError("Decision tree must be fitted before its branches are formatted.")
+            return self.__compiled.iter_branches()  # loaded from a model file
+        return iter_branches(self.__root)
+
+    def compile(self) -> CompiledTree:
+        """Compiles the fitted decision tree into flat arrays, which are used for batch predictions.
+
+        :return: compiled decision tree
+        """
+
+        if self.__root is None:
+            raise ValueError("Decision tree must be fitted before it is compiled.")
+        self.__compiled = CompiledTree.from_tree(self.__root)
+        return self.__compiled
+
+    def predict_batch(self, dataset: Dataset) -> list[str]:
+        """Predicts the class labels of the given dataset using the compiled decision tree.
+
+        The tree is compiled on the first call after it was fitted. Predicted labels are equal to the ones
+        obtained by the predict method.
+
+        :param dataset: dataset of examples to be classified
+        :return: list of predicted values
+        """
+
+        if self.__compiled is None:
+            self.compile()
+        return self.__compiled.predict_batch(dataset)
+
+    def save(self, path: str) -> None:
+        """Saves the compiled decision tree into a binary model file at the given path.
+
+        :param path: path of the model file
+        """
+
+        if self.__compiled is None:
+            self.compile()
+        self.__compiled.save(path)
+
+    @classmethod
+    def load(cls, path: str):
+        """Loads the decision tree from a binary model file created by the save method.
+
+        Model file is memory-mapped and the predictions are made directly from the compiled tree, without
+        reconstructing the nodes of the tree.
+
+        :param path: path of the model file
+        :return: decision tree ready for predictions
+        """
+
+        decision_tree: DecisionTree = cls()
+        decision_tree.__compiled = CompiledTree.load(path)
+        return decision_tree
+
+    def predict_stream(self, datasets: Iterable[Dataset]) -> Iterator[str]:
+        """Predicts the class labels of a stream of datasets, such as the chunks of a file read by
+        utils.iter_dataset.
+
+        Every dataset is classified using the compiled decision tree as soon as it is obtained, so the
+        stream can be of any size.
+
+        :param datasets: datasets of examples to be classified
+        :return: generator of predicted values, in the order of the examples
+        """
+
+        for dataset in datasets:
+            yield from self.predict_batch(dataset)
+
+    def evaluate_stream(self, datasets: Iterable[Dataset]) -> Metrics:
+        """Evaluates the predictions of a stream of datasets, such as the chunks of a file read by
+        utils.iter_dataset.
+
+        Predictions of every dataset are accumulated into the metrics and discarded, so the stream can be of
+        any size.
+
+        :param datasets: datasets of classified examples
+        :return: metrics of the predictions of all the examples
+        """
+
+        metrics: Metrics = Metrics()
+        for dataset in datasets:
+            metrics.update(dataset.label_sample, self.predict_batch(dataset), dataset.weights)
+        return metrics
+
+    def predict_depths(self, dataset: Dataset, depths: Iterable[Optional[int]]) -> dict[Optional[int], list[str]]:
+        """Predicts the class labels of the given dataset as if the tree was fitted with each of the given depth
+        limits.
+
+        A tree fitted with a lower depth limit is equal to this tree truncated at that depth, with the nodes at
+        the depth limit replaced by leaves storing their most frequent labels. Predictions for all the depth
+        limits are therefore read off a single traversal of the tree for every example.
+
+        :param dataset: dataset of examples to be classified
+        :param depths: depth limits, none of which exceeds the depth limit of this tree. None stands for no limit.
+        :return: list of predicted values, indexed by the depth limits
+        """
+
+        if self.__root is None:
+            raise ValueError("Decision tree must be fitted before it is truncated.")
+        predictions: dict[Optional[int], list[str]] = {depth: [] for depth in depths}
+        for depth in predictions:
+            if self.__max_depth is not None and (depth is None or depth > self.__max_depth):
+                raise ValueError(f"Depth limit {depth} exceeds the depth limit of the tree {self.__max_depth}")
+        for example, _ in dataset:
+            path: list[str] = []  # most frequent labels of the nodes on the path of the example
+            label: str = self.__label_example(example, self.__root, path)
+            for depth, predicted_values in predictions.items():
+                predicted_values.append(path[depth] if depth is not None and depth < len(path) else label)
+        return predictions
+
+    def __label_example(self, example: dict[str, str], node: Union[Node, Leaf],
+                        path: Optional[list[str]] = None) -> str:
         """Labels the given example using the previously trained decision tree.
 
         Decision tree traversal procedure follows along the branches which feature values match the ones
         in the given example. If some feature in the given example has a value that was unseen in the
         training procedure, the example is classified with the most frequent value occurring in the leaves
-        of the subtree.
+        of the subtree. Nodes of numeric features follow the first branch if the example's value is lower than
+        or equal to the threshold, and the second one otherwise. If the value of the feature is missing, or is not
+        a number for a numeric feature, the default branch of the node is followed.
 
         :param example: example to be classified
         :param node: node from which the decision tree is traversed for classification. Classification
                 procedure should start from the root of the decision tree.
+        :param path: list extended with the most frequent label of every traversed node, if provided
         :return: predicted class label
         """
 
-        if isinstance(node, Leaf):
-            return node.label
-        for branch_value, child_node in node.children():
-            branch_value: str
-            child_node: Union[Node, Leaf]
+        while isinstance(node, Node):  # the tree is descended iteratively, one node at a time
+            if path is not None:
+                path.append(node.most_frequent_label)
+            feature_value: str = example.get(node.feature, MISSING)
+            if node.threshold is not None and feature_value != MISSING:
+                try:
+                    value: float = float(feature_value)
+                except ValueError:  # not a number
+                    value = math.nan
+                if value == value:  # values which are not numbers are handled as missing ones
+                    lower_child, upper_child = (child_node for _, child_node in node.children())
+                    node = lower_child if value <= node.threshold else upper_child
+                    continue
+                feature_value = MISSING
+            if feature_value == MISSING:
+                if node.default_branch is None:
+                    return node.most_frequent_label
+                feature_value = node.default_branch
+            for branch_value, child_node in node.children():
+                branch_value: str
+                child_node: Union[Node, Leaf]
+
+                if feature_value == branch_value:
+                    node = child_node
+                    break
+            else:  # no child nodes correspond to the observed example -> unseen value
+                return node.most_frequent_label
+        return node.label
+
+
+_training_dataset: Optional[Dataset] = None  # training dataset shared by the subtrees within a worker process
+
+
+def _init_worker(dataset: Dataset) -> None:
+    """Initializes a worker process with the training dataset whose subtrees the worker constructs.
+
+    :param dataset: training dataset
+    """
+
+    global _training_dataset
+    _training_dataset = dataset
+
+
+def _child_seed(seed: int, position: int) -> int:
+    """Derives the seed of the random number generator of a child node.
+
+    :param seed: seed of the parent node
+    :param position: position of the child among the children of the parent node
+    :return: seed of the child node
+    """
+
+    return random.Random(seed << 32 | position).getrandbits(64)
+
+
+def _fit_subtree(max_depth: Optional[int], depth: int, feature_names: list[str], rows: array,
+                 max_features: Optional[int] = None, seed: Optional[int] = None,
+                 approximation: tuple[Optional[int], int, float] = (None, 10000, 1e-7)
+                 ) -> tuple[Union[Node, Leaf], dict[str, int]]:
+    """Constructs the subtree for the given rows of the training dataset within a worker process.
+
+    Subtree of a node at some depth is equal to a tree fitted on the node's dataset with the depth limit
+    reduced by the node's depth, so it is constructed by a serial decision tree with such a limit.
+
+    :param max_depth: depth limit of the decision tree that is being fitted
+    :param depth: depth of the root of the subtree
+    :param feature_names: features retained in the dataset of the subtree
+    :param rows: row indices of the examples in the dataset of the subtree
+    :param max_features: number of features drawn at random at every node of the subtree
+    :param seed: seed of the random number generator of the root of the subtree
+    :param approximation: approximate threshold, sample size and delta of the approximate split selection
+    :return: root of the subtree, and the approximation statistics of its construction
+    """
 
-            if node.feature in example and example[node.feature] == branch_value:
-                return self.__label_example(example, child_node)
-        # no child nodes correspond to the observed example -> unseen value
-        return node.most_frequent_label
+    sub_dataset: Dataset = _training_dataset.subset(rows, feature_names)
+    approximate_threshold, sample_size, delta = approximation
+    decision_tree: DecisionTree = DecisionTree(None if max_depth is None else max_depth - depth,
+                                               max_features=max_features, seed=seed,
+                                               approximate_threshold=approximate_threshold, sample_size=sample_size,
+                                               delta=delta).fit(sub_dataset)
+    return decision_tree.root, decision_tree.approximation_statistics
@@ -0,0 +1,438 @@
+import argparse
+import itertools
+import multiprocessing
+from collections import Counter
+from multiprocessing.connection import AuthenticationError, Client, Connection, Listener
+from typing import Iterable, Optional, Union
+
+import utils
+from column_store import MISSING_CODE, format_number
+from dataset import Dataset
+from information_gain import best_feature, information_gain_from_counts, most_frequent
+from node import Node, Leaf
+
+# statistics of a node: label counts, contingency tables of the categorical features, indexed by their values,
+# and label counts of every distinct known value of the numeric features
+Statistics = tuple[dict[str, int], dict[str, dict[str, dict[str, int]]], dict[str, dict[float, dict[str, int]]]]
+
+
+class TrainingWorker:
+    """Worker of the distributed training, which holds a horizontal shard of the training dataset.
+
+    Coordinator of the training asks the worker about the nodes of the tree being constructed, level by level.
+    For every node, the worker keeps the view of its examples within the shard, and answers with the label counts
+    of the examples and their counts for every value of every feature. When the coordinator chooses the split of
+    a node, the worker splits the examples of the node in the same way and reports the counts of the children.
+    Examples themselves never leave the worker.
+
+    Requests and responses are pickled tuples sent over a socket connection of multiprocessing.connection, which
+    authenticates the coordinator by the shared authentication key.
+
+    """
+
+    def __init__(self, dataset: Dataset) -> None:
+        """Creates the worker of the given shard.
+
+        :param dataset: examples of the shard
+        """
+
+        self.__dataset: Dataset = dataset
+        self.__nodes: dict[int, Dataset] = {}  # examples of every node of the frontier, indexed by the node ids
+
+    def serve(self, listener: Listener) -> None:
+        """Serves the coordinators connecting to the listener, one at a time, until one of them shuts the
+        worker down.
+
+        :param listener: listener of the worker's address
+        """
+
+        while True:
+            try:
+                connection: Connection = listener.accept()
+            except (AuthenticationError, OSError):  # connection that failed to authenticate
+                continue
+            with connection:
+                if not self.__handle(connection):
+                    return
+
+    def __handle(self, connection: Connection) -> bool:
+        """Answers the requests of a single coordinator.
+
+        :param connection: connection of the coordinator
+        :return: whether the worker should keep running
+        """
+
+        while True:
+            try:
+                request: tuple = connection.recv()
+            except EOFError:
+                self.__nodes = {}
+                return True
+            command: str = request[0]
+            if command == "shutdown":
+                return False
+            if command == "close":
+                self.__nodes = {}
+                return True
+            try:
+                if command == "features":
+                    connection.send(("features", self.__dataset.feature_names))
+                elif command == "root":
+                    self.__nodes = {0: self.__dataset}
+                    connection.send(("statistics", {0: _statistics(self.__dataset, request[1])}))
+                elif command == "expand":
+                    connection.send(("statistics", self.__expand(request[1])))
+                else:
+                    raise ValueError("Unknown request " + command)
+            except Exception as error:  # the coordinator is notified, and the worker keeps running
+                connection.send(("error", f"{type(error).__name__}: {error}"))
+
+    def __expand(self, splits: list[tuple]) -> dict[int, Statistics]:
+        """Splits the examples of the nodes as chosen by the coordinator.
+
+        :param splits: (node id, feature, threshold, default branch, child ids indexed by the branch values,
+            whether the children need feature statistics) of every node of the frontier. Leaves have no feature.
+        :return: statistics of every child that has some examples within the shard, indexed by the child ids
+        """
+
+        statistics: dict[int, Statistics] = {}
+        for node_id, feature_name, threshold, default, children, with_tables in splits:
+            dataset: Optional[Dataset] = self.__nodes.pop(node_id, None)
+            if dataset is None or feature_name is None:  # no examples within the shard, or a leaf
+                continue
+            sub_datasets: dict[str, Dataset] = dataset.group_by_feature(feature_name, default) if threshold is None \
+                else dataset.group_by_threshold(feature_name, threshold, default)
+            for branch_value, sub_dataset in sub_datasets.items():
+                child_id: int = children[branch_value]
+                self.__nodes[child_id] = sub_dataset
+                statistics[child_id] = _statistics(sub_dataset, with_tables)
+        return statistics
+
+
+def _statistics(dataset: Dataset, with_tables: bool) -> Statistics:
+    """Counts the statistics of a node within a shard.
+
+    Values and labels are ordered by their first occurrence within the shard, as in Dataset.contingency_tables.
+
+    :param dataset: examples of the node within the shard
+    :param with_tables: whether the counts of the feature values are needed, or only the label counts
+    :return: label counts, contingency tables of the categorical features and label counts of the distinct
+        values of the numeric features. Missing values are left out of the tables.
+    """
+
+    label_counts: dict[str, int] = dataset.label_counts
+    if not with_tables:
+        return label_counts, {}, {}
+    labels: list[str] = dataset.label_sample
+    weights: Iterable[int] = dataset.weights or itertools.repeat(1)
+    numeric_features: set[str] = set(dataset.numeric_features)
+    tables: dict[str, dict[str, dict[str, int]]] = {}
+    value_tables: dict[str, dict[float, dict[str, int]]] = {}
+    for feature_name in dataset.feature_names:
+        if feature_name in numeric_features:
+            value_table: dict[float, dict[str, int]] = {}
+            for value, label, weight in zip(dataset.numeric_column(feature_name), labels, weights):
+                if value == value:  # not missing
+                    counts: dict[str, int] = value_table.setdefault(value, {})
+                    counts[label] = counts.get(label, 0) + weight
+            value_tables[feature_name] = value_table
+            continue
+        codes, vocabulary = dataset.encoded_column(feature_name)
+        pairs: dict[tuple[int, str], int] = Counter(zip(codes, labels)) if dataset.weights is None \
+            else _weighted_pairs(zip(codes, labels), dataset.weights)
+        table: dict[str, dict[str, int]] = {}
+        for (code, label), count in pairs.items():
+            if code != MISSING_CODE:
+                table.setdefault(vocabulary[code], {})[label] = count
+        tables[feature_name] = table
+    return label_counts, tables, value_tables
+
+
+def _weighted_pairs(pairs: Iterable[tuple[int, str]], weights: list[int]) -> dict[tuple[int, str], int]:
+    counts: dict[tuple[int, str], int] = {}
+    for pair, weight in zip(pairs, weights):
+        counts[pair] = counts.get(pair, 0) + weight
+    return counts
+
+
+def _merge_counts(counts: dict, other: dict) -> None:
+    """Adds the label counts of another shard to the given counts, keeping the order of the first occurrences.
+
+    :param counts: label counts, which are updated
+    :param other: label counts of a later shard
+    """
+
+    for label, count in other.items():
+        counts[label] = counts.get(label, 0) + count
+
+
+def _merge_statistics(statistics: list[Statistics]) -> Statistics:
+    """Merges the statistics of a node from all the shards, in the order of the shards.
+
+    As the shards are consecutive parts of the dataset, values and labels of the merged statistics are ordered
+    by their first occurrence within the whole dataset, which keeps the information gains float-identical to the
+    ones computed by a single process.
+
+    :param statistics: statistics of the node within every shard that has some of its examples
+    :return: statistics of the node within the whole dataset
+    """
+
+    label_counts: dict[str, int] = {}
+    tables: dict[str, dict[str, dict[str, int]]] = {}
+    value_tables: dict[str, dict[float, dict[str, int]]] = {}
+    for shard_label_counts, shard_tables, shard_value_tables in statistics:
+        _merge_counts(label_counts, shard_label_counts)
+        for merged, shard in ((tables, shard_tables), (value_tables, shard_value_tables)):
+            for feature_name, table in shard.items():
+                merged_table: dict = merged.setdefault(feature_name, {})
+                for value, counts in table.items():
+                    _merge_counts(merged_table.setdefault(value, {}), counts)
+    return label_counts, tables, value_tables
+
+
+def _best_threshold(label_counts: dict[str, int],
+                    value_table: dict[float, dict[str, int]]) -> Optional[tuple[float, float]]:
+    """Searches for the best threshold split of a numeric feature, in the same way as Dataset.thresholds does,
+    but over the label counts of the distinct values rather than over the sorted examples.
+
+    Label counts below every candidate threshold only change between distinct values, so they are equal to the
+    ones obtained by the scan over the sorted examples, and so is the information gain of every candidate.
+
+    :param label_counts: label counts of the node
+    :param value_table: label counts of every distinct known value of the feature
+    :return: threshold and its information gain, or None if the feature has less than two distinct known values
+    """
+
+    values: list[float] = sorted(value_table)
+    known: dict[str, int] = label_counts  # label counts of the examples whose value is known
+    if sum(sum(counts.values()) for counts in value_table.values()) != sum(label_counts.values()):
+        known = {}
+        for value in values:  # ordered by the first occurrence within the sorted examples
+            _merge_counts(known, value_table[value])
+    lower_counts: dict[str, int] = {}
+    upper_counts: dict[str, int] = dict(known)
+    best: Optional[tuple[float, float]] = None
+    for value, next_value in zip(values, values[1:]):
+        for label, count in value_table[value].items():
+            lower_counts[label] = lower_counts.get(label, 0) + count
+            upper_counts[label] -= count
+        ig: float = information_gain_from_counts(label_counts.values(), {0: lower_counts, 1: upper_counts},
+                                                 known.values())
+        if best is None or ig > best[1]:
+            threshold: float = (value + next_value) / 2
+            best = (threshold if threshold < next_value else value, ig)
+    return best
+
+
+def fit_distributed(connections: list[Connection], feature_names: list[str],
+                    max_depth: Optional[int] = None) -> Union[Node, Leaf]:
+    """Constructs the decision tree on the dataset sharded among the connected workers, as the coordinator of
+    the distributed training.
+
+    Tree is constructed level by level. The workers report the statistics of all the nodes of a level at once,
+    and the coordinator merges them, chooses every split with the same information gain and tie-breaking rules
+    as DecisionTree.fit, and sends the splits back to the workers, which report the statistics of the next level.
+    As long as the shards are consecutive parts of the training dataset, given in order, the tree is the same as
+    the one fitted on the whole dataset by a single process.
+
+    :param connections: connections of the workers, in the order of their shards
+    :param feature_names: features of the training dataset
+    :param max_depth: depth limit of the decision tree
+    :return: root of the constructed tree
+    """
+
+    def request(message: tuple) -> dict[int, Statistics]:
+        for connection in connections:  # the workers process the request concurrently
+            connection.send(message)
+        responses: list[dict[int, Statistics]] = []
+        for connection in connections:
+            status, response = connection.recv()
+            if status == "error":
+                raise ValueError("Training worker failed: " + response)
+            responses.append(response)
+        node_ids: dict[int, None] = dict.fromkeys(node_id for response in responses for node_id in response)
+        return {node_id: _merge_statistics([response[node_id] for response in responses if node_id in response])
+                for node_id in node_ids}
+
+    def needs_tables(depth: int) -> bool:
+        return max_depth is None or depth < max_depth
+
+    root: Optional[Union[Node, Leaf]] = None
+    statistics: dict[int, Statistics] = request(("root", needs_tables(0)))
+    # (node id, features, depth, parent node, position of the child) of the nodes of the current level
+    level: list[tuple[int, list[str], int, Optional[Node], int]] = [(0, list(feature_names), 0, None, 0)]
+    node_count: int = 1
+    nodes: list[Node] = []
+    while level:
+        splits: list[tuple] = []
+        next_level: list[tuple[int, list[str], int, Optional[Node], int]] = []
+        for node_id, features, depth, parent, position in level:
+            label_counts, tables, value_tables = statistics.pop(node_id)
+            tree: Union[Node, Leaf] = Leaf(most_frequent(label_counts))
+            information_gains: dict[str, float] = {}
+            if needs_tables(depth) and len(label_counts) > 1 and features:
+                for feature_name in features:
+                    if feature_name in value_tables:
+                        best: Optional[tuple[float, float]] = _best_threshold(label_counts,
+                                                                             value_tables[feature_name])
+                        if best is not None:
+                            information_gains[feature_name] = best[1]
+                    elif tables[feature_name]:
+                        information_gains[feature_name] = information_gain_from_counts(
+                            label_counts.values(), tables[feature_name])
+            if information_gains:
+                mdf: str = best_feature(information_gains)
+                if mdf in value_tables:
+                    threshold: Optional[float] = _best_threshold(label_counts, value_tables[mdf])[0]
+                    lower: int = sum(sum(counts.values()) for value, counts in value_tables[mdf].items()
+                                     if value <= threshold)
+                    upper: int = sum(sum(counts.values()) for value, counts in value_tables[mdf].items()
+                                     if value > threshold)
+                    missing: int = sum(label_counts.values()) - lower - upper
+                    lower_key, upper_key = "<=" + format_number(threshold), ">" + format_number(threshold)
+                    default: str = lower_key if lower >= upper else upper_key
+                    # sides without examples are omitted, once the examples with missing values are added
+                    branch_values: list[str] = [key for key, size in ((lower_key, lower), (upper_key, upper))
+                                                if size > 0 or key == default and missing > 0]
+                    child_features: list[str] = features
+                else:
+                    threshold: Optional[float] = None
+                    sizes: dict[str, int] = {value: sum(counts.values()) for value, counts in tables[mdf].items()}
+                    default: str = max(sizes, key=sizes.__getitem__)
+                    branch_values: list[str] = list(sizes)
+                    child_features: list[str] = [feature_name for feature_name in features if feature_name != mdf]
+                tree = Node(mdf, most_frequent(label_counts), threshold, default)
+                nodes.append(tree)
+                children: dict[str, int] = {}
+                for branch_value in branch_values:
+                    children[branch_value] = node_count
+                    next_level.append((node_count, child_features, depth + 1, tree, tree.add_child(branch_value, None)))
+                    node_count += 1
+                splits.append((node_id, mdf, threshold, default, children, needs_tables(depth + 1)))
+            else:
+                splits.append((node_id, None, None, None, {}, False))  # the workers release the examples
+            if parent is None:
+                root = tree
+            else:
+                parent.set_child(position, tree)
+        statistics = request(("expand", splits)) if next_level else {}
+        level = next_level
+    for node in nodes:
+        node.compact()
+    return root
+
+
+def connect_workers(addresses: list, authkey: Optional[bytes] = None) -> list[Connection]:
+    """Connects to the training workers at the given addresses.
+
+    :param addresses: addresses of the workers, in the order of their shards: (host, port) pairs for TCP
+        sockets, or paths of Unix sockets
+    :param authkey: authentication key shared with the workers. If not provided, the key of the current process
+        is used, which is inherited by the workers started by start_local_workers.
+    :return: connections of the workers
+    """
+
+    authkey = authkey or multiprocessing.current_process().authkey
+    return [Client(tuple(address) if isinstance(address, list) else address, authkey=authkey)
+            for address in addresses]
+
+
+def start_local_workers(dataset: Dataset, n_workers: int, unix_sockets: bool = False,
+                        authkey: Optional[bytes] = None) -> tuple[list[multiprocessing.Process], list]:
+    """Splits the dataset into consecutive shards and starts a worker process for each of them on localhost.
+
+    Every worker receives a compact copy of its shard only, rather than the whole dataset.
+
+    :param dataset: training dataset
+    :param n_workers: number of the workers
+    :param unix_sockets: whether the workers listen on Unix sockets, rather than on TCP sockets
+    :param authkey: authentication key of the workers. If not provided, the key of the current process is used.
+    :return: started processes, and the addresses of the workers, in the order of the shards
+    """
+
+    if n_workers < 1:
+        raise ValueError("Distributed training requires at least one worker.")
+    authkey = authkey or multiprocessing.current_process().authkey
+    processes: list[multiprocessing.Process] = []
+    addresses: list = []
+    for worker in range(n_workers):
+        rows = dataset.rows[worker * len(dataset) // n_workers:(worker + 1) * len(dataset) // n_workers]
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process: multiprocessing.Process = multiprocessing.Process(
+            target=_serve_shard, args=(_copy_shard(dataset.subset(rows)), unix_sockets, authkey, sender), daemon=True)
+        process.start()
+        sender.close()
+        processes.append(process)
+        addresses.append(receiver.recv())  # the address is known once the worker listens
+        receiver.close()
+    return processes, addresses
+
+
+def stop_workers(addresses: list, authkey: Optional[bytes] = None) -> None:
+    """Shuts the training workers at the given addresses down.
+
+    :param addresses: addresses of the workers
+    :param authkey: authentication key shared with the workers. If not provided, the key of the current process
+        is used.
+    """
+
+    for connection in connect_workers(addresses, authkey):
+        with connection:
+            connection.send(("shutdown",))
+
+
+def _copy_shard(shard: Dataset) -> Dataset:
+    """Copies the examples of the shard into a dataset of their own, so that the shard is sent to a worker process
+    without the rest of the storage.
+
+    :param shard: view of the examples of the shard
+    :return: dataset of the same examples
+    """
+
+    copy: Dataset = Dataset(shard.feature_names + [shard.class_label], shard.numeric_features)
+    for (example, label), weight in zip(shard, shard.weights or itertools.repeat(1)):
+        copy.add_example([example[feature_name] for feature_name in shard.feature_names], label, weight)
+    return copy
+
+
+def _serve_shard(shard: Dataset, unix_sockets: bool, authkey: Optional[bytes], sender: Connection) -> None:
+    """Serves the shard within a worker process started by start_local_workers.
+
+    :param shard: examples of the shard
+    :param unix_sockets: whether the worker listens on a Unix socket
+    :param authkey: authentication key of the worker
+    :param sender: pipe to which the address of the worker is sent
+    """
+
+    address = None if unix_sockets else ("127.0.0.1", 0)
+    with Listener(address, family="AF_UNIX" if unix_sockets else "AF_INET", authkey=authkey) as listener:
+        sender.send(listener.address)
+        sender.close()
+        TrainingWorker(shard).serve(listener)
+
+
+def main() -> None:
+    """Starts a training worker which serves a shard of the training dataset until a coordinator shuts it down.
+
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="Worker of the distributed training of the ID3 decision tree.")
+    parser.add_argument("shard", help="path of the csv file of the worker's shard of the training dataset")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--unix-socket", help="path of a Unix socket the worker listens on, instead of a port")
+    parser.add_argument("--authkey", required=True, help="authentication key shared with the coordinator")
+    parser.add_argument("--numeric", default="", help="comma-separated names of the numeric features")
+    args: argparse.Namespace = parser.parse_args()
+
+    shard: Dataset = utils.load_dataset(args.shard, numeric_features=[name for name in args.numeric.split(",")
+                                                                       if name])
+    address = args.unix_socket if args.unix_socket is not None else (args.host, args.port)
+    with Listener(address, authkey=args.authkey.encode()) as listener:
+        print(f"Serving {len(shard)} examples at {listener.address}", flush=True)
+        TrainingWorker(shard).serve(listener)
+
+
+if __name__ == '__main__':
+    main()
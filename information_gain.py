@@ -0,0 +1,87 @@
+import math
+from typing import Iterable, Optional
+
+
+def entropy_from_counts(counts: Iterable[int]) -> float:
+    """Calculates the entropy of a sample given by the number of occurrences of each class label.
+
+    :param counts: number of occurrences of each class label within the sample
+    :return: entropy of the sample
+    """
+
+    counts: list[int] = list(counts)
+    total: int = sum(counts)
+    e: float = 0  # entropy
+    for count in counts:
+        count: int
+
+        if count == 0:
+            continue  # contributes nothing to the entropy
+        probability: float = count / total
+        e += probability * math.log2(probability)
+
+    return -e
+
+
+def information_gain_from_counts(label_counts: Iterable[int], table: dict[int, dict[int, int]],
+                                 known_counts: Optional[Iterable[int]] = None) -> float:
+    """Calculates the information gain of a split, given the label counts of the whole sample and the
+    contingency table of the split.
+
+    Examples which are not a part of the table, because their value of the feature is missing, are left out of the
+    split: as in C4.5, information gain is calculated over the examples whose value is known, and scaled by their
+    share of the whole sample.
+
+    :param label_counts: number of occurrences of each class label within the whole sample
+    :param table: number of occurrences of each class label, for each value of the feature the sample is split by
+    :param known_counts: number of occurrences of each class label within the examples of the table. If not
+        provided, they are summed from the table.
+    :return: information gain of the split
+    """
+
+    label_counts: list[int] = list(label_counts)
+    total: int = sum(label_counts)
+    known_total: int = sum(sum(group_counts.values()) for group_counts in table.values())
+    if known_total != total:  # some values are missing
+        if known_counts is None:
+            summed_counts: dict[int, int] = {}
+            for group_counts in table.values():
+                for label, count in group_counts.items():
+                    summed_counts[label] = summed_counts.get(label, 0) + count
+            known_counts = summed_counts.values()
+        if known_total == 0:
+            return 0.0
+        return information_gain_from_counts(known_counts, table) * known_total / total
+
+    ig: float = entropy_from_counts(label_counts)
+    for group_counts in table.values():
+        group_counts: dict[int, int]
+
+        ig -= entropy_from_counts(group_counts.values()) * sum(group_counts.values()) / total
+    return ig
+
+
+def best_feature(information_gains: dict[str, float]) -> str:
+    """Returns the feature with the highest information gain.
+
+    If there are multiple such features, the one returned is lexicographically smallest.
+
+    :param information_gains: information gain of each feature, indexed by feature names
+    :return: feature name of the most discriminatory feature
+    """
+
+    max_ig: float = max(information_gains.values())
+    return min(feature for feature, ig in information_gains.items() if ig == max_ig)
+
+
+def most_frequent(counts: dict[str, int]) -> str:
+    """Returns the most frequent value, given the number of occurrences of each value.
+
+    If there are multiple values of the same frequency, the lexicographically smallest one is returned.
+
+    :param counts: number of occurrences, indexed by values
+    :return: most frequent value
+    """
+
+    max_count: int = max(counts.values())
+    return min(value for value, count in counts.items() if count == max_count)
@@ -0,0 +1,159 @@
+from collections import Counter
+from typing import Iterable, Optional
+
+from confusion_matrix import ConfusionMatrix
+
+
+class Metrics:
+    """Evaluation metrics of a classification procedure, accumulated over one or more batches of predictions.
+
+    Every batch is reduced to the number of occurrences of each (expected, actual) pair of labels, which is
+    counted in a single pass. Confusion matrix and all the metrics are derived from these counts, so the
+    cost of a metric does not depend on the number of evaluated examples.
+
+    """
+
+    def __init__(self, label_space: Iterable[str] = ()) -> None:
+        """Creates the metrics without any evaluated examples.
+
+        :param label_space: labels which are a part of the confusion matrix even if they never occur.
+            Labels that occur in the evaluated examples are added to the label space.
+        """
+
+        self.__label_space: set[str] = set(label_space)
+        self.__pairs: Counter = Counter()  # (expected, actual) -> number of examples
+        self.__matrix: Optional[list[list[int]]] = None  # confusion matrix of the accumulated pairs
+
+    def update(self, expected: Iterable[str], actual: Iterable[str], weights: Optional[Iterable[int]] = None):
+        """Accumulates a batch of predictions.
+
+        :param expected: correct labels of the batch
+        :param actual: labels of the batch obtained with some classification procedure
+        :param weights: weights of the examples of the batch. If not provided, every example is counted once.
+        :return: the metrics themselves
+        """
+
+        expected: list[str] = list(expected)
+        actual: list[str] = list(actual)
+        if len(expected) != len(actual):
+            raise ValueError("Cannot evaluate predictions if samples are not of the same length.")
+        if weights is None:
+            self.__pairs.update(zip(expected, actual))
+        else:
+            for pair, weight in zip(zip(expected, actual), weights):
+                self.__pairs[pair] += weight
+        self.__matrix = None
+        return self
+
+    @property
+    def labels(self) -> list[str]:
+        """Returns the labels of the confusion matrix, sorted alphabetically.
+
+        :return: list of labels
+        """
+
+        labels: set[str] = set(self.__label_space)
+        for expected, actual in self.__pairs:
+            labels.add(expected)
+            labels.add(actual)
+        return sorted(labels)
+
+    @property
+    def matrix(self) -> list[list[int]]:
+        """Returns the confusion matrix, whose rows correspond to the expected labels and columns to the actual
+        labels, both in the order of the labels property.
+
+        :return: two-dimensional list of the numbers of examples
+        """
+
+        if self.__matrix is None:
+            codes: dict[str, int] = {label: code for code, label in enumerate(self.labels)}
+            matrix: list[list[int]] = [[0] * len(codes) for _ in codes]
+            for (expected, actual), count in self.__pairs.items():
+                matrix[codes[expected]][codes[actual]] += count
+            self.__matrix = matrix
+        return self.__matrix
+
+    @property
+    def total(self) -> int:
+        return sum(self.__pairs.values())
+
+    @property
+    def correct(self) -> int:
+        return sum(count for (expected, actual), count in self.__pairs.items() if expected == actual)
+
+    @property
+    def accuracy(self) -> float:
+        """Computes the accuracy, i.e. the percentage of correctly classified examples.
+
+        :return: accuracy of the accumulated predictions
+        """
+
+        total: int = self.total
+        if total == 0:
+            raise ValueError("Cannot compute accuracy without evaluated examples.")
+        return self.correct / total
+
+    def precision(self) -> dict[str, float]:
+        """Computes the precision of every label, i.e. the share of the examples classified with the label that
+        are expected to have it. Precision of a label that was never predicted is 0.
+
+        :return: precision, indexed by labels
+        """
+
+        matrix: list[list[int]] = self.matrix
+        return {label: _ratio(matrix[i][i], sum(row[i] for row in matrix)) for i, label in enumerate(self.labels)}
+
+    def recall(self) -> dict[str, float]:
+        """Computes the recall of every label, i.e. the share of the examples expected to have the label that
+        are classified with it. Recall of a label that was never expected is 0.
+
+        :return: recall, indexed by labels
+        """
+
+        matrix: list[list[int]] = self.matrix
+        return {label: _ratio(matrix[i][i], sum(matrix[i])) for i, label in enumerate(self.labels)}
+
+    def f1(self) -> dict[str, float]:
+        """Computes the F1 score of every label, i.e. the harmonic mean of its precision and recall.
+
+        :return: F1 score, indexed by labels
+        """
+
+        precision: dict[str, float] = self.precision()
+        recall: dict[str, float] = self.recall()
+        return {label: _ratio(2 * precision[label] * recall[label], precision[label] + recall[label])
+                for label in precision}
+
+    def macro_average(self) -> dict[str, float]:
+        """Computes the unweighted means of precision, recall and F1 score over all the labels.
+
+        :return: "precision", "recall" and "f1" averages
+        """
+
+        labels: int = len(self.labels)
+        return {name: _ratio(sum(scores.values()), labels)
+                for name, scores in (("precision", self.precision()), ("recall", self.recall()), ("f1", self.f1()))}
+
+    def micro_average(self) -> dict[str, float]:
+        """Computes precision, recall and F1 score from the counts summed over all the labels.
+
+        Since every example has exactly one expected and one actual label, all three are equal to the accuracy.
+
+        :return: "precision", "recall" and "f1" averages
+        """
+
+        accuracy: float = _ratio(self.correct, self.total)
+        return {"precision": accuracy, "recall": accuracy, "f1": accuracy}
+
+    def confusion_matrix(self) -> ConfusionMatrix:
+        return ConfusionMatrix.from_matrix(self.matrix)
+
+    def to_dict(self) -> dict[str, object]:
+        return {"total": self.total, "accuracy": _ratio(self.correct, self.total), "labels": self.labels,
+                "confusion_matrix": self.matrix, "precision": self.precision(), "recall": self.recall(),
+                "f1": self.f1(), "macro_average": self.macro_average(), "micro_average": self.micro_average()}
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    return numerator / denominator if denominator else 0.0
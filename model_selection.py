@@ -0,0 +1,157 @@
+import argparse
+import random
+from array import array
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterable, Optional
+
+import utils
+from dataset import Dataset
+from decision_tree import DecisionTree
+from metrics import Metrics
+
+
+def split_folds(dataset: Dataset, folds: int, seed: Optional[int] = 0) -> list[array]:
+    """Splits the examples of the dataset into folds of (almost) equal sizes.
+
+    :param dataset: dataset to be split
+    :param folds: number of folds
+    :param seed: seed of the shuffle of the examples. If None, the examples are not shuffled, and are assigned
+        to the folds in a round-robin fashion.
+    :return: row indices of the examples of every fold
+    """
+
+    if folds < 2:
+        raise ValueError("Cross-validation requires at least 2 folds.")
+    if folds > len(dataset):
+        raise ValueError(f"Cannot split {len(dataset)} examples into {folds} folds.")
+    rows: list[int] = list(dataset.rows)
+    if seed is not None:
+        random.Random(seed).shuffle(rows)
+    return [array("I", rows[fold::folds]) for fold in range(folds)]
+
+
+def cross_validate(dataset: Dataset, depths: Iterable[Optional[int]], folds: int = 5, n_jobs: Optional[int] = None,
+                   seed: Optional[int] = 0) -> dict[Optional[int], list[Metrics]]:
+    """Evaluates the decision tree with each of the given depth limits using k-fold cross-validation.
+
+    Every fold is used once as the test set of a tree fitted on the other folds. Only a single tree is fitted
+    for each fold, with the highest of the depth limits, and the predictions of the lower depth limits are
+    obtained by truncating it, so the cost of the evaluation does not grow with the number of depth limits.
+
+    :param dataset: dataset of classified examples
+    :param depths: depth limits of the decision tree. None stands for no limit.
+    :param folds: number of folds
+    :param n_jobs: number of worker processes evaluating the folds. If not provided, or lower than 2, the folds
+        are evaluated within the current process.
+    :param seed: seed of the shuffle of the examples before they are split into folds, or None for no shuffle
+    :return: metrics of every fold, indexed by the depth limits
+    """
+
+    depths: list[Optional[int]] = list(dict.fromkeys(depths))  # without duplicates, in the given order
+    if not depths:
+        raise ValueError("At least one depth limit must be provided.")
+    max_depth: Optional[int] = None if None in depths else max(depths)
+    fold_rows: list[array] = split_folds(dataset, folds, seed)
+    splits: list[tuple[array, array]] = []  # (training rows, test rows) of every fold
+    for fold, test_rows in enumerate(fold_rows):
+        splits.append((array("I", (row for other, rows in enumerate(fold_rows) if other != fold for row in rows)),
+                       test_rows))
+
+    if n_jobs is not None and n_jobs > 1:
+        with ProcessPoolExecutor(min(n_jobs, folds), initializer=_init_worker, initargs=(dataset,)) as executor:
+            futures: list[Future] = [executor.submit(_evaluate_fold, max_depth, depths, train_rows, test_rows)
+                                     for train_rows, test_rows in splits]
+            fold_metrics: list[dict[Optional[int], Metrics]] = [future.result() for future in futures]
+    else:
+        _init_worker(dataset)
+        try:
+            fold_metrics: list[dict[Optional[int], Metrics]] = [
+                _evaluate_fold(max_depth, depths, train_rows, test_rows) for train_rows, test_rows in splits]
+        finally:
+            _init_worker(None)
+
+    return {depth: [metrics[depth] for metrics in fold_metrics] for depth in depths}
+
+
+def mean_accuracies(results: dict[Optional[int], list[Metrics]]) -> dict[Optional[int], float]:
+    """Computes the mean accuracy over the folds for each of the depth limits.
+
+    :param results: metrics of every fold, indexed by the depth limits, as returned by cross_validate
+    :return: mean accuracy, indexed by the depth limits
+    """
+
+    return {depth: sum(metrics.accuracy for metrics in fold_metrics) / len(fold_metrics)
+            for depth, fold_metrics in results.items()}
+
+
+def best_depth(results: dict[Optional[int], list[Metrics]]) -> Optional[int]:
+    """Selects the depth limit with the highest mean accuracy over the folds. Ties are resolved in favour of
+    the lowest depth limit, i.e. the simplest tree.
+
+    :param results: metrics of every fold, indexed by the depth limits, as returned by cross_validate
+    :return: selected depth limit
+    """
+
+    accuracies: dict[Optional[int], float] = mean_accuracies(results)
+    return min(accuracies, key=lambda depth: (-accuracies[depth], float("inf") if depth is None else depth))
+
+
+_dataset: Optional[Dataset] = None  # dataset whose folds are evaluated within a worker process
+
+
+def _init_worker(dataset: Optional[Dataset]) -> None:
+    """Initializes a worker process with the dataset whose folds the worker evaluates.
+
+    :param dataset: cross-validated dataset
+    """
+
+    global _dataset
+    _dataset = dataset
+
+
+def _evaluate_fold(max_depth: Optional[int], depths: list[Optional[int]], train_rows: array,
+                   test_rows: array) -> dict[Optional[int], Metrics]:
+    """Fits a decision tree on the training rows and evaluates it on the test rows with each of the depth limits.
+
+    :param max_depth: depth limit of the fitted tree, not lower than any of the evaluated depth limits
+    :param depths: evaluated depth limits
+    :param train_rows: row indices of the training examples
+    :param test_rows: row indices of the test examples
+    :return: metrics of the predictions, indexed by the depth limits
+    """
+
+    test_dataset: Dataset = _dataset.subset(test_rows)
+    decision_tree: DecisionTree = DecisionTree(max_depth).fit(_dataset.subset(train_rows))
+    expected: list[str] = test_dataset.label_sample
+    return {depth: Metrics(test_dataset.label_space).update(expected, predicted_values, test_dataset.weights)
+            for depth, predicted_values in decision_tree.predict_depths(test_dataset, depths).items()}
+
+
+def main() -> None:
+    """Cross-validates the decision tree over a range of depth limits and prints the mean accuracy of each.
+
+    The dataset is parsed only once, no matter how many depth limits are evaluated.
+
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="Selection of the depth limit of the ID3 decision tree by cross-validation.")
+    parser.add_argument("dataset", help="path of the csv dataset")
+    parser.add_argument("--depths", default="0,1,2,3,4,5,6,7,8,9",
+                        help="comma-separated depth limits, where 'none' stands for no limit")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args: argparse.Namespace = parser.parse_args()
+
+    depths: list[Optional[int]] = [None if depth.strip().lower() == "none" else int(depth)
+                                   for depth in args.depths.split(",")]
+    results: dict[Optional[int], list[Metrics]] = cross_validate(utils.load_dataset(args.dataset), depths,
+                                                                 args.folds, args.n_jobs, args.seed)
+    for depth, accuracy in mean_accuracies(results).items():
+        print(f"{depth}: {accuracy:.5f}")
+    print(f"[BEST_DEPTH]: {best_depth(results)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
-from typing import Union, ItemsView
+import sys
+from typing import Union, ItemsView, Optional
 
 
 class Leaf:
@@ -6,13 +7,15 @@ class Leaf:
 
     """
 
+    __slots__ = ("__label",)
+
     def __init__(self, label: str) -> None:
         """Creates a new Leaf that stores the given label
 
-        :param label: label to be stored within the leaf
+        :param label: label to be stored within the leaf. It is interned, so all leaves share a single copy of it.
         """
 
-        self.__label: str = label
+        self.__label: str = sys.intern(label)
 
     @property
     def label(self) -> str:
@@ -33,30 +36,77 @@ class Node:
     for examples for which the feature of this node has some value unseen in the training process.
     Child nodes are indexed by the value of the feature that the node corresponds to.
 
+    Node of a numeric feature splits the dataset by a threshold, and has two children: the first one for the
+    values lower than or equal to the threshold, indexed by "<=threshold", and the second one for the other
+    values, indexed by ">threshold".
+
+    To keep large trees small, nodes have no instance dictionaries, their strings are interned, and the children
+    are stored in two parallel sequences of branch values and child nodes, in the order in which they were added.
+    Sequences are lists while the node is constructed, and can be turned into tuples by the compact method.
+
+    Examples whose value of the feature is missing follow the default branch, which is the branch of the largest
+    part of the dataset. Node without a default branch predicts its most frequent label for them instead.
+
     """
 
-    def __init__(self, feature: str, most_frequent_label: str) -> None:
+    __slots__ = ("__feature", "__most_frequent_label", "__threshold", "__default_branch", "__branch_values",
+                 "__children")
+
+    def __init__(self, feature: str, most_frequent_label: str, threshold: Optional[float] = None,
+                 default_branch: Optional[str] = None) -> None:
         """Constructs a new Node that splits some dataset by the given feature.
 
         :param feature: Feature that the node splits the dataset by
         :param most_frequent_label: most frequent classification label of the dataset
+        :param threshold: threshold of the split, if the feature is numeric
+        :param default_branch: branch value followed by the examples whose value of the feature is missing
         """
 
-        self.__feature: str = feature
-        self.__most_frequent_label: str = most_frequent_label
-        self.__children: dict[str, Union[Node, Leaf]] = {}  # indexed by feature values
+        self.__feature: str = sys.intern(feature)
+        self.__most_frequent_label: str = sys.intern(most_frequent_label)
+        self.__threshold: Optional[float] = threshold
+        self.__default_branch: Optional[str] = None if default_branch is None else sys.intern(default_branch)
+        self.__branch_values: Union[list[str], tuple[str, ...]] = []  # feature values of the branches
+        self.__children: Union[list[Union[Node, Leaf]], tuple[Union[Node, Leaf], ...]] = []  # child of every branch
 
-    def add_child(self, branch_value: str, child) -> None:
+    def add_child(self, branch_value: str, child) -> int:
         """Adds the child node.
 
         Child node is stored together with the branch value, which indicates value of the current node's feature
         in the examples of the dataset that the subtree corresponds to.
 
-        :param branch_value: value of the node's feature
+        :param branch_value: value of the node's feature, which is not a branch value of the node yet
+        :param child: instance of Node corresponding to the decision subtree, or None if the child is not
+            constructed yet, in which case it is set later by the set_child method
+        :return: position of the child among the children of the node
+        """
+
+        if isinstance(self.__children, tuple):  # compacted node
+            self.__branch_values, self.__children = list(self.__branch_values), list(self.__children)
+        self.__branch_values.append(sys.intern(branch_value))
+        self.__children.append(child)
+        return len(self.__children) - 1
+
+    def set_child(self, position: int, child) -> None:
+        """Replaces the child node at the given position, keeping its branch value.
+
+        :param position: position of the child, as returned by the add_child method
         :param child: instance of Node corresponding to the decision subtree
         """
 
-        self.__children[branch_value]: Union[Node, Leaf] = child
+        if isinstance(self.__children, tuple):  # compacted node
+            self.__children = list(self.__children)
+        self.__children[position] = child
+
+    def __reduce__(self):
+        # the subtree is pickled as a flat preorder list, since the default pickling recurses once per level
+        return _unflatten, (_flatten(self),)
+
+    def compact(self) -> None:
+        """Stores the children of the constructed node in tuples, which take less memory than lists."""
+
+        self.__branch_values = tuple(self.__branch_values)
+        self.__children = tuple(self.__children)
 
     def children(self) -> ItemsView:
         """Provides a way to iterate over the subtrees(child nodes) and their corresponding feature values.
@@ -64,7 +114,7 @@ class Node:
         :return: Iterable of 2-tuples containing feature value and child node
         """
 
-        yield from self.__children.items()
+        yield from zip(self.__branch_values, self.__children)
 
     @property
     def feature(self) -> str:
@@ -73,3 +123,65 @@ class Node:
     @property
     def most_frequent_label(self) -> str:
         return self.__most_frequent_label
+
+    @property
+    def threshold(self) -> Optional[float]:
+        return self.__threshold
+
+    @property
+    def default_branch(self) -> Optional[str]:
+        return self.__default_branch
+
+
+
+def _flatten(root: Node) -> list:
+    """Lists the nodes of the subtree in preorder, without references between them.
+
+    :param root: root of the subtree
+    :return: label of every leaf, and (feature, most frequent label, threshold, default branch, branch values) of
+        every inner node, followed by its children. Children which are not constructed yet are listed as None.
+    """
+
+    records: list = []
+    stack: list[Union[Node, Leaf, None]] = [root]
+    while stack:
+        tree: Union[Node, Leaf, None] = stack.pop()
+        if not isinstance(tree, Node):
+            records.append(None if tree is None else tree.label)
+            continue
+        children: list[tuple[str, Union[Node, Leaf, None]]] = list(tree.children())
+        records.append((tree.feature, tree.most_frequent_label, tree.threshold, tree.default_branch,
+                        tuple(branch_value for branch_value, _ in children)))
+        stack.extend(child for _, child in reversed(children))
+    return records
+
+
+def _unflatten(records: list) -> Node:
+    """Constructs the subtree listed by the _flatten function.
+
+    :param records: nodes of the subtree in preorder
+    :return: root of the subtree
+    """
+
+    root: Optional[Node] = None
+    # inner nodes whose children are being constructed, and the position of the next child of each of them
+    stack: list[list] = []
+    for record in records:
+        tree: Union[Node, Leaf, None] = None if record is None else Leaf(record) if isinstance(record, str) \
+            else Node(*record[:4])
+        if stack:
+            parent: list = stack[-1]
+            parent[0].set_child(parent[1], tree)
+            parent[1] += 1
+            while stack and stack[-1][1] == len(stack[-1][2]):  # all the children of the node are constructed
+                stack.pop()[0].compact()
+        else:
+            root = tree
+        if isinstance(tree, Node):
+            for branch_value in record[4]:
+                tree.add_child(branch_value, None)
+            if record[4]:
+                stack.append([tree, 0, record[4]])
+            else:
+                tree.compact()
+    return root
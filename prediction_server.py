@@ -0,0 +1,267 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Optional
+
+import utils
+from column_store import MISSING
+from compiled_tree import CompiledTree
+from dataset import Dataset
+from decision_tree import DecisionTree
+
+
+class ServerStatistics:
+    """Latency and throughput counters of the prediction server.
+
+    Latency of a request is measured from its arrival to the moment its prediction is available. Percentiles are
+    computed over a window of the most recent requests.
+
+    """
+
+    def __init__(self, window: int = 10000) -> None:
+        """Creates the counters without any served requests.
+
+        :param window: number of the most recent requests whose latencies are retained
+        """
+
+        self.__start: float = time.perf_counter()
+        self.__requests: int = 0
+        self.__errors: int = 0
+        self.__batches: int = 0
+        self.__latencies: deque = deque(maxlen=window)  # latencies of the most recent requests, in seconds
+        self.__finished: deque = deque(maxlen=window)  # times at which the most recent requests were served
+
+    def record_batch(self, latencies: list[float], failed: bool = False) -> None:
+        """Records a processed batch of requests.
+
+        :param latencies: latency of every request of the batch, in seconds
+        :param failed: whether the prediction of the batch failed
+        """
+
+        now: float = time.perf_counter()
+        self.__batches += 1
+        self.__requests += len(latencies)
+        if failed:
+            self.__errors += len(latencies)
+        self.__latencies.extend(latencies)
+        self.__finished.extend(now for _ in latencies)
+
+    def to_dict(self) -> dict[str, float]:
+        """Exports the counters.
+
+        :return: total numbers of "requests", "errors" and "batches", "mean_batch_size", "throughput" in
+            requests per second, both since the start ("throughput") and over the window ("recent_throughput"),
+            and latency percentiles in milliseconds over the window
+        """
+
+        now: float = time.perf_counter()
+        latencies: list[float] = sorted(self.__latencies)
+        statistics: dict[str, float] = {
+            "requests": self.__requests, "errors": self.__errors, "batches": self.__batches,
+            "mean_batch_size": self.__requests / self.__batches if self.__batches else 0.0,
+            "uptime_seconds": now - self.__start,
+            "throughput": self.__requests / (now - self.__start),
+            "recent_throughput": len(self.__finished) / (now - self.__finished[0]) if len(self.__finished) > 1
+            and now > self.__finished[0] else 0.0}
+        for name, percentile in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0)):
+            index: int = min(int(percentile * len(latencies)), len(latencies) - 1)
+            statistics[f"latency_{name}_ms"] = latencies[index] * 1000 if latencies else 0.0
+        return statistics
+
+
+class PredictionServer:
+    """Server which keeps a compiled decision tree in memory and serves its predictions over a local socket.
+
+    Concurrent requests are coalesced into micro-batches: a batch is classified as soon as it reaches the
+    maximum batch size, or when the maximum wait time passes since its first request arrived.
+
+    The protocol is line-based. Every request line is a json object which maps feature names to values, and is
+    answered by a line with the json object {"label": predicted label}, or {"error": message}. A request line
+    STATS is answered by the json object of the server statistics. Responses are written in the order of the
+    requests, so a client can pipeline its requests over a single connection.
+
+    """
+
+    def __init__(self, tree: CompiledTree, max_batch_size: int = 64, max_wait: float = 0.001) -> None:
+        """Creates the server of the given tree.
+
+        :param tree: compiled decision tree which classifies the examples
+        :param max_batch_size: maximum number of requests classified at once
+        :param max_wait: maximum time, in seconds, that the first request of a batch waits for other requests
+        """
+
+        if max_batch_size < 1:
+            raise ValueError("Maximum batch size must be positive.")
+        self.__tree: CompiledTree = tree
+        self.__max_batch_size: int = max_batch_size
+        self.__max_wait: float = max_wait
+        self.__statistics: ServerStatistics = ServerStatistics()
+        self.__pending: list[tuple[dict[str, str], asyncio.Future, float]] = []  # (example, result, arrival)
+        self.__ready: asyncio.Event = asyncio.Event()  # set while there are pending requests
+        self.__full: asyncio.Event = asyncio.Event()  # set while there are enough pending requests for a batch
+        self.__batcher: Optional[asyncio.Task] = None
+
+    @property
+    def statistics(self) -> ServerStatistics:
+        return self.__statistics
+
+    async def predict(self, example: dict[str, str]) -> str:
+        """Classifies the example within the next batch.
+
+        :param example: values of the features, indexed by the feature names. Missing features are handled as
+            missing values, as are the json null values, i.e. they follow the default branches of the nodes.
+        :return: predicted class label
+        """
+
+        if self.__batcher is None:
+            self.__batcher = asyncio.create_task(self.__run_batches())
+        result: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.__pending.append((example, result, time.perf_counter()))
+        self.__ready.set()
+        if len(self.__pending) >= self.__max_batch_size:
+            self.__full.set()
+        return await result
+
+    async def __run_batches(self) -> None:
+        """Collects the pending requests into batches and classifies them, for as long as the server runs."""
+
+        while True:
+            await self.__ready.wait()
+            if len(self.__pending) < self.__max_batch_size:
+                try:
+                    await asyncio.wait_for(self.__full.wait(), self.__max_wait)
+                except asyncio.TimeoutError:
+                    pass
+            batch: list[tuple[dict[str, str], asyncio.Future, float]] = self.__pending[:self.__max_batch_size]
+            del self.__pending[:self.__max_batch_size]
+            if not self.__pending:
+                self.__ready.clear()
+            if len(self.__pending) < self.__max_batch_size:
+                self.__full.clear()
+            self.__classify(batch)
+
+    def __classify(self, batch: list[tuple[dict[str, str], asyncio.Future, float]]) -> None:
+        """Classifies a batch of requests and sets their results.
+
+        :param batch: (example, result, arrival time) of every request
+        """
+
+        feature_names: list[str] = self.__tree.feature_names
+        dataset: Dataset = Dataset(feature_names + ["label"])  # class labels of the examples are unknown
+        try:
+            for example, _, _ in batch:
+                values: list[object] = [example.get(feature_name) for feature_name in feature_names]
+                dataset.add_example([MISSING if value is None else str(value) for value in values], "")
+            predictions: list[str] = self.__tree.predict_batch(dataset)
+        except Exception as error:  # the whole batch fails, but the server keeps running
+            for _, result, _ in batch:
+                if not result.done():
+                    result.set_exception(error)
+            now: float = time.perf_counter()
+            self.__statistics.record_batch([now - arrival for _, _, arrival in batch], failed=True)
+            return
+        for (_, result, _), label in zip(batch, predictions):
+            if not result.done():  # the request might have been cancelled
+                result.set_result(label)
+        now: float = time.perf_counter()
+        self.__statistics.record_batch([now - arrival for _, _, arrival in batch])
+
+    async def __respond(self, line: bytes) -> dict[str, object]:
+        """Answers a single request line.
+
+        :param line: request line, without the line terminator
+        :return: json object of the response
+        """
+
+        if line.strip() == b"STATS":
+            return self.__statistics.to_dict()
+        try:
+            example: object = json.loads(line)
+        except ValueError as error:
+            return {"error": "Invalid json: " + str(error)}
+        if not isinstance(example, dict):
+            return {"error": "Request must be a json object of feature values."}
+        try:
+            return {"label": await self.predict(example)}
+        except Exception as error:
+            return {"error": str(error)}
+
+    async def __handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serves a single client connection, answering its requests in order.
+
+        :param reader: stream of the request lines
+        :param writer: stream of the response lines
+        """
+
+        responses: asyncio.Queue = asyncio.Queue()
+
+        async def write_responses() -> None:
+            while True:
+                response: Optional[asyncio.Task] = await responses.get()
+                if response is None:
+                    return
+                writer.write(json.dumps(await response).encode() + b"\n")
+                if responses.empty():
+                    await writer.drain()
+
+        writing: asyncio.Task = asyncio.create_task(write_responses())
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    responses.put_nowait(asyncio.create_task(self.__respond(line)))
+        except ConnectionError:
+            pass
+        finally:
+            responses.put_nowait(None)
+            try:
+                await writing
+                await writer.drain()
+            except ConnectionError:
+                pass
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000) -> asyncio.AbstractServer:
+        """Starts accepting the client connections at the given address.
+
+        :param host: address of the server
+        :param port: port of the server, or 0 for any free port
+        :return: started server
+        """
+
+        return await asyncio.start_server(self.__handle, host, port)
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 8000) -> None:
+        server: asyncio.AbstractServer = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main() -> None:
+    """Loads a saved decision tree, or fits one on a training dataset, and serves its predictions.
+
+    """
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="Prediction server of the ID3 decision tree.")
+    model = parser.add_mutually_exclusive_group(required=True)
+    model.add_argument("--model", help="path of a model file saved by DecisionTree.save")
+    model.add_argument("--train", help="path of the csv dataset the decision tree is fitted to")
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=1.0)
+    args: argparse.Namespace = parser.parse_args()
+
+    if args.model is not None:
+        tree: CompiledTree = CompiledTree.load(args.model)
+    else:
+        tree: CompiledTree = DecisionTree(args.max_depth).fit(utils.load_dataset(args.train)).compile()
+    server: PredictionServer = PredictionServer(tree, args.max_batch_size, args.max_wait_ms / 1000)
+    asyncio.run(server.serve_forever(args.host, args.port))
+
+
+if __name__ == '__main__':
+    main()
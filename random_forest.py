@@ -0,0 +1,196 @@
+import itertools
+import math
+import random
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional, Union
+
+from compiled_tree import CompiledTree
+from confusion_matrix import ConfusionMatrix
+from dataset import Dataset
+from decision_tree import DecisionTree
+from information_gain import most_frequent
+from utils import accuracy
+
+
+class RandomForest:
+    """Ensemble of ID3 decision trees, each fitted on a bootstrap sample of the training dataset with the features
+    drawn at random at every node. Predicted label of an example is the one most of the trees vote for.
+
+    Bootstrap samples are views of the training dataset which only hold the indices of their examples, so all the
+    trees share a single columnar copy of the data. Examples of a weighted dataset are drawn in proportion to their
+    weights, as the identical examples they stand for, so their samples are copied with the numbers of draws as the
+    weights. Fitted trees are kept compiled, which is how they predict.
+
+    """
+
+    def __init__(self, n_trees: int = 10, max_depth: Optional[int] = None, max_features: Union[int, str, None] = "sqrt",
+                 bootstrap: bool = True, n_jobs: Optional[int] = None, seed: Optional[int] = 0) -> None:
+        """Initializes the ensemble.
+
+        :param n_trees: number of decision trees
+        :param max_depth: depth limit of every decision tree
+        :param max_features: number of features drawn at random at every node, "sqrt" for the square root of the
+            number of features, or None for all the features
+        :param bootstrap: whether every tree is fitted on a bootstrap sample, rather than on the whole dataset
+        :param n_jobs: number of worker processes fitting the trees. If not provided, or lower than 2, the trees
+            are fitted within the current process.
+        :param seed: seed of the random number generator which draws the samples and the features
+        """
+
+        if n_trees < 1:
+            raise ValueError("Ensemble must consist of at least one decision tree.")
+        if isinstance(max_features, str) and max_features != "sqrt":
+            raise ValueError("Number of features must be an integer, sqrt or None, got " + max_features)
+        self.__n_trees: int = n_trees
+        self.__max_depth: Optional[int] = max_depth
+        self.__max_features: Union[int, str, None] = max_features
+        self.__bootstrap: bool = bootstrap
+        self.__n_jobs: Optional[int] = n_jobs
+        self.__seed: Optional[int] = seed
+        self.__trees: list[CompiledTree] = []
+        self.__branches: Optional[str] = None  # formatted branches of the fitted trees, kept for repeated predictions
+
+    @property
+    def trees(self) -> list[CompiledTree]:
+        return self.__trees
+
+    def fit(self, data: Union[Dataset, str]):
+        """Fits the decision trees of the ensemble on the provided dataset.
+
+        :param data: dataset that the ensemble will be fitted to, or a directory of column files written by
+            utils.convert_dataset
+        :return: an instance of self
+        """
+
+        if isinstance(data, str):
+            data = Dataset.from_column_files(data)
+        max_features: Optional[int] = self.__max_features
+        if max_features == "sqrt":
+            max_features = max(int(math.sqrt(len(data.feature_names))), 1)
+        generator: random.Random = random.Random(self.__seed)
+        seeds: list[int] = [generator.randrange(2 ** 32) for _ in range(self.__n_trees)]
+
+        if self.__n_jobs is not None and self.__n_jobs > 1:
+            # the dataset is sent to every worker once, rather than with every tree
+            with ProcessPoolExecutor(self.__n_jobs, initializer=_init_worker, initargs=(data,)) as executor:
+                self.__trees = list(executor.map(_fit_tree, [self.__max_depth] * len(seeds),
+                                                 [max_features] * len(seeds), [self.__bootstrap] * len(seeds), seeds))
+        else:
+            _init_worker(data)
+            try:
+                self.__trees = [_fit_tree(self.__max_depth, max_features, self.__bootstrap, seed) for seed in seeds]
+            finally:
+                _init_worker(None)
+        self.__branches = None
+
+        return self
+
+    def predict(self, dataset: Dataset,
+                lazy_branches: bool = False) -> dict[str, Union[str, Iterator[str], list[str], float, ConfusionMatrix]]:
+        """Predicts the class labels of the given test set by the majority vote of the decision trees.
+
+        :param dataset: dataset of examples to be classified
+        :param lazy_branches: whether the branches are provided as a generator of lines, as returned by the
+            iter_branches method
+        :return: prediction parameters in the same form as returned by DecisionTree.predict: "branches" of all the
+            trees, "predictions", "accuracy" and "confusion_matrix"
+        """
+
+        predicted_values: list[str] = self.predict_batch(dataset)
+        return {"branches": self.iter_branches() if lazy_branches else self.branches(),
+                "predictions": predicted_values,
+                "accuracy": accuracy(dataset.label_sample, predicted_values, dataset.weights),
+                "confusion_matrix": ConfusionMatrix(dataset.label_space, dataset.label_sample, predicted_values,
+                                                    dataset.weights)}
+
+    def predict_batch(self, dataset: Dataset) -> list[str]:
+        """Predicts the class labels of the given dataset by the majority vote of the decision trees. Ties are
+        resolved in favour of the lexicographically smallest label.
+
+        :param dataset: dataset of examples to be classified
+        :return: list of predicted values
+        """
+
+        return [most_frequent(votes) for votes in self.__votes(dataset)]
+
+    def predict_proba(self, dataset: Dataset) -> list[dict[str, float]]:
+        """Estimates the probabilities of the class labels of the given dataset as the shares of the trees that
+        vote for them.
+
+        :param dataset: dataset of examples to be classified
+        :return: probability of every label that some tree votes for, for each example
+        """
+
+        return [{label: count / len(self.__trees) for label, count in votes.items()}
+                for votes in self.__votes(dataset)]
+
+    def __votes(self, dataset: Dataset) -> list[Counter]:
+        """Counts the votes of the decision trees for the labels of every example.
+
+        Every tree classifies the whole dataset at once, and the votes of all the trees for an example are
+        counted together.
+
+        :param dataset: dataset of examples to be classified
+        :return: number of votes for each label, for each example
+        """
+
+        if not self.__trees:
+            raise ValueError("Random forest must be fitted before it is used for predictions.")
+        return list(map(Counter, zip(*(tree.predict_batch(dataset) for tree in self.__trees))))
+
+    def branches(self) -> str:
+        """Formats the branches of all the decision trees, each one preceded by the line [TREE i]. Branches are
+        formatted once after every fit.
+
+        :return: string representation of the branches of the trees
+        """
+
+        if self.__branches is None:
+            self.__branches = "\n".join(self.iter_branches())
+        return self.__branches
+
+    def iter_branches(self) -> Iterator[str]:
+        """Formats the branches of all the decision trees lazily, as described by the branches method.
+
+        :return: generator of the lines, without line terminators
+        """
+
+        for i, tree in enumerate(self.__trees):
+            yield f"[TREE {i + 1}]:"
+            yield from tree.iter_branches()
+
+
+_dataset: Optional[Dataset] = None  # training dataset shared by the trees fitted within a worker process
+
+
+def _init_worker(dataset: Optional[Dataset]) -> None:
+    """Initializes a worker process with the training dataset of the trees the worker fits.
+
+    :param dataset: training dataset
+    """
+
+    global _dataset
+    _dataset = dataset
+
+
+def _fit_tree(max_depth: Optional[int], max_features: Optional[int], bootstrap: bool, seed: int) -> CompiledTree:
+    """Fits a decision tree of the ensemble on a bootstrap sample of the training dataset.
+
+    :param max_depth: depth limit of the tree
+    :param max_features: number of features drawn at random at every node
+    :param bootstrap: whether the tree is fitted on a bootstrap sample, rather than on the whole dataset
+    :param seed: seed of the random number generator which draws the sample and the features
+    :return: compiled decision tree
+    """
+
+    generator: random.Random = random.Random(seed)
+    sample: Dataset = _dataset
+    if bootstrap and _dataset.weights is None:
+        sample = _dataset.subset(array("I", generator.choices(_dataset.rows, k=len(_dataset))))
+    elif bootstrap:  # every weighted example is drawn as the examples it stands for, and weighs the number of draws
+        draws: Counter = Counter(generator.choices(_dataset.rows, cum_weights=list(itertools.accumulate(
+            _dataset.weights)), k=_dataset.total_weight))
+        sample = _dataset.subset(array("I", draws)).copy(list(draws.values()))
+    return DecisionTree(max_depth, max_features=max_features, seed=generator.randrange(2 ** 32)).fit(sample).compile()
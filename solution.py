@@ -1,9 +1,11 @@
+import os
 import sys
-from typing import Union
+from typing import Iterator, Optional, Union
 
 import utils
 from confusion_matrix import ConfusionMatrix
 from dataset import Dataset
+from dataset_cache import DatasetCache
 from decision_tree import DecisionTree
 
 
@@ -15,19 +17,31 @@ def main() -> None:
         second argument should be the path to the test dataset
         third argument, if provided, is considered to be the depth limit of the decision tree
 
+    If the environment variable DATASET_CACHE_DIR is set, the datasets are loaded through the cache of parsed
+    datasets in that directory, so that they are parsed only once.
+
     """
 
     train_dataset_path, test_dataset_path = sys.argv[1:3]
     depth_limit: int = int(sys.argv[3]) if len(sys.argv) > 3 else None
 
-    train_dataset: Dataset = utils.load_dataset(train_dataset_path)
-    test_dataset: Dataset = utils.load_dataset(test_dataset_path)
+    cache_directory: Optional[str] = os.environ.get("DATASET_CACHE_DIR")
+    if cache_directory:
+        cache: DatasetCache = DatasetCache(cache_directory)
+        train_dataset: Dataset = cache.load(train_dataset_path)
+        test_dataset: Dataset = cache.load(test_dataset_path)
+    else:
+        train_dataset: Dataset = utils.load_dataset(train_dataset_path)
+        test_dataset: Dataset = utils.load_dataset(test_dataset_path)
 
     decision_tree: DecisionTree = DecisionTree(depth_limit)
     decision_tree = decision_tree.fit(train_dataset)
-    predictions: dict[str, Union[str, list[str], float, ConfusionMatrix]] = decision_tree.predict(test_dataset)
+    predictions: dict[str, Union[Iterator[str], list[str], float, ConfusionMatrix]] = decision_tree.predict(
+        test_dataset, lazy_branches=True)
 
-    print(utils.format_prediction_params(predictions))
+    # the report is streamed, rather than formatted into a single string
+    utils.write_prediction_params(predictions, sys.stdout)
+    sys.stdout.write("\n")
 
 
 if __name__ == '__main__':
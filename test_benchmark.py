@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+import benchmark
+import utils
+from dataset import Dataset
+
+
+class BenchmarkTest(unittest.TestCase):
+    """Checks the synthetic datasets and the regression tracking of the benchmarks."""
+
+    def test_generate_dataset(self) -> None:
+        """The same arguments generate the same dataset of the requested shape."""
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths: list[str] = [os.path.join(directory, f"dataset{i}.csv") for i in range(3)]
+            benchmark.generate_dataset(paths[0], 200, 4, 3, 2, seed=5)
+            benchmark.generate_dataset(paths[1], 200, 4, 3, 2, seed=5)
+            benchmark.generate_dataset(paths[2], 200, 4, 3, 2, seed=6)
+            contents: list[str] = []
+            for path in paths:
+                with open(path) as csv_file:
+                    contents.append(csv_file.read())
+            dataset: Dataset = utils.load_dataset(paths[0])
+
+        self.assertEqual(contents[0], contents[1])
+        self.assertNotEqual(contents[0], contents[2])
+        self.assertEqual((200, ["feature1", "feature2", "feature3", "feature4"]), (len(dataset), dataset.feature_names))
+        self.assertEqual({"c0", "c1"}, dataset.label_space)
+
+    def test_find_regressions(self) -> None:
+        baseline: dict[str, dict[str, float]] = {"fit": {"seconds": 1.0, "peak_memory": 100}, "load": {"seconds": 0}}
+        results: dict[str, dict[str, float]] = {"fit": {"seconds": 1.3, "peak_memory": 110},
+                                                "load": {"seconds": 5.0}, "predict": {"seconds": 2.0}}
+        regressions: list[str] = benchmark.find_regressions(results, baseline, 0.2)
+        self.assertEqual(1, len(regressions))
+        self.assertTrue(regressions[0].startswith("fit seconds: 1.3 (baseline 1, +30.0%)"))
+        self.assertEqual([], benchmark.find_regressions(results, baseline, 0.5))
+
+    def test_run_benchmarks(self) -> None:
+        results: dict[str, dict[str, float]] = benchmark.run_benchmarks(rows=200, features=4, repeat=1)
+        self.assertEqual({"load", "fit", "predict", "format_branches", "confusion_matrix"}, set(results))
+        for measurements in results.values():
+            self.assertEqual({"seconds", "peak_memory"}, set(measurements))
+            self.assertTrue(measurements["seconds"] >= 0 and measurements["peak_memory"] > 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import math
+import unittest
+
+from column_store import MISSING, MISSING_CODE, ColumnStore, SparseColumn
+
+
+class ColumnStoreTest(unittest.TestCase):
+    """Checks the encoding of the examples in the columnar storage."""
+
+    def test_encoding(self) -> None:
+        """Every distinct value is stored once per column, and missing values are stored apart from the others."""
+
+        store: ColumnStore = ColumnStore(["outlook", "wind"], "play")
+        for values, label in [(["sunny", "weak"], "no"), (["rain", "weak"], "yes"), (["sunny", ""], "yes"),
+                              (["", "strong"], "no")]:
+            store.append(values, label)
+
+        self.assertEqual(4, len(store))
+        self.assertEqual([[0, 1, 0, MISSING_CODE], [0, 0, MISSING_CODE, 1]], list(map(list, store.columns)))
+        self.assertEqual([["sunny", "rain"], ["weak", "strong"]], store.vocabularies)
+        self.assertEqual(([0, 1, 1, 0], ["no", "yes"]), (list(store.labels), store.label_vocabulary))
+        self.assertEqual(["rain", MISSING], [store.decode(0, 1), store.decode(1, MISSING_CODE)])
+        self.assertEqual((1, 0), (store.column_index("wind"), store.encode(0, "sunny")))
+
+    def test_invalid_examples(self) -> None:
+        """An example that cannot be stored leaves the store unchanged."""
+
+        store: ColumnStore = ColumnStore(["outlook", "wind"], "play")
+        store.append(["sunny", "weak"], "no")
+        with self.assertRaises(ValueError):
+            store.append(["rain"], "yes")
+        self.assertEqual((1, ["sunny"], ["no"]), (len(store), store.vocabularies[0], store.label_vocabulary))
+
+    def test_numeric_values(self) -> None:
+        """Numbers are stored as they are, and an example with a value that is not a number is not stored."""
+
+        store: ColumnStore = ColumnStore(["outlook", "temperature"], "play", ["temperature"])
+        store.append(["sunny", "30"], "no")
+        store.append(["rain", ""], "yes")
+        store.append(["sunny", "12.5"], "yes")
+        with self.assertRaises(ValueError):
+            store.append(["fog", "warm"], "maybe")
+        with self.assertRaises(ValueError):
+            store.append(["fog", "nan"], "maybe")
+
+        self.assertEqual([30, 12.5], [value for value in store.columns[1] if not math.isnan(value)])
+        self.assertEqual((3, ["sunny", "rain"], ["no", "yes"]),
+                         (len(store), store.vocabularies[0], store.label_vocabulary))
+        self.assertEqual(["30", "12.5", MISSING], [store.decode(1, 30.0), store.decode(1, 12.5),
+                                                   store.decode(1, math.nan)])
+        with self.assertRaises(ValueError):
+            ColumnStore(["outlook"], "play", ["temperature"])
+
+    def test_sparse_columns(self) -> None:
+        """Columns whose values are mostly missing are stored sparsely once there are enough rows, and densely again
+        once most of their values are known, without any change of the values."""
+
+        store: ColumnStore = ColumnStore(["rare", "amount", "late", "color"], "label", ["amount"])
+        dense: ColumnStore = ColumnStore(["rare", "amount", "late", "color"], "label", ["amount"], sparse=False)
+        for row in range(4200):
+            values: list[str] = ["abc"[row % 3] if row % 10 == 0 else "", str(row / 4) if row % 5 == 0 else "",
+                                 "xy"[row % 2] if row >= 560 else "", "rgb"[row % 3]]
+            store.append(values, "yn"[row % 7 == 0])
+            dense.append(values, "yn"[row % 7 == 0])
+            if row == 1023:
+                self.assertEqual([True, True, True, False],
+                                 [isinstance(column, SparseColumn) for column in store.columns])
+
+        self.assertEqual([True, True, False, False], [isinstance(column, SparseColumn) for column in store.columns])
+        self.assertEqual(list(range(0, 4200, 10)), list(store.columns[0].rows))
+        self.assertEqual(420, len(store.columns[0].values))
+        for column, dense_column in zip(store.columns, dense.columns):
+            self.assertEqual(len(dense_column), len(column))
+            self.assertEqual(str(list(dense_column)), str([column[row] for row in range(len(column))]))
+        self.assertEqual(str(list(dense.columns[1])), str(list(store.columns[1].to_dense())))
+        copy: ColumnStore = store.copy(range(0, 4200, 2))
+        self.assertEqual([True, True, False, False], [isinstance(column, SparseColumn) for column in copy.columns])
+        self.assertEqual(list(range(0, 2100, 5)), list(copy.columns[0].rows))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+import os
+import random
+import tempfile
+import unittest
+from array import array
+
+import utils
+from dataset import Dataset
+from decision_tree import DecisionTree
+
+_TENNIS: list[str] = ["sunny,hot,high,weak,no", "sunny,hot,high,strong,no", "overcast,hot,high,weak,yes",
+                      "rain,mild,high,weak,yes", "rain,cool,normal,weak,yes", "rain,cool,normal,strong,no",
+                      "overcast,cool,normal,strong,yes", "sunny,mild,high,weak,no", "sunny,cool,normal,weak,yes",
+                      "rain,mild,normal,weak,yes", "sunny,mild,normal,strong,yes", "overcast,mild,high,strong,yes",
+                      "overcast,hot,normal,weak,yes", "rain,mild,high,strong,no"]
+
+
+def _tennis() -> Dataset:
+    """Creates the play tennis dataset.
+
+    :return: dataset of the fourteen examples
+    """
+
+    dataset: Dataset = Dataset(["outlook", "temperature", "humidity", "wind", "play"])
+    for row in _TENNIS:
+        *values, label = row.split(",")
+        dataset.add_example(values, label)
+    return dataset
+
+
+def _weather() -> Dataset:
+    """Creates a small dataset with a categorical and a numeric feature.
+
+    :return: dataset of six examples
+    """
+
+    dataset: Dataset = Dataset(["outlook", "temperature", "play"], ["temperature"])
+    for outlook, temperature, label in [("sunny", "30", "no"), ("sunny", "18", "yes"), ("rain", "12", "no"),
+                                        ("overcast", "25", "yes"), ("rain", "", "yes"), ("overcast", "8", "yes")]:
+        dataset.add_example([outlook, temperature], label)
+    return dataset
+
+
+class DatasetTest(unittest.TestCase):
+    """Checks the views of a dataset and the statistics computed from them."""
+
+    def test_group_by_feature(self) -> None:
+        """Groups hold the examples of every value, without the feature they are grouped by."""
+
+        dataset: Dataset = Dataset(["outlook", "wind", "play"])
+        for values, label in [(["sunny", "weak"], "no"), (["rain", "weak"], "yes"), (["sunny", "strong"], "yes")]:
+            dataset.add_example(values, label)
+
+        groups: dict[str, Dataset] = dataset.group_by_feature("wind")
+        self.assertEqual(["weak", "strong"], list(groups))
+        self.assertEqual([({"outlook": "sunny"}, "no"), ({"outlook": "rain"}, "yes")], list(groups["weak"]))
+        self.assertEqual((["outlook"], array("I", [2])), (groups["strong"].feature_names, groups["strong"].rows))
+        self.assertEqual([({"outlook": "sunny", "wind": "weak"}, "no"), ({"outlook": "rain", "wind": "weak"}, "yes"),
+                          ({"outlook": "sunny", "wind": "strong"}, "yes")], list(dataset))
+        with self.assertRaises(ValueError):
+            dataset.group_by_feature("play")
+
+    def test_information_gains(self) -> None:
+        """Information gains counted from the contingency tables are the ones of the grouped datasets."""
+
+        dataset: Dataset = _tennis()
+        self.assertEqual({0: {0: 3, 1: 2}, 1: {1: 4}, 2: {1: 3, 0: 2}}, dataset.contingency_tables()["outlook"])
+        information_gains: dict[str, float] = dataset.information_gains()
+        for feature_name, expected in [("outlook", 0.24675), ("temperature", 0.02922), ("humidity", 0.15184),
+                                       ("wind", 0.04813)]:
+            self.assertAlmostEqual(expected, information_gains[feature_name], places=5)
+            groups: dict[str, Dataset] = dataset.group_by_feature(feature_name)
+            self.assertAlmostEqual(dataset.entropy - sum(len(group) / len(dataset) * group.entropy
+                                                         for group in groups.values()),
+                                   dataset.information_gain(feature_name), places=12)
+        self.assertEqual("outlook", dataset.most_discriminatory_feature)
+
+    def test_label_counts(self) -> None:
+        """Cached label statistics follow the examples added after they were computed."""
+
+        dataset: Dataset = _tennis()
+        self.assertEqual({"no": 5, "yes": 9}, dataset.label_counts)
+        self.assertAlmostEqual(0.94029, dataset.entropy, places=5)
+        self.assertEqual(("yes", {"no", "yes"}), (dataset.most_frequent_label, dataset.label_space))
+        for _ in range(4):
+            dataset.add_example(["sunny", "hot", "high", "weak"], "no")
+        self.assertEqual({"no": 9, "yes": 9}, dataset.label_counts)
+        self.assertEqual((1.0, "no"), (dataset.entropy, dataset.most_frequent_label))
+        dataset.add_example(["sunny", "hot", "high", "weak"], "maybe")
+        self.assertEqual(["no", "yes", "maybe"], list(dataset.label_counts))
+        self.assertEqual({"no": 7, "yes": 2, "maybe": 1}, dataset.group_by_feature("outlook")["sunny"].label_counts)
+
+    def test_thresholds(self) -> None:
+        """Numeric features are split by the best threshold, and the missing values follow the larger side."""
+
+        dataset: Dataset = _weather()
+        threshold, information_gain = dataset.thresholds()["temperature"]
+        self.assertEqual(27.5, threshold)
+        groups: dict[str, Dataset] = dataset.group_by_threshold("temperature", threshold)
+        self.assertEqual(["<=27.5", ">27.5"], list(groups))
+        self.assertEqual((["yes", "no", "yes", "yes", "yes"], ["no"]),
+                         (groups["<=27.5"].label_sample, groups[">27.5"].label_sample))
+        self.assertEqual(["18", "12", "25", "", "8"], [example["temperature"] for example, _ in groups["<=27.5"]])
+        self.assertEqual(["temperature"], groups["<=27.5"].numeric_features)
+        self.assertEqual(["12", "8"], [example["temperature"] for example, _ in
+                                       dataset.group_by_threshold("temperature", 15.0, ">15")["<=15"]])
+        self.assertAlmostEqual(dataset.information_gain("temperature"), information_gain)
+        with self.assertRaises(ValueError):
+            dataset.group_by_threshold("outlook", threshold)
+        with self.assertRaises(ValueError):
+            dataset.group_by_feature("temperature")
+
+    def test_subset_copies_rows(self) -> None:
+        """Subset does not change with the array of rows it was created from."""
+
+        dataset: Dataset = _weather()
+        rows: array = array("I", [0, 2])
+        subset: Dataset = dataset.subset(rows)
+        rows.append(3)
+        self.assertEqual(2, len(subset))
+        self.assertEqual(["no", "no"], subset.label_sample)
+
+    def test_views_are_read_only(self) -> None:
+        """No examples can be added to the subsets and groups of a dataset, nor changed through them."""
+
+        dataset: Dataset = _weather()
+        views: list[Dataset] = [dataset.subset(dataset.rows), dataset.subset(dataset.rows, ["outlook"]),
+                                *dataset.group_by_feature("outlook").values(),
+                                *dataset.group_by_threshold("temperature", 20.0).values()]
+        for view in views:
+            with self.assertRaises(ValueError):
+                view.add_example(["sunny", "20"], "yes")
+            with self.assertRaises(ValueError):
+                view.add_weight(0)
+        self.assertEqual(6, len(dataset))
+
+        copy: Dataset = dataset.subset(dataset.rows).copy()
+        copy.add_example(["sunny", "20"], "yes")
+        self.assertEqual((7, 6), (len(copy), len(dataset)))
+
+    def test_sparse_columns(self) -> None:
+        """Statistics, groups and trees of the sparsely stored columns are the ones of the same columns stored
+        densely."""
+
+        generator: random.Random = random.Random(2)
+        with tempfile.TemporaryDirectory() as directory:
+            path: str = os.path.join(directory, "dataset.csv")
+            with open(path, "w") as dataset_file:
+                dataset_file.write("rare,amount,color,label\n")
+                for _ in range(3000):
+                    rare: str = generator.choice("abc") if generator.random() < 0.1 else ""
+                    amount: str = str(generator.randint(0, 50)) if generator.random() < 0.2 else ""
+                    color: str = generator.choice(["red", "green", "blue"])
+                    label: str = "yes" if rare == "a" or (amount and int(amount) > 40) or color == "red" else "no"
+                    if generator.random() < 0.1:
+                        label = generator.choice(["yes", "no"])
+                    dataset_file.write(",".join([rare, amount, color, label]) + "\n")
+            sparse: Dataset = utils.load_dataset(path, numeric_features=["amount"])
+            utils.convert_dataset(path, os.path.join(directory, "columns"), numeric_features=["amount"])
+            dense: Dataset = Dataset.from_column_files(os.path.join(directory, "columns"))
+
+            rows: array = array("I", sorted(generator.sample(range(3000), 2000)))
+            sample: array = array("I", generator.choices(range(3000), k=3000))  # rows occur more than once
+            for sparse_view, dense_view in [(sparse, dense), (sparse.subset(rows), dense.subset(rows)),
+                                            (sparse.subset(sample), dense.subset(sample))]:
+                self.assertEqual(dense_view.contingency_tables(), sparse_view.contingency_tables())
+                self.assertEqual(dense_view.information_gains(), sparse_view.information_gains())
+                self.assertEqual(dense_view.thresholds(), sparse_view.thresholds())
+                for groups, dense_groups in [(sparse_view.group_by_feature("rare"),
+                                              dense_view.group_by_feature("rare")),
+                                             (sparse_view.group_by_threshold("amount", 40.0),
+                                              dense_view.group_by_threshold("amount", 40.0))]:
+                    self.assertEqual(list(dense_groups), list(groups))
+                    for value, group in groups.items():
+                        self.assertEqual(dense_groups[value].rows, group.rows)
+                        self.assertEqual(dense_groups[value].label_counts, group.label_counts)
+                self.assertEqual(DecisionTree().fit(dense_view).branches(), DecisionTree().fit(sparse_view).branches())
+            del dense, dense_view, dense_groups  # column files are memory-mapped
+
+
+if __name__ == "__main__":
+    unittest.main()
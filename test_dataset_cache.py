@@ -0,0 +1,118 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import utils
+from dataset import Dataset
+from dataset_cache import DatasetCache
+
+
+class DatasetCacheTest(unittest.TestCase):
+    """Checks when the cached datasets are used, parsed again and evicted."""
+
+    def setUp(self) -> None:
+        self.directory: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.cache: DatasetCache = DatasetCache(os.path.join(self.directory.name, "cache"))
+        self.convert_dataset: mock.MagicMock = mock.MagicMock(wraps=utils.convert_dataset)
+        patcher = mock.patch("utils.convert_dataset", self.convert_dataset)  # counts the parses of the files
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def write(self, name: str, content: str) -> str:
+        """Writes a csv file into the temporary directory of the test.
+
+        :param name: name of the file
+        :param content: content of the file
+        :return: path of the file
+        """
+
+        path: str = os.path.join(self.directory.name, name)
+        with open(path, "w") as csv_file:
+            csv_file.write(content)
+        return path
+
+    def assertExamples(self, expected: list[tuple[list[str], str]], dataset: Dataset) -> None:
+        self.assertEqual(expected, [(list(example.values()), label) for example, label in dataset])
+
+    def test_hits(self) -> None:
+        """Entry is used for the same file and options, even after the file was touched, but not once it changed."""
+
+        path: str = self.write("dataset.csv", "outlook,play\nsunny,no\nrain,yes\n")
+        self.assertExamples([(["sunny"], "no"), (["rain"], "yes")], self.cache.load(path))
+        self.assertExamples([(["sunny"], "no"), (["rain"], "yes")], self.cache.load(path))
+        self.assertEqual(1, self.convert_dataset.call_count)
+
+        stat: os.stat_result = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertTrue(self.cache.load(path).memory_mapped)
+        self.assertEqual(1, self.convert_dataset.call_count)
+        self.assertEqual([stat.st_mtime_ns + 10 ** 9], [entry["mtime_ns"] for entry in self.cache.entries().values()])
+
+        self.write("dataset.csv", "outlook,play\nsunny,no\nfog,yes\n")  # same size
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10 ** 9))
+        self.assertExamples([(["sunny"], "no"), (["fog"], "yes")], self.cache.load(path))
+        self.assertEqual(2, self.convert_dataset.call_count)
+        self.assertEqual(1, len(self.cache.entries()))
+
+        self.cache.load(path, chunk_size=1)  # numeric features are detected within the first chunk
+        self.cache.load(path, detect_numeric=True)
+        self.assertEqual((4, 3), (self.convert_dataset.call_count, len(self.cache.entries())))
+
+    def test_changed_while_parsed(self) -> None:
+        """File which changes while it is parsed is parsed again without being cached."""
+
+        path: str = self.write("dataset.csv", "outlook,play\nsunny,no\n")
+
+        def convert_and_append(*args, **kwargs) -> int:
+            rows: int = self.convert_dataset(*args, **kwargs)
+            with open(path, "a") as csv_file:
+                csv_file.write("rain,yes\n")
+            return rows
+
+        with mock.patch("utils.convert_dataset", convert_and_append):
+            dataset: Dataset = self.cache.load(path)
+        self.assertExamples([(["sunny"], "no"), (["rain"], "yes")], dataset)
+        self.assertFalse(dataset.memory_mapped)
+        self.assertEqual([], os.listdir(os.path.join(self.directory.name, "cache")))  # nor left half-written
+
+    def test_eviction(self) -> None:
+        """Least recently used entries are evicted once the entries exceed the size of the cache."""
+
+        paths: list[str] = [self.write(f"dataset{i}.csv", f"outlook,play\nsunny,no\nrain,yes{i}\n") for i in range(4)]
+        for path in paths[:3]:
+            self.cache.load(path)
+            time.sleep(0.02)  # modification times order the uses of the entries
+        entry_bytes: int = max(entry["bytes"] for entry in self.cache.entries().values())
+        self.cache.load(paths[0])
+        time.sleep(0.02)
+
+        cache: DatasetCache = DatasetCache(os.path.join(self.directory.name, "cache"), 3 * entry_bytes)
+        cache.load(paths[3])
+        self.assertEqual([paths[2], paths[0], paths[3]], [entry["path"] for entry in cache.entries().values()])
+        cache = DatasetCache(os.path.join(self.directory.name, "cache"), 0)
+        cache.load(paths[1])
+        self.assertEqual([paths[1]], [entry["path"] for entry in cache.entries().values()])
+
+    def test_invalidate(self) -> None:
+        first: str = self.write("first.csv", "outlook,play\nsunny,no\n")
+        second: str = self.write("second.csv", "outlook,play\nrain,yes\n")
+        for chunk_size in (1, 2):
+            self.cache.load(first, chunk_size)
+        self.cache.load(second)
+
+        self.assertEqual(2, self.cache.invalidate(first))
+        self.assertEqual([os.path.abspath(second)], [entry["path"] for entry in self.cache.entries().values()])
+        self.assertEqual(0, self.cache.invalidate(first))
+        self.assertEqual(1, self.cache.invalidate())
+        self.assertEqual({}, self.cache.entries())
+        self.cache.load(first)
+        self.assertEqual(4, self.convert_dataset.call_count)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,262 @@
+import os
+import random
+import tempfile
+import unittest
+from typing import Optional
+
+import utils
+from dataset import Dataset
+from decision_tree import DecisionTree
+from metrics import Metrics
+
+_FEATURES: list[str] = ["outlook", "wind", "humidity", "temperature", "play"]
+_NUMERIC_FEATURES: list[str] = ["temperature"]
+
+
+def _random_examples(generator: random.Random, n_examples: int) -> list[tuple[list[str], str]]:
+    """Draws random examples of the test features, with some of the values missing.
+
+    Labels depend on the features with some noise, so the fitted trees have several levels.
+
+    :param generator: random number generator
+    :param n_examples: number of examples
+    :return: list of (feature values, label) pairs
+    """
+
+    examples: list[tuple[list[str], str]] = []
+    for _ in range(n_examples):
+        outlook: str = generator.choice(["sunny", "overcast", "rain", "fog"])
+        wind: str = generator.choice(["weak", "strong"])
+        humidity: str = generator.choice(["low", "normal", "high"])
+        temperature: int = generator.randint(-10, 35)
+        if outlook == "overcast" or generator.random() < 0.1:
+            label: str = generator.choice(["yes", "no", "maybe"])
+        elif outlook == "sunny":
+            label = "yes" if humidity != "high" and temperature > 10 else "no"
+        else:
+            label = "yes" if wind == "weak" else "no"
+        values: list[str] = [outlook, wind, humidity, str(temperature)]
+        if generator.random() < 0.1:
+            values[generator.randrange(len(values))] = ""
+        examples.append((values, label))
+
+    return examples
+
+
+def _dataset(examples: list[tuple[list[str], str]]) -> Dataset:
+    """Creates a dataset of the test features holding the given examples.
+
+    :param examples: list of (feature values, label) pairs
+    :return: dataset of the examples
+    """
+
+    dataset: Dataset = Dataset(_FEATURES, _NUMERIC_FEATURES)
+    for values, label in examples:
+        dataset.add_example(values, label)
+    return dataset
+
+
+class DecisionTreeTest(unittest.TestCase):
+    """Checks that the different ways of fitting and using a decision tree agree with each other."""
+
+    def setUp(self) -> None:
+        self.generator: random.Random = random.Random(1)
+
+    def test_parallel_fit(self) -> None:
+        """Trees whose subtrees are built by worker processes are the same as the ones built serially."""
+
+        for _ in range(3):
+            data: Dataset = _dataset(_random_examples(self.generator, self.generator.randint(50, 400)))
+            max_depth: Optional[int] = self.generator.choice([None, 1, 2, 3])
+            parallel: DecisionTree = DecisionTree(max_depth, n_jobs=2, parallel_threshold=20)
+            self.assertEqual(DecisionTree(max_depth).fit(data).branches(), parallel.fit(data).branches())
+
+    def test_column_files(self) -> None:
+        """Trees fitted on the memory-mapped column files are the same as the ones fitted in memory."""
+
+        examples: list[tuple[list[str], str]] = _random_examples(self.generator, 500)
+        with tempfile.TemporaryDirectory() as directory:
+            path: str = os.path.join(directory, "train.csv")
+            with open(path, "w") as dataset_file:
+                dataset_file.write(",".join(_FEATURES) + "\n")
+                dataset_file.writelines(",".join(values + [label]) + "\n" for values, label in examples)
+            columns_directory: str = os.path.join(directory, "columns")
+            self.assertEqual(500, utils.convert_dataset(path, columns_directory, chunk_size=64,
+                                                        numeric_features=_NUMERIC_FEATURES))
+            on_disk: Dataset = Dataset.from_column_files(columns_directory)
+            in_memory: Dataset = utils.load_dataset(path, numeric_features=_NUMERIC_FEATURES)
+            self.assertEqual(list(in_memory), list(on_disk))
+            for max_depth in (None, 2):
+                self.assertEqual(DecisionTree(max_depth).fit(in_memory).branches(),
+                                 DecisionTree(max_depth).fit(columns_directory).branches())
+            with self.assertRaises(ValueError):
+                on_disk.add_example(examples[0][0], examples[0][1])
+            del on_disk  # column files are memory-mapped
+
+    def test_drawn_features(self) -> None:
+        """Trees with the features and the samples drawn at random depend on the seed, but not on the processes."""
+
+        data: Dataset = _dataset(_random_examples(self.generator, 600))
+        for parameters in ({"max_features": 2}, {"max_features": 1, "approximate_threshold": 100, "sample_size": 50}):
+            serial: DecisionTree = DecisionTree(seed=7, **parameters).fit(data)
+            self.assertEqual(serial.branches(), serial.fit(data).branches())
+            for parallel_threshold in (20, 200):
+                parallel: DecisionTree = DecisionTree(seed=7, n_jobs=2, parallel_threshold=parallel_threshold,
+                                                      **parameters)
+                self.assertEqual(serial.branches(), parallel.fit(data).branches())
+                self.assertEqual(serial.approximation_statistics, parallel.approximation_statistics)
+            self.assertNotEqual(serial.branches(), DecisionTree(seed=8, **parameters).fit(data).branches())
+
+    def test_approximate_splits(self) -> None:
+        """Features of the large nodes are chosen on a sample, unless the best ones are tied, and the fallbacks to
+        all the examples are counted."""
+
+        copied: Dataset = Dataset(["a", "b", "noise", "label"])  # b is a copy of a, so their gains are tied
+        dominant: Dataset = Dataset(["a", "noise", "label"])
+        single: Dataset = Dataset(["a", "label"])
+        for _ in range(400):
+            value: str = self.generator.choice("xyz")
+            noise: str = self.generator.choice("uv")
+            label: str = "p" if value == "x" else "q"
+            copied.add_example([value, value, noise], label)
+            dominant.add_example([value, noise], label)
+            single.add_example([value], label)
+        parameters: dict = {"approximate_threshold": 100, "sample_size": 50, "seed": 1}
+
+        approximate: DecisionTree = DecisionTree(**parameters).fit(copied)
+        self.assertEqual(DecisionTree().fit(copied).branches(), approximate.branches())
+        self.assertEqual({"sampled_nodes": 1, "fallbacks": 1}, approximate.approximation_statistics)
+        for data in (dominant, single):
+            approximate = DecisionTree(**parameters).fit(data)
+            self.assertEqual(DecisionTree().fit(data).branches(), approximate.branches())
+            self.assertEqual({"sampled_nodes": 1, "fallbacks": 0}, approximate.approximation_statistics)
+        self.assertEqual({"sampled_nodes": 0, "fallbacks": 0},
+                         DecisionTree(approximate_threshold=1000).fit(copied).approximation_statistics)
+        self.assertEqual({"sampled_nodes": 0, "fallbacks": 0}, DecisionTree().fit(copied).approximation_statistics)
+
+        with self.assertRaises(ValueError):
+            DecisionTree(approximate_threshold=100, sample_size=1)
+        with self.assertRaises(ValueError):
+            DecisionTree(approximate_threshold=100, delta=1.0)
+
+    def test_partial_fit(self) -> None:
+        """Tree updated by partial fits is the same as the one fitted on all the examples at once, and the datasets
+        of the partial fits are left unchanged."""
+
+        for _ in range(3):
+            examples: list[tuple[list[str], str]] = _random_examples(self.generator, self.generator.randint(50, 400))
+            max_depth: Optional[int] = self.generator.choice([None, 1, 2, 3])
+            chunk_size: int = self.generator.randint(10, 100)
+            first_chunk: Dataset = _dataset(examples[:chunk_size])
+            incremental: DecisionTree = DecisionTree(max_depth, incremental=True).fit(first_chunk)
+            for start in range(chunk_size, len(examples), chunk_size):
+                incremental.partial_fit(_dataset(examples[start:start + chunk_size]))
+            self.assertEqual(DecisionTree(max_depth).fit(_dataset(examples)).branches(), incremental.branches())
+            self.assertEqual(min(chunk_size, len(examples)), len(first_chunk))
+
+        with self.assertRaises(ValueError):
+            DecisionTree().fit(first_chunk).partial_fit(first_chunk)
+        with self.assertRaises(ValueError):
+            DecisionTree(incremental=True, max_features=2)
+
+    def test_predict_batch(self) -> None:
+        """Batch predictions of the compiled tree are the same as the predictions of the tree itself."""
+
+        for _ in range(3):
+            decision_tree: DecisionTree = DecisionTree(self.generator.choice([None, 0, 1, 2]))
+            decision_tree.fit(_dataset(_random_examples(self.generator, 300)))
+            test_examples: list[tuple[list[str], str]] = _random_examples(self.generator, 200)
+            test_examples.append((["snow", "calm", "", "100"], "yes"))  # unseen values
+            test_set: Dataset = _dataset(test_examples)
+            self.assertEqual(decision_tree.predict(test_set)["predictions"], decision_tree.predict_batch(test_set))
+
+    def test_numeric_values_of_categorical_features(self) -> None:
+        """Numbers of a feature the tree splits as categorical are predicted in the same way by all the methods."""
+
+        train_set: Dataset = Dataset(["t", "play"])
+        test_set: Dataset = Dataset(["t", "play"], ["t"])
+        for value, label in [("1", "no"), ("2", "yes"), ("3", "no"), ("2.5", "yes"), ("", "yes")]:
+            train_set.add_example([value], label)
+            test_set.add_example([value], label)
+        test_set.add_example(["4"], "no")  # unseen value
+        decision_tree: DecisionTree = DecisionTree().fit(train_set)
+
+        expected: list[str] = ["no", "yes", "no", "yes", "no", "yes"]
+        self.assertEqual(expected, decision_tree.predict(test_set)["predictions"])
+        self.assertEqual(expected, decision_tree.predict_batch(test_set))
+        self.assertEqual(expected, list(decision_tree.predict_stream([test_set])))
+
+    def test_evaluate_stream(self) -> None:
+        """Metrics accumulated over a stream of datasets are the ones of the predictions of all the examples."""
+
+        decision_tree: DecisionTree = DecisionTree(2).fit(_dataset(_random_examples(self.generator, 300)))
+        examples: list[tuple[list[str], str]] = _random_examples(self.generator, 250)
+        metrics: Metrics = decision_tree.evaluate_stream(_dataset(examples[start:start + 60])
+                                                         for start in range(0, len(examples), 60))
+        test_set: Dataset = _dataset(examples)
+        prediction_params: dict = decision_tree.predict(test_set)
+        self.assertEqual(250, metrics.total)
+        self.assertEqual(prediction_params["accuracy"], metrics.accuracy)
+        self.assertEqual(prediction_params["confusion_matrix"].matrix, metrics.matrix)
+
+    def test_predict_depths(self) -> None:
+        """Predictions of a truncated tree are the ones of the tree fitted with the lower depth limit."""
+
+        for max_depth in (None, 3):
+            data: Dataset = _dataset(_random_examples(self.generator, 300))
+            test_set: Dataset = _dataset(_random_examples(self.generator, 200))
+            depths: list[Optional[int]] = [0, 1, 2, 3] + ([None] if max_depth is None else [])
+            decision_tree: DecisionTree = DecisionTree(max_depth).fit(data)
+            predictions: dict[Optional[int], list[str]] = decision_tree.predict_depths(test_set, depths)
+            self.assertEqual(depths, list(predictions))
+            for depth in depths:
+                self.assertEqual(DecisionTree(depth).fit(data).predict(test_set)["predictions"], predictions[depth])
+
+        with self.assertRaises(ValueError):
+            decision_tree.predict_depths(test_set, [4])
+
+    def test_memory_footprint(self) -> None:
+        """Footprint counts every node and leaf of the tree, and the training state only of the incremental trees."""
+
+        data: Dataset = _dataset(_random_examples(self.generator, 300))
+        decision_tree: DecisionTree = DecisionTree(3).fit(data)
+        footprint: dict[str, int] = decision_tree.memory_footprint()
+        self.assertEqual(len(decision_tree.branches().split("\n")), footprint["leaves"])
+        self.assertEqual(0, footprint["training_state_bytes"])
+        self.assertEqual(sum(footprint[name] for name in ("tree_bytes", "string_bytes", "compiled_bytes",
+                                                          "training_state_bytes")), footprint["total_bytes"])
+        self.assertGreater(decision_tree.compile().memory_footprint(), 0)
+        self.assertGreater(decision_tree.memory_footprint()["compiled_bytes"], 0)
+
+        incremental: dict[str, int] = DecisionTree(3, incremental=True).fit(data).memory_footprint()
+        self.assertEqual((footprint["nodes"], footprint["leaves"]), (incremental["nodes"], incremental["leaves"]))
+        self.assertGreater(incremental["training_state_bytes"], 0)
+
+    def test_save_load(self) -> None:
+        """Tree loaded from a model file formats and predicts the same as the saved one."""
+
+        for max_depth in (None, 0, 2):
+            decision_tree: DecisionTree = DecisionTree(max_depth).fit(_dataset(_random_examples(self.generator, 300)))
+            test_set: Dataset = _dataset(_random_examples(self.generator, 200))
+            with tempfile.TemporaryDirectory() as directory:
+                path: str = os.path.join(directory, "model.bin")
+                decision_tree.save(path)
+                loaded: DecisionTree = DecisionTree.load(path)
+                self.assertEqual(decision_tree.branches(), loaded.branches())
+                self.assertEqual(decision_tree.predict(test_set)["predictions"],
+                                 loaded.predict(test_set)["predictions"])
+                with self.assertRaises(ValueError):
+                    loaded.partial_fit(test_set)
+                del loaded  # model file is memory-mapped
+
+    def test_load_corrupted(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path: str = os.path.join(directory, "model.bin")
+            with open(path, "wb") as model_file:
+                model_file.write(b"not a model")
+            with self.assertRaises(ValueError):
+                DecisionTree.load(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import random
+import unittest
+from typing import Optional
+
+import distributed
+from dataset import Dataset
+from decision_tree import DecisionTree
+
+
+def _random_dataset(generator: random.Random, n_examples: int) -> Dataset:
+    """Draws a random dataset with a categorical and a numeric feature, some of the values missing and some of the
+    examples weighted.
+
+    :param generator: random number generator
+    :param n_examples: number of examples
+    :return: dataset of the examples
+    """
+
+    dataset: Dataset = Dataset(["outlook", "wind", "temperature", "play"], ["temperature"])
+    for _ in range(n_examples):
+        outlook: str = generator.choice(["sunny", "overcast", "rain"])
+        wind: str = generator.choice(["weak", "strong"])
+        temperature: int = generator.randint(-10, 35)
+        label: str = "yes" if (outlook == "sunny") == (temperature > 15) or wind == "weak" else "no"
+        if generator.random() < 0.1:
+            label = generator.choice(["yes", "no", "maybe"])
+        values: list[str] = [outlook, wind, str(temperature)]
+        if generator.random() < 0.1:
+            values[generator.randrange(len(values))] = ""
+        dataset.add_example(values, label, generator.choice([1, 1, 1, 2, 3]))
+    return dataset
+
+
+class DistributedTest(unittest.TestCase):
+    """Checks that the trees fitted by the training workers are the ones fitted within a single process."""
+
+    def setUp(self) -> None:
+        self.generator: random.Random = random.Random(1)
+
+    def test_fit(self) -> None:
+        for unix_sockets in (False, True, False):
+            data: Dataset = _random_dataset(self.generator, self.generator.randint(50, 400))
+            max_depth: Optional[int] = self.generator.choice([None, 1, 2])
+            processes, addresses = distributed.start_local_workers(data, self.generator.randint(1, 3), unix_sockets)
+            try:
+                self.assertEqual(DecisionTree(max_depth).fit(data).branches(),
+                                 DecisionTree(max_depth, workers=addresses).fit().branches())
+            finally:
+                distributed.stop_workers(addresses)
+                for process in processes:
+                    process.join(5)
+
+    def test_invalid_parameters(self) -> None:
+        with self.assertRaises(ValueError):
+            distributed.start_local_workers(_random_dataset(self.generator, 10), 0)
+        with self.assertRaises(ValueError):
+            DecisionTree(workers=[("127.0.0.1", 0)], max_features=1)
+        with self.assertRaises(ValueError):
+            DecisionTree(workers=[("127.0.0.1", 0)], approximate_threshold=100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+from confusion_matrix import ConfusionMatrix
+from metrics import Metrics
+
+# rows of the confusion matrix are the expected labels a, b and c, and its columns are the actual ones:
+# a: 2 1 0
+# b: 0 1 1
+# c: 1 1 2
+_EXPECTED: list[str] = ["a", "a", "a", "b", "b", "c", "c", "c", "c"]
+_ACTUAL: list[str] = ["a", "b", "a", "b", "c", "c", "a", "c", "b"]
+_MATRIX: list[list[int]] = [[2, 1, 0], [0, 1, 1], [1, 1, 2]]
+
+
+class MetricsTest(unittest.TestCase):
+    """Checks the metrics against a confusion matrix counted by hand."""
+
+    def assertScoresEqual(self, expected: dict[str, float], actual: dict[str, float]) -> None:
+        self.assertEqual(list(expected), list(actual))
+        for label, score in expected.items():
+            self.assertAlmostEqual(score, actual[label], msg=label)
+
+    def test_scores(self) -> None:
+        metrics: Metrics = Metrics().update(_EXPECTED, _ACTUAL)
+
+        self.assertEqual((["a", "b", "c"], _MATRIX), (metrics.labels, metrics.matrix))
+        self.assertEqual((9, 5), (metrics.total, metrics.correct))
+        self.assertAlmostEqual(5 / 9, metrics.accuracy)
+        self.assertScoresEqual({"a": 2 / 3, "b": 1 / 3, "c": 2 / 3}, metrics.precision())
+        self.assertScoresEqual({"a": 2 / 3, "b": 1 / 2, "c": 1 / 2}, metrics.recall())
+        self.assertScoresEqual({"a": 2 / 3, "b": 2 / 5, "c": 4 / 7}, metrics.f1())
+        self.assertScoresEqual({"precision": 5 / 9, "recall": 5 / 9, "f1": (2 / 3 + 2 / 5 + 4 / 7) / 3},
+                               metrics.macro_average())
+        self.assertScoresEqual({"precision": 5 / 9, "recall": 5 / 9, "f1": 5 / 9}, metrics.micro_average())
+        self.assertEqual(_MATRIX, metrics.confusion_matrix().matrix)
+
+    def test_batches(self) -> None:
+        """Metrics accumulated over batches, or with weights, are the ones of all the examples at once."""
+
+        metrics: Metrics = Metrics()
+        for start in range(0, len(_EXPECTED), 4):
+            metrics.update(_EXPECTED[start:start + 4], _ACTUAL[start:start + 4])
+            self.assertEqual(min(start + 4, len(_EXPECTED)), metrics.total)
+        self.assertEqual(Metrics().update(_EXPECTED, _ACTUAL).to_dict(), metrics.to_dict())
+
+        weighted: Metrics = Metrics().update(["a", "b", "a"], ["a", "b", "b"], [3, 1, 2])
+        self.assertEqual(Metrics().update(["a"] * 5 + ["b"], ["a"] * 3 + ["b"] * 3).to_dict(), weighted.to_dict())
+        with self.assertRaises(ValueError):
+            metrics.update(["a"], [])
+
+    def test_label_space(self) -> None:
+        """Labels that never occur are a part of the matrix, and score 0."""
+
+        metrics: Metrics = Metrics({"d"}).update(_EXPECTED, _ACTUAL)
+        self.assertEqual([row + [0] for row in _MATRIX] + [[0, 0, 0, 0]], metrics.matrix)
+        self.assertEqual(0.0, metrics.f1()["d"])
+        self.assertAlmostEqual(5 / 12, metrics.macro_average()["precision"])
+        with self.assertRaises(ValueError):
+            _ = Metrics().accuracy
+
+
+class ConfusionMatrixTest(unittest.TestCase):
+
+    def test_counts(self) -> None:
+        confusion_matrix: ConfusionMatrix = ConfusionMatrix({"a", "b", "c"}, _EXPECTED, _ACTUAL)
+        self.assertEqual(_MATRIX, confusion_matrix.matrix)
+        self.assertEqual("2 1 0\n0 1 1\n1 1 2", str(confusion_matrix))
+        self.assertEqual([[5, 2], [0, 1]], ConfusionMatrix({"a", "b"}, ["a", "b", "a"], ["a", "b", "b"],
+                                                           [5, 1, 2]).matrix)
+        with self.assertRaises(ValueError):
+            ConfusionMatrix({"a", "b"}, _EXPECTED, _ACTUAL)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+from array import array
+from typing import Optional
+
+import benchmark
+import model_selection
+import utils
+from dataset import Dataset
+from decision_tree import DecisionTree
+from metrics import Metrics
+
+
+class ModelSelectionTest(unittest.TestCase):
+    """Checks the cross-validation of the depth limits."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path: str = os.path.join(directory, "dataset.csv")
+            benchmark.generate_dataset(path, 300, 5, 3, 3, noise=0.2, seed=3)
+            cls.dataset: Dataset = utils.load_dataset(path)
+
+    def test_split_folds(self) -> None:
+        """Every example is in exactly one fold, and the folds differ in size by one example at most."""
+
+        for seed in (None, 0, 1):
+            folds: list[array] = model_selection.split_folds(self.dataset, 7, seed)
+            self.assertEqual(sorted(self.dataset.rows), sorted(row for rows in folds for row in rows))
+            self.assertEqual({42, 43}, set(map(len, folds)))
+        self.assertNotEqual(model_selection.split_folds(self.dataset, 7, 0),
+                            model_selection.split_folds(self.dataset, 7, 1))
+        for folds in (1, 301):
+            with self.assertRaises(ValueError):
+                model_selection.split_folds(self.dataset, folds)
+
+    def test_cross_validate(self) -> None:
+        """Metrics of every fold are the ones of a tree fitted with the depth limit on the other folds."""
+
+        depths: list[Optional[int]] = [2, 0, None, 1]
+        results: dict[Optional[int], list[Metrics]] = model_selection.cross_validate(self.dataset, depths, 4, seed=5)
+        self.assertEqual(depths, list(results))
+        folds: list[array] = model_selection.split_folds(self.dataset, 4, 5)
+        for fold, test_rows in enumerate(folds):
+            train_set: Dataset = self.dataset.subset(array("I", (row for other, rows in enumerate(folds)
+                                                                 if other != fold for row in rows)))
+            test_set: Dataset = self.dataset.subset(test_rows)
+            for depth in depths:
+                predictions: dict = DecisionTree(depth).fit(train_set).predict(test_set)
+                self.assertEqual(predictions["confusion_matrix"].matrix, results[depth][fold].matrix)
+                self.assertEqual(predictions["accuracy"], results[depth][fold].accuracy)
+
+        parallel: dict[Optional[int], list[Metrics]] = model_selection.cross_validate(self.dataset, depths, 4,
+                                                                                      n_jobs=2, seed=5)
+        self.assertEqual({depth: [metrics.to_dict() for metrics in fold_metrics]
+                          for depth, fold_metrics in results.items()},
+                         {depth: [metrics.to_dict() for metrics in fold_metrics]
+                          for depth, fold_metrics in parallel.items()})
+
+    def test_best_depth(self) -> None:
+        """Depth limit with the highest mean accuracy is selected, and ties go to the lowest one."""
+
+        def metrics(*accuracies: float) -> list[Metrics]:
+            return [Metrics().update(["a"] * 4, ["a"] * int(accuracy * 4) + ["b"] * (4 - int(accuracy * 4)))
+                    for accuracy in accuracies]
+
+        results: dict[Optional[int], list[Metrics]] = {None: metrics(1, 0.5), 3: metrics(0.75, 0.75),
+                                                       1: metrics(0.5, 0.75)}
+        self.assertEqual({None: 0.75, 3: 0.75, 1: 0.625}, model_selection.mean_accuracies(results))
+        self.assertEqual(3, model_selection.best_depth(results))
+        self.assertIsNone(model_selection.best_depth({None: metrics(1), 2: metrics(0.75)}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import pickle
+import sys
+import unittest
+
+import utils
+from node import Leaf, Node
+
+
+class NodeTest(unittest.TestCase):
+    """Checks the pickling of the nodes."""
+
+    def test_pickle_deep_tree(self) -> None:
+        """Trees deeper than the recursion limit are pickled with all their nodes, thresholds and default branches."""
+
+        root: Node = Node("x", "a", 0.5, "<=0.5")
+        node: Node = root
+        for depth in range(3 * sys.getrecursionlimit()):
+            node.add_child("<=" + str(depth + 0.5), Leaf("a" if depth % 2 else "b"))
+            child: Node = Node("x", "b", depth + 1.5, ">" + str(depth + 1.5))
+            node.add_child(">" + str(depth + 0.5), child)
+            if depth % 2:
+                node.compact()
+            node = child
+        node.add_child("<=0.5", Leaf("c"))
+
+        loaded: Node = pickle.loads(pickle.dumps(root))
+        self.assertEqual(utils.format_branches(root), utils.format_branches(loaded))
+        while isinstance(loaded, Node):
+            self.assertEqual((root.feature, root.most_frequent_label, root.threshold, root.default_branch),
+                             (loaded.feature, loaded.most_frequent_label, loaded.threshold, loaded.default_branch))
+            root, loaded = list(root.children())[-1][1], list(loaded.children())[-1][1]
+        self.assertEqual("c", loaded.label)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import unittest
+
+from compiled_tree import CompiledTree
+from dataset import Dataset
+from decision_tree import DecisionTree
+from prediction_server import PredictionServer
+
+# "None" is a value of its own, and the missing outlook follows the default branch of the larger "sunny" group
+_EXAMPLES: list[tuple[list[str], str]] = [(["sunny", "weak"], "no"), (["sunny", "strong"], "no"),
+                                          (["sunny", "weak"], "no"), (["rain", "weak"], "yes"),
+                                          (["rain", "strong"], "yes"), (["None", "weak"], "maybe")]
+
+
+def _tree() -> CompiledTree:
+    """Fits the compiled tree of the test examples.
+
+    :return: compiled decision tree
+    """
+
+    dataset: Dataset = Dataset(["outlook", "wind", "play"])
+    for values, label in _EXAMPLES:
+        dataset.add_example(values, label)
+    return DecisionTree().fit(dataset).compile()
+
+
+class PredictionServerTest(unittest.TestCase):
+    """Checks the batching of the requests and the responses of the prediction server."""
+
+    def test_batching(self) -> None:
+        """Concurrent requests are classified in batches of at most the maximum size, and answered in order."""
+
+        async def predict_all() -> tuple[list[str], dict[str, float]]:
+            server: PredictionServer = PredictionServer(_tree(), max_batch_size=4, max_wait=0.05)
+            examples: list[dict[str, str]] = [{"outlook": outlook} for outlook in ["sunny", "rain", "None"] * 3]
+            labels: list[str] = await asyncio.gather(*(server.predict(example) for example in examples))
+            return labels, server.statistics.to_dict()
+
+        labels, statistics = asyncio.run(predict_all())
+        self.assertEqual(["no", "yes", "maybe"] * 3, labels)
+        self.assertEqual((9, 0, 3, 3.0), (statistics["requests"], statistics["errors"], statistics["batches"],
+                                          statistics["mean_batch_size"]))
+
+    def test_missing_values(self) -> None:
+        """Null values and absent features follow the default branches, unlike the "None" values."""
+
+        async def predict_all() -> list[str]:
+            server: PredictionServer = PredictionServer(_tree())
+            return await asyncio.gather(server.predict({"outlook": None}), server.predict({"wind": "weak"}),
+                                        server.predict({"outlook": "None"}))
+
+        self.assertEqual(["no", "no", "maybe"], asyncio.run(predict_all()))
+
+    def test_protocol(self) -> None:
+        """Pipelined request lines of a connection are answered in order, including the errors and the statistics."""
+
+        async def exchange(lines: list[bytes]) -> list[dict]:
+            server: asyncio.AbstractServer = await PredictionServer(_tree(), max_wait=0.01).start(port=0)
+            async with server:
+                reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+                writer.write(b"".join(line + b"\n" for line in lines))
+                await writer.drain()
+                responses: list[dict] = [json.loads(await reader.readline()) for _ in lines]
+                writer.close()
+                await writer.wait_closed()
+            return responses
+
+        responses: list[dict] = asyncio.run(exchange([b'{"outlook": "rain"}', b"not json", b'["rain"]',
+                                                      b'{"outlook": null, "wind": "strong"}', b"STATS"]))
+        self.assertEqual({"label": "yes"}, responses[0])
+        self.assertTrue(responses[1]["error"].startswith("Invalid json"))
+        self.assertIn("error", responses[2])
+        self.assertEqual({"label": "no"}, responses[3])
+        self.assertEqual(0, responses[4]["errors"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import random
+import tempfile
+import unittest
+
+import benchmark
+import utils
+from dataset import Dataset
+from decision_tree import DecisionTree
+from random_forest import RandomForest
+
+
+class RandomForestTest(unittest.TestCase):
+    """Checks the fitting of the ensemble and its votes."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path: str = os.path.join(directory, "dataset.csv")
+            benchmark.generate_dataset(path, 400, 6, 3, 3, noise=0.2, seed=5)
+            cls.dataset: Dataset = utils.load_dataset(path)
+            benchmark.generate_dataset(path, 200, 6, 3, 3, noise=0.2, seed=6)
+            cls.test_set: Dataset = utils.load_dataset(path)
+
+    def test_determinism(self) -> None:
+        """Ensembles fitted with the same seed are the same, whether they are fitted serially or in parallel."""
+
+        forest: RandomForest = RandomForest(n_trees=5, max_depth=4, seed=1).fit(self.dataset)
+        self.assertEqual(5, len(forest.trees))
+        self.assertEqual(forest.branches(), RandomForest(n_trees=5, max_depth=4, seed=1).fit(self.dataset).branches())
+        parallel: RandomForest = RandomForest(n_trees=5, max_depth=4, n_jobs=2, seed=1).fit(self.dataset)
+        self.assertEqual(forest.branches(), parallel.branches())
+        self.assertEqual(forest.predict_batch(self.test_set), parallel.predict_batch(self.test_set))
+        self.assertNotEqual(forest.branches(),
+                            RandomForest(n_trees=5, max_depth=4, seed=2).fit(self.dataset).branches())
+
+    def test_single_tree(self) -> None:
+        """Ensemble of a single tree fitted on the whole dataset with all the features is that tree."""
+
+        forest: RandomForest = RandomForest(n_trees=1, max_features=None, bootstrap=False).fit(self.dataset)
+        decision_tree: DecisionTree = DecisionTree().fit(self.dataset)
+        self.assertEqual("[TREE 1]:\n" + decision_tree.branches(), forest.branches())
+        prediction_params: dict = forest.predict(self.test_set)
+        expected: dict = decision_tree.predict(self.test_set)
+        self.assertEqual(expected["predictions"], prediction_params["predictions"])
+        self.assertEqual(expected["accuracy"], prediction_params["accuracy"])
+        self.assertEqual(expected["confusion_matrix"].matrix, prediction_params["confusion_matrix"].matrix)
+
+    def test_weighted_bootstrap(self) -> None:
+        """Weighted examples are drawn as the identical examples they stand for."""
+
+        generator: random.Random = random.Random(4)
+        weighted: Dataset = Dataset(["a", "b", "c", "label"])
+        expanded: Dataset = Dataset(["a", "b", "c", "label"])
+        for _ in range(60):
+            values: list[str] = [generator.choice("xyz") for _ in range(3)]
+            label: str = "p" if values[0] == "x" or generator.random() < 0.2 else "q"
+            weight: int = generator.randint(1, 4)
+            weighted.add_example(values, label, weight)
+            for _ in range(weight):
+                expanded.add_example(values, label)
+
+        forest: RandomForest = RandomForest(n_trees=6, max_features=2, seed=2).fit(weighted)
+        expected: RandomForest = RandomForest(n_trees=6, max_features=2, seed=2).fit(expanded)
+        self.assertEqual(expected.branches(), forest.branches())
+        prediction_params: dict = forest.predict(weighted)
+        expected_params: dict = expected.predict(expanded)
+        self.assertEqual(expected_params["accuracy"], prediction_params["accuracy"])
+        self.assertEqual(expected_params["confusion_matrix"].matrix, prediction_params["confusion_matrix"].matrix)
+
+    def test_votes(self) -> None:
+        """Predicted label of every example is the most probable one, with the ties resolved by the smaller label."""
+
+        forest: RandomForest = RandomForest(n_trees=4, max_depth=3, seed=3).fit(self.dataset)
+        probabilities: list[dict[str, float]] = forest.predict_proba(self.test_set)
+        for label, label_probabilities in zip(forest.predict_batch(self.test_set), probabilities):
+            self.assertAlmostEqual(1.0, sum(label_probabilities.values()))
+            self.assertTrue(all(probability * 4 == round(probability * 4)
+                                for probability in label_probabilities.values()))
+            self.assertEqual(min(label_probabilities, key=lambda value: (-label_probabilities[value], value)), label)
+
+        with self.assertRaises(ValueError):
+            RandomForest().predict_batch(self.test_set)
+        with self.assertRaises(ValueError):
+            RandomForest(n_trees=0)
+        with self.assertRaises(ValueError):
+            RandomForest(max_features="log2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import json
+import unittest
+
+from dataset import Dataset
+from decision_tree import DecisionTree
+from training_observer import NodeRecord, TrainingObserver, TrainingProfiler
+
+_TENNIS: list[str] = ["sunny,hot,high,weak,no", "sunny,hot,high,strong,no", "overcast,hot,high,weak,yes",
+                      "rain,mild,high,weak,yes", "rain,cool,normal,weak,yes", "rain,cool,normal,strong,no",
+                      "overcast,cool,normal,strong,yes", "sunny,mild,high,weak,no", "sunny,cool,normal,weak,yes",
+                      "rain,mild,normal,weak,yes", "sunny,mild,normal,strong,yes", "overcast,mild,high,strong,yes",
+                      "overcast,hot,normal,weak,yes", "rain,mild,high,strong,no"]
+
+
+def _tennis() -> Dataset:
+    """Creates the play tennis dataset.
+
+    :return: dataset of the fourteen examples
+    """
+
+    dataset: Dataset = Dataset(["outlook", "temperature", "humidity", "wind", "play"])
+    for row in _TENNIS:
+        *values, label = row.split(",")
+        dataset.add_example(values, label)
+    return dataset
+
+
+class TrainingProfilerTest(unittest.TestCase):
+    """Checks the records and the reports of the training profiler."""
+
+    def test_records(self) -> None:
+        """Every node and leaf of the fitted tree is recorded once, with the feature it splits by."""
+
+        profiler: TrainingProfiler = TrainingProfiler()
+        decision_tree: DecisionTree = DecisionTree(observer=profiler).fit(_tennis())
+
+        leaves: list[NodeRecord] = [record for record in profiler.nodes if record.feature is None]
+        self.assertEqual(len(decision_tree.branches().split("\n")), len(leaves))
+        self.assertEqual([(0, 14, 4, "outlook")],
+                         [(record.depth, record.rows, record.candidate_features, record.feature)
+                          for record in profiler.nodes if record.depth == 0])
+        self.assertEqual({"outlook": 1, "humidity": 1, "wind": 1},
+                         {feature: statistics["nodes"] for feature, statistics in profiler.features.items()})
+        self.assertEqual(14 + 5 + 5, sum(statistics["rows"] for statistics in profiler.features.values()))
+
+        phases: dict[str, dict[str, float]] = profiler.phases
+        self.assertEqual({"information_gain", "group_by_feature", "most_frequent_label", "other"}, set(phases))
+        self.assertEqual(3, phases["group_by_feature"]["calls"])
+        self.assertEqual(len(profiler.nodes), phases["other"]["calls"])
+
+    def test_reports(self) -> None:
+        profiler: TrainingProfiler = TrainingProfiler()
+        DecisionTree(observer=profiler).fit(_tennis())
+
+        exported: dict = json.loads(profiler.to_json())
+        self.assertEqual({"total_seconds", "phases", "features", "nodes"}, set(exported))
+        self.assertEqual([record.to_dict() for record in profiler.nodes], exported["nodes"])
+        report: list[str] = profiler.report().split("\n")
+        self.assertTrue(report[0].startswith("[TOTAL]: ") and report[0].endswith("3 nodes, 5 leaves, max depth 2"))
+        self.assertIn("[PHASES]:", report)
+        self.assertEqual(3, len(report) - report.index("[FEATURES]:") - 1)
+
+    def test_observer_calls(self) -> None:
+        """Observer is notified of the start and the end of every fit, and of the nodes in between."""
+
+        class Recorder(TrainingObserver):
+            def __init__(self) -> None:
+                self.events: list[str] = []
+
+            def on_fit_start(self) -> None:
+                self.events.append("start")
+
+            def on_node(self, record: NodeRecord) -> None:
+                self.events.append("node")
+
+            def on_fit_end(self) -> None:
+                self.events.append("end")
+
+        recorder: Recorder = Recorder()
+        DecisionTree(max_depth=0, observer=recorder).fit(_tennis()).fit(_tennis())
+        self.assertEqual(["start", "node", "end"] * 2, recorder.events)
+
+
+if __name__ == "__main__":
+    unittest.main()
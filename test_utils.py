@@ -0,0 +1,165 @@
+import io
+import os
+import tempfile
+import unittest
+
+import utils
+from dataset import Dataset
+from decision_tree import DecisionTree
+
+
+class LoaderTest(unittest.TestCase):
+    """Checks the parsing options of the csv loaders."""
+
+    def setUp(self) -> None:
+        self.directory: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def write(self, content: str) -> str:
+        """Writes a csv file into the temporary directory of the test.
+
+        :param content: content of the file
+        :return: path of the file
+        """
+
+        path: str = os.path.join(self.directory.name, "dataset.csv")
+        with open(path, "w") as csv_file:
+            csv_file.write(content)
+        return path
+
+    def test_header(self) -> None:
+        """Features are named by the header, or numbered if there is none."""
+
+        dataset: Dataset = utils.load_dataset(self.write("outlook,wind,play\nsunny,weak,yes\nrain,strong,no\n"))
+        self.assertEqual((["outlook", "wind"], "play"), (dataset.feature_names, dataset.class_label))
+        self.assertEqual(["yes", "no"], dataset.label_sample)
+
+        dataset = utils.load_dataset(self.write("sunny,weak,yes\nrain,strong,no\n"), header=False)
+        self.assertEqual((["feature1", "feature2"], "label"), (dataset.feature_names, dataset.class_label))
+        self.assertEqual([{"feature1": "sunny", "feature2": "weak"}, {"feature1": "rain", "feature2": "strong"}],
+                         [example for example, _ in dataset])
+
+    def test_delimiter(self) -> None:
+        dataset: Dataset = utils.load_dataset(self.write("outlook;wind;play\nsunny;weak,gusty;yes\n"), delimiter=";")
+        self.assertEqual([({"outlook": "sunny", "wind": "weak,gusty"}, "yes")], list(dataset))
+
+    def test_label_and_feature_columns(self) -> None:
+        """Class label is taken from the given column, and only the given features are loaded, in the given order."""
+
+        path: str = self.write("play,outlook,wind,humidity\nyes,sunny,weak,high\nno,rain,strong,low\n")
+        for label_column in ("play", 0, -4):
+            dataset: Dataset = utils.load_dataset(path, label_column=label_column)
+            self.assertEqual((["outlook", "wind", "humidity"], "play"), (dataset.feature_names, dataset.class_label))
+            self.assertEqual(["yes", "no"], dataset.label_sample)
+
+        dataset = utils.load_dataset(path, label_column="play", columns=["humidity", "outlook"])
+        self.assertEqual([({"humidity": "high", "outlook": "sunny"}, "yes"),
+                          ({"humidity": "low", "outlook": "rain"}, "no")], list(dataset))
+        with self.assertRaises(ValueError):
+            utils.load_dataset(path, label_column="temperature")
+        with self.assertRaises(ValueError):
+            utils.load_dataset(path, label_column="play", columns=["play"])
+
+    def test_chunks(self) -> None:
+        """Datasets are the same whatever the size of the chunks they are parsed in."""
+
+        path: str = self.write("outlook,play\n" + "".join(f"v{i % 7},c{i % 3}\n" for i in range(25)) + "\n")
+        expected: list = list(utils.load_dataset(path))
+        self.assertEqual(25, len(expected))
+        for chunk_size in (1, 4, 25, 100):
+            self.assertEqual(expected, list(utils.load_dataset(path, chunk_size=chunk_size)))
+            chunks: list[Dataset] = list(utils.iter_dataset(path, chunk_size=chunk_size))
+            self.assertEqual([min(chunk_size, 25 - start) for start in range(0, 25, chunk_size)],
+                             list(map(len, chunks)))
+            self.assertEqual(expected, [example for chunk in chunks for example in chunk])
+        with self.assertRaises(ValueError):
+            utils.load_dataset(path, chunk_size=0)
+
+    def test_numeric_features(self) -> None:
+        """Features whose known values in the first chunk are all numbers are detected as numeric."""
+
+        path: str = self.write("outlook,temperature,code,play\nsunny,30,1,no\nrain,,2,yes\nfog,12.5,x,yes\n")
+        self.assertEqual(["temperature"], utils.load_dataset(path, detect_numeric=True).numeric_features)
+        self.assertEqual(["temperature", "code"],
+                         next(utils.iter_dataset(path, chunk_size=2, detect_numeric=True)).numeric_features)
+        self.assertEqual(["temperature"], utils.load_dataset(path, numeric_features=["temperature"]).numeric_features)
+        self.assertEqual([], utils.load_dataset(path).numeric_features)
+        with self.assertRaises(ValueError):  # not a number in a later chunk
+            utils.load_dataset(path, chunk_size=2, detect_numeric=True)
+        with self.assertRaises(ValueError):
+            utils.load_dataset(path, numeric_features=["humidity"])
+        for chunk in utils.iter_dataset(path, chunk_size=1, numeric_features=["temperature"]):
+            self.assertEqual(["temperature"], chunk.numeric_features)
+
+    def test_deduplicate(self) -> None:
+        """Identical rows are collapsed into weighted examples, which are fitted and evaluated as the rows."""
+
+        rows: list[str] = ["sunny,30,no", "rain,12,yes", "sunny,30,no", "sunny,18,yes", "rain,12,yes", "sunny,30,no",
+                           "rain,12,no", "sunny,18,yes"]
+        path: str = self.write("outlook,temperature,play\n" + "\n".join(rows) + "\n")
+        for chunk_size in (2, 100):
+            deduplicated: Dataset = utils.load_dataset(path, chunk_size, numeric_features=["temperature"],
+                                                       deduplicate=True)
+            dataset: Dataset = utils.load_dataset(path, numeric_features=["temperature"])
+            self.assertEqual(([3, 2, 2, 1], 8), (deduplicated.weights, deduplicated.total_weight))
+            self.assertEqual(["no", "yes", "yes", "no"], deduplicated.label_sample)
+            self.assertEqual(dataset.label_counts, deduplicated.label_counts)
+            self.assertEqual(dataset.information_gains(), deduplicated.information_gains())
+            self.assertEqual(dataset.thresholds(), deduplicated.thresholds())
+
+            decision_tree: DecisionTree = DecisionTree().fit(dataset)
+            self.assertEqual(decision_tree.branches(), DecisionTree().fit(deduplicated).branches())
+            prediction_params: dict = decision_tree.predict(deduplicated)
+            expected: dict = decision_tree.predict(dataset)
+            self.assertEqual(expected["accuracy"], prediction_params["accuracy"])
+            self.assertEqual(expected["confusion_matrix"].matrix, prediction_params["confusion_matrix"].matrix)
+
+        self.assertEqual([[2, 1], [1, 1, 1], [1, 1]],
+                         [chunk.weights or [1] * len(chunk) for chunk in utils.iter_dataset(path, 3, deduplicate=True)])
+
+    def test_empty_file(self) -> None:
+        dataset: Dataset = utils.load_dataset(self.write("outlook,play\n"))
+        self.assertEqual((["outlook"], 0), (dataset.feature_names, len(dataset)))
+        self.assertEqual([], list(utils.iter_dataset(self.write("outlook,play\n"))))
+
+
+class ReportTest(unittest.TestCase):
+    """Checks the formatting of the branches and of the prediction reports."""
+
+    def setUp(self) -> None:
+        self.dataset: Dataset = Dataset(["outlook", "temperature", "play"], ["temperature"])
+        for values, label in [(["sunny", "30"], "no"), (["sunny", "18"], "yes"), (["rain", "12"], "yes"),
+                              (["overcast", "25"], "yes"), (["rain", "20"], "no"), (["overcast", "15"], "yes")]:
+            self.dataset.add_example(values, label)
+
+    def test_branches(self) -> None:
+        """Branches of all the leaves are formatted in order, lazily or at once, and the latter only once per fit."""
+
+        decision_tree: DecisionTree = DecisionTree().fit(self.dataset)
+        expected: list[str] = ["1:temperature<=19 yes", "1:temperature>19 2:outlook=sunny no",
+                               "1:temperature>19 2:outlook=overcast yes", "1:temperature>19 2:outlook=rain no"]
+        self.assertEqual(expected, list(decision_tree.iter_branches()))
+        self.assertEqual("\n".join(expected), utils.format_branches(decision_tree.root))
+        self.assertIs(decision_tree.branches(), decision_tree.branches())
+        self.assertEqual("yes", DecisionTree(0).fit(self.dataset).branches())
+        with self.assertRaises(ValueError):
+            DecisionTree().branches()
+
+    def test_reports(self) -> None:
+        """Report written piece by piece is the formatted one."""
+
+        decision_tree: DecisionTree = DecisionTree(1).fit(self.dataset)
+        report: str = utils.format_prediction_params(decision_tree.predict(self.dataset))
+        self.assertEqual("[BRANCHES]:\n1:temperature<=19 yes\n1:temperature>19 no\n[PREDICTIONS]: no yes yes no no yes"
+                         "\n[ACCURACY]: 0.83333\n[CONFUSION_MATRIX]: \n2 0\n1 3\n", report)
+        for chunk_size in (1, 2, 100):
+            report_file: io.StringIO = io.StringIO()
+            utils.write_prediction_params(decision_tree.predict(self.dataset, lazy_branches=True), report_file,
+                                          chunk_size)
+            self.assertEqual(report, report_file.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import json
+import time
+from typing import Optional
+
+
+class NodeRecord:
+    """Record of the construction of a single node of the decision tree.
+
+    """
+
+    def __init__(self, depth: int, rows: int, candidate_features: int, feature: Optional[str],
+                 information_gain: Optional[float], seconds: float) -> None:
+        """Creates the record of a constructed node.
+
+        :param depth: depth of the node
+        :param rows: number of examples in the dataset of the node
+        :param candidate_features: number of features the node could split by
+        :param feature: feature the node splits by, or None for leaves
+        :param information_gain: information gain of the chosen feature, or None for leaves
+        :param seconds: time spent constructing the node, not including the construction of its children
+        """
+
+        self.depth: int = depth
+        self.rows: int = rows
+        self.candidate_features: int = candidate_features
+        self.feature: Optional[str] = feature
+        self.information_gain: Optional[float] = information_gain
+        self.seconds: float = seconds
+
+    def to_dict(self) -> dict[str, object]:
+        return {"depth": self.depth, "rows": self.rows, "candidate_features": self.candidate_features,
+                "feature": self.feature, "information_gain": self.information_gain, "seconds": self.seconds}
+
+    def __repr__(self) -> str:
+        return f"NodeRecord({self.to_dict()})"
+
+
+class TrainingObserver:
+    """Interface of an observer of the decision tree training procedure.
+
+    Observer is notified when the training starts and ends, when a node of the tree is constructed, and
+    after each timed phase of the node construction: "information_gain", "group_by_feature" and
+    "most_frequent_label". All the methods do nothing by default.
+
+    """
+
+    def on_fit_start(self) -> None:
+        pass
+
+    def on_node(self, record: NodeRecord) -> None:
+        pass
+
+    def on_phase(self, phase: str, seconds: float) -> None:
+        pass
+
+    def on_fit_end(self) -> None:
+        pass
+
+
+class TrainingProfiler(TrainingObserver):
+    """Observer which collects the records of all the constructed nodes and aggregates the time spent in
+    each phase of the training procedure.
+
+    """
+
+    def __init__(self) -> None:
+        self.__nodes: list[NodeRecord] = []
+        self.__phases: dict[str, list] = {}  # phase -> [calls, seconds]
+        self.__fit_start: Optional[float] = None
+        self.__total_seconds: float = 0
+
+    @property
+    def nodes(self) -> list[NodeRecord]:
+        return self.__nodes
+
+    @property
+    def phases(self) -> dict[str, dict[str, float]]:
+        """Returns the number of calls and the total time of every phase of the training procedure.
+
+        Time spent outside the timed phases, mostly in the tree recursion, is reported as the "other" phase.
+
+        :return: "calls" and "seconds" of every phase, indexed by the phase names
+        """
+
+        phases: dict[str, dict[str, float]] = {phase: {"calls": calls, "seconds": seconds}
+                                               for phase, (calls, seconds) in self.__phases.items()}
+        phases["other"] = {"calls": len(self.__nodes),
+                           "seconds": max(self.__total_seconds - sum(seconds for _, seconds in
+                                                                     self.__phases.values()), 0)}
+        return phases
+
+    @property
+    def features(self) -> dict[str, dict[str, float]]:
+        """Returns the statistics of the nodes that split by each of the features.
+
+        :return: number of "nodes", total number of "rows" and total "seconds" of the nodes, indexed by features
+        """
+
+        features: dict[str, dict[str, float]] = {}
+        for record in self.__nodes:
+            if record.feature is not None:
+                statistics: dict[str, float] = features.setdefault(record.feature,
+                                                                   {"nodes": 0, "rows": 0, "seconds": 0})
+                statistics["nodes"] += 1
+                statistics["rows"] += record.rows
+                statistics["seconds"] += record.seconds
+        return features
+
+    def on_fit_start(self) -> None:
+        self.__fit_start = time.perf_counter()
+
+    def on_node(self, record: NodeRecord) -> None:
+        self.__nodes.append(record)
+
+    def on_phase(self, phase: str, seconds: float) -> None:
+        statistics: list = self.__phases.setdefault(phase, [0, 0])
+        statistics[0] += 1
+        statistics[1] += seconds
+
+    def on_fit_end(self) -> None:
+        self.__total_seconds += time.perf_counter() - self.__fit_start
+        self.__fit_start = None
+
+    def to_json(self) -> str:
+        """Exports the collected statistics as json.
+
+        :return: json object with the total time, the phases, the features and the node records
+        """
+
+        return json.dumps({"total_seconds": self.__total_seconds, "phases": self.phases, "features": self.features,
+                           "nodes": [record.to_dict() for record in self.__nodes]})
+
+    def report(self) -> str:
+        """Creates a human-readable report of the collected statistics.
+
+        :return: report with the total time, time spent in each phase, and the statistics of each feature,
+            ordered by the time spent in the nodes splitting by the feature
+        """
+
+        leaves: int = sum(1 for record in self.__nodes if record.feature is None)
+        lines: list[str] = [f"[TOTAL]: {self.__total_seconds:.5f}s, {len(self.__nodes) - leaves} nodes, "
+                            f"{leaves} leaves, max depth {max((r.depth for r in self.__nodes), default=0)}",
+                            "[PHASES]:"]
+        for phase, statistics in self.phases.items():
+            share: float = statistics["seconds"] / self.__total_seconds if self.__total_seconds else 0
+            lines.append(f"{phase} {statistics['calls']} calls {statistics['seconds']:.5f}s {share:.1%}")
+        lines.append("[FEATURES]:")
+        for feature, statistics in sorted(self.features.items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(f"{feature} {statistics['nodes']} nodes {statistics['rows']} rows "
+                         f"{statistics['seconds']:.5f}s")
+        return "\n".join(lines)
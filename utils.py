@@ -1,27 +1,231 @@
 import csv
+import io
+import itertools
 import math
-from typing import Union
+import operator
+from collections import Counter
+from typing import Iterable, Iterator, Optional, TextIO, Union
 
+from column_store import MISSING, ColumnFileWriter
 from dataset import Dataset
+from information_gain import entropy_from_counts
 from node import Node, Leaf
 
 
-def load_dataset(dataset_path: str) -> Dataset:
+def load_dataset(dataset_path: str, chunk_size: int = 10000, delimiter: str = ",", header: bool = True,
+                 label_column: Union[int, str, None] = None, columns: Optional[list[str]] = None,
+                 numeric_features: Optional[list[str]] = None, detect_numeric: bool = False,
+                 deduplicate: bool = False) -> Dataset:
     """parses the csv dataset at the given path into an instance of Dataset class
 
+    The file is read in chunks of rows, and every chunk is encoded into the columnar storage of the dataset
+    before the next one is read, so only a single chunk of parsed rows is held in memory at any time.
+
+    If the dataset is deduplicated, identical rows are collapsed into a single example, whose weight is the
+    number of the rows, in the order of their first occurrence. A dataset with few distinct rows is then
+    fitted and evaluated in time proportional to the number of the distinct rows, with the same results.
+
     :param dataset_path: path at which the dataset resides
+    :param chunk_size: number of rows parsed at once
+    :param delimiter: delimiter of the values in a row
+    :param header: whether the first row contains the names of the columns. If not, features are named
+        feature1, feature2, ... and the class label is named label
+    :param label_column: name or index of the class label column. If not provided, the last column is used.
+    :param columns: names of the features to be loaded. If not provided, all the features are loaded.
+    :param numeric_features: names of the features whose values are numbers, split by thresholds
+    :param detect_numeric: whether the features whose values in the first chunk are all numbers are also
+        treated as numeric
+    :param deduplicate: whether identical rows are collapsed into weighted examples
     :return: an instance of Dataset class containing all the data
     """
 
-    with open(dataset_path, 'r') as csv_file:
-        csv_reader = csv.reader(csv_file, delimiter=",")
-        dataset: Dataset
-        for row in csv_reader:
-            if dataset is None:  # first row of the csv file
-                dataset = Dataset(row)
-            else:
-                dataset.add_example(row[:-1], row[-1])
-        return dataset
+    dataset: Optional[Dataset] = None
+    features: list[str] = []
+    positions: Optional[dict[tuple[str, ...], int]] = {} if deduplicate else None  # positions of distinct rows
+    for features, chunk in _read_chunks(dataset_path, chunk_size, delimiter, header, label_column, columns):
+        if dataset is None and chunk:  # numeric features are detected from the first chunk of examples
+            dataset = Dataset(features, _numeric_features(features, chunk, numeric_features, detect_numeric))
+        _add_examples(dataset, chunk, positions)
+    if dataset is None and features:  # file without examples
+        dataset = Dataset(features, _numeric_features(features, [], numeric_features, detect_numeric))
+    return dataset
+
+
+def iter_dataset(dataset_path: str, chunk_size: int = 10000, delimiter: str = ",", header: bool = True,
+                 label_column: Union[int, str, None] = None, columns: Optional[list[str]] = None,
+                 numeric_features: Optional[list[str]] = None, detect_numeric: bool = False,
+                 deduplicate: bool = False) -> Iterator[Dataset]:
+    """Parses the csv dataset at the given path into a sequence of datasets of at most chunk_size examples.
+
+    Datasets are created one at a time, so a file of any size can be processed with a constant amount of memory,
+    e.g. for predictions on a test set which does not fit into memory.
+
+    :param dataset_path: path at which the dataset resides
+    :param chunk_size: maximum number of examples in a single dataset
+    :param delimiter: delimiter of the values in a row
+    :param header: whether the first row contains the names of the columns
+    :param label_column: name or index of the class label column. If not provided, the last column is used.
+    :param columns: names of the features to be loaded. If not provided, all the features are loaded.
+    :param numeric_features: names of the features whose values are numbers, split by thresholds
+    :param detect_numeric: whether the features whose values in the first chunk are all numbers are also
+        treated as numeric. The same features are numeric in all the datasets.
+    :param deduplicate: whether identical rows of every chunk are collapsed into weighted examples
+    :return: generator of datasets, in the order of the rows in the file
+    """
+
+    numeric: Optional[list[str]] = None
+    for features, chunk in _read_chunks(dataset_path, chunk_size, delimiter, header, label_column, columns):
+        if not chunk:
+            continue
+        if numeric is None:
+            numeric = _numeric_features(features, chunk, numeric_features, detect_numeric)
+        dataset: Dataset = Dataset(features, numeric)
+        _add_examples(dataset, chunk, {} if deduplicate else None)
+        yield dataset
+
+
+def convert_dataset(dataset_path: str, directory: str, chunk_size: int = 100000, delimiter: str = ",",
+                    header: bool = True, label_column: Union[int, str, None] = None,
+                    columns: Optional[list[str]] = None, numeric_features: Optional[list[str]] = None,
+                    detect_numeric: bool = False) -> int:
+    """Converts the csv dataset at the given path into a directory of column files, which can be opened by
+    Dataset.from_column_files for training on datasets that do not fit into memory.
+
+    The file is read and written in chunks of rows, so it can be of any size.
+
+    :param dataset_path: path at which the dataset resides
+    :param directory: directory of the column files, which is overwritten if it already exists
+    :param chunk_size: number of rows parsed at once
+    :param delimiter: delimiter of the values in a row
+    :param header: whether the first row contains the names of the columns
+    :param label_column: name or index of the class label column. If not provided, the last column is used.
+    :param columns: names of the features to be converted. If not provided, all the features are converted.
+    :param numeric_features: names of the features whose values are numbers, split by thresholds
+    :param detect_numeric: whether the features whose values in the first chunk are all numbers are also
+        treated as numeric
+    :return: number of converted examples
+    """
+
+    writer: Optional[ColumnFileWriter] = None
+    features: list[str] = []
+    for features, chunk in _read_chunks(dataset_path, chunk_size, delimiter, header, label_column, columns):
+        if writer is None and chunk:  # numeric features are detected from the first chunk of examples
+            writer = ColumnFileWriter(directory, features[:-1], features[-1],
+                                      _numeric_features(features, chunk, numeric_features, detect_numeric),
+                                      chunk_size)
+        for feature_values, label in chunk:
+            writer.append(feature_values, label)
+    if writer is None:  # file without examples
+        if not features:
+            raise ValueError("Dataset " + dataset_path + " is empty")
+        writer = ColumnFileWriter(directory, features[:-1], features[-1],
+                                  _numeric_features(features, [], numeric_features, detect_numeric), chunk_size)
+    return writer.close()
+
+
+def _add_examples(dataset: Dataset, chunk: list[tuple[list[str], str]],
+                  positions: Optional[dict[tuple[str, ...], int]]) -> None:
+    """Adds a chunk of examples to the dataset.
+
+    :param dataset: dataset that the examples are added to
+    :param chunk: (feature values, label) pairs
+    :param positions: positions of the distinct rows already added to the dataset, indexed by the feature values
+        followed by the label. If provided, identical rows are collapsed into a single weighted example, and the
+        positions of the new distinct rows are added. Otherwise, every row is added as a separate example.
+    """
+
+    if positions is None:
+        for feature_values, label in chunk:
+            dataset.add_example(feature_values, label)
+        return
+    # the chunk is collapsed first, so every distinct row of the chunk is looked up only once
+    for row, count in Counter((*feature_values, label) for feature_values, label in chunk).items():
+        position: Optional[int] = positions.get(row)
+        if position is None:
+            positions[row] = len(dataset)
+            dataset.add_example(list(row[:-1]), row[-1], count)
+        else:
+            dataset.add_weight(position, count)
+
+
+def _read_chunks(dataset_path: str, chunk_size: int, delimiter: str, header: bool,
+                 label_column: Union[int, str, None],
+                 columns: Optional[list[str]]) -> Iterator[tuple[list[str], list[tuple[list[str], str]]]]:
+    """Reads the csv dataset at the given path in chunks of rows.
+
+    :return: generator of the dataset features, with the class label as the last one, and a chunk of
+        (feature values, label) pairs. First chunk is always empty.
+    """
+
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be positive.")
+    with open(dataset_path, 'r', newline="") as csv_file:
+        csv_reader = csv.reader(csv_file, delimiter=delimiter)
+        first_row: Optional[list[str]] = next((row for row in csv_reader if row), None)
+        if first_row is None:  # empty file
+            return
+        names: list[str] = first_row if header \
+            else [f"feature{i + 1}" for i in range(len(first_row) - 1)] + ["label"]
+
+        if label_column is None:
+            label_index: int = len(names) - 1
+        elif isinstance(label_column, int):
+            label_index: int = label_column % len(names)
+        elif label_column in names:
+            label_index: int = names.index(label_column)
+        else:
+            raise ValueError("Label column " + label_column + " is not a part of the dataset")
+        if columns is None:
+            feature_indices: list[int] = [i for i in range(len(names)) if i != label_index]
+        else:
+            for name in columns:
+                if name not in names or names.index(name) == label_index:
+                    raise ValueError("Feature " + name + " is not a part of the dataset")
+            feature_indices: list[int] = [names.index(name) for name in columns]
+        features: list[str] = [names[i] for i in feature_indices] + [names[label_index]]
+
+        rows: Iterator[list[str]] = csv_reader if header else itertools.chain([first_row], csv_reader)
+        yield features, []  # the features are known even if there are no examples
+        while True:
+            raw_chunk: list[list[str]] = list(itertools.islice(rows, chunk_size))
+            if not raw_chunk:
+                return
+            chunk: list[tuple[list[str], str]] = [([row[i] for i in feature_indices], row[label_index])
+                                                  for row in raw_chunk if row]  # blank lines are skipped
+            if chunk:
+                yield features, chunk
+
+
+def _numeric_features(features: list[str], chunk: list[tuple[list[str], str]],
+                      numeric_features: Optional[list[str]], detect_numeric: bool) -> list[str]:
+    """Determines the numeric features of a dataset.
+
+    :param features: features of the dataset, with the class label as the last one
+    :param chunk: first chunk of (feature values, label) pairs
+    :param numeric_features: names of the features declared as numeric
+    :param detect_numeric: whether the features whose known values in the chunk are all numbers are also numeric
+    :return: names of the numeric features, in the order of the features
+    """
+
+    declared: set[str] = set(numeric_features or ())
+    for name in declared:
+        if name not in features[:-1]:
+            raise ValueError("Feature " + name + " is not a part of the dataset")
+    numeric: list[str] = []
+    for i, name in enumerate(features[:-1]):
+        if name in declared or detect_numeric and any(values[i] != MISSING for values, _ in chunk) \
+                and all(_is_number(values[i]) for values, _ in chunk):
+            numeric.append(name)
+    return numeric
+
+
+def _is_number(value: str) -> bool:
+    if value == MISSING:
+        return True  # missing values don't prevent a feature from being numeric
+    try:
+        return not math.isnan(float(value))
+    except ValueError:
+        return False
 
 
 def entropy(sample: list[str]) -> float:
@@ -35,89 +239,74 @@ def entropy(sample: list[str]) -> float:
     :return: entropy of the sample
     """
 
-    # calculate the probability of each example
-    probs: dict[str, float] = {c: sample.count(c) / len(sample) for c in sample}
-    e: float = 0  # entropy
-    for probability in probs.values():
-        probability: float
+    return entropy_from_counts(Counter(sample).values())
 
-        e += probability * math.log2(probability)
 
-    return -e
-
-
-def accuracy(expected: list[str], actual: list[str]) -> float:
+def accuracy(expected: list[str], actual: list[str], weights: Optional[list[int]] = None) -> float:
     """Computes the accuracy of the classification procedure, given expected and actual labels.
 
     Accuracy is calculated as the percentage of correctly classified examples.
 
     :param expected: sample of expected labels.
     :param actual: sample of actual labels obtained through some classification procedure
+    :param weights: weights of the examples. If not provided, every example is counted once.
     :return: accuracy of classification
     """
 
     if len(expected) != len(actual):
         raise ValueError("Cannot compute accuracy if samples are not of the same length.")
-    acc: float = 0
-    for i, v in enumerate(actual):
-        i: int
-        v: str
+    if weights is None:
+        return sum(map(operator.eq, expected, actual)) / len(actual)
+    return sum(itertools.compress(weights, map(operator.eq, expected, actual))) / sum(weights)
 
-        acc += 1 if expected[i] == v else 0
-    acc /= len(actual)
-    return acc
 
+def iter_branches(root: Union[Node, Leaf]) -> Iterator[str]:
+    """Formats the branches of the given tree lazily, one at a time.
 
-def format_branches(root: Union[Node, Leaf]) -> str:
-    """Formats the branches of the given tree.
-
-    Every path from the root of the tree to leaf nodes is stored in a string as a single line,
-    in format of {distance_from_the_root}:{feature_name}={feature_value}. Nodes are whitespace-separated,
-    and for leaf nodes only the label is stored in the string.
+    Every path from the root of the tree to leaf nodes is formatted as a single line,
+    in format of {distance_from_the_root}:{feature_name}={feature_value}, or in format of
+    {distance_from_the_root}:{feature_name}<={threshold} and {distance_from_the_root}:{feature_name}>{threshold}
+    for numeric features. Nodes are whitespace-separated, and for leaf nodes only the label is stored in the string.
 
     :param root: root of the decision tree
-    :return: string representation of all branches
+    :return: generator of the branches, without line terminators, in the order of the leaves
     """
 
     if isinstance(root, Leaf):  # depth was limited to 0
-        return root.label
-
-    visited: dict[Union[Node, Leaf], bool] = {}  # tracks visited nodes
-    curr_path: list[tuple[str, str]] = []  # (feature, branch_value), used to construct a single path
-    format_str: str = "{}:{}={} "
-    branches: list[str] = []  # paths within the tree
-
-    def dfs(node: Union[Node, Leaf]):
-        """Traverses the tree in a depth-wise manner.
+        yield root.label
+        return
+
+    curr_path: list[str] = []  # formatted parts of the path from the root to the current node
+
+    # the tree is traversed in a depth-wise manner with an explicit stack, so its depth is not limited by the
+    # recursion limit. Every entry holds the node, its depth and the formatted branch leading to it.
+    stack: list[tuple[Union[Node, Leaf], int, str]] = [(root, 0, "")]
+    while stack:
+        node, depth, part = stack.pop()
+        del curr_path[max(depth - 1, 0):]  # path of the parent
+        if depth > 0:
+            curr_path.append(part)
+        if isinstance(node, Leaf):  # create output entry
+            yield " ".join(curr_path + [node.label])
+            continue
+        # branch values of threshold nodes already contain the relation to the threshold
+        relation: str = "" if node.threshold is not None else "="
+        # children are pushed in reverse, so that they are traversed in the order of the branches
+        for feature_value, child_node in reversed(list(node.children())):
+            feature_value: str
+            child_node: Union[Node, Leaf]
 
-        For each unvisited node, traverses the children nodes recursively, constructing the parts of the
-        current path along the way. For each unvisited leaf, creates a string of the path from the root to
-        the leaf and stores the string.
+            stack.append((child_node, depth + 1, f"{depth + 1}:{node.feature}{relation}{feature_value}"))
 
-        :param node: current node for which the subtree is to be traversed
-        """
 
-        if node in visited:
-            return  # only visited nodes
-        visited[node] = True  # mark as visited
-        if isinstance(node, Leaf):  # create output entry
-            curr_branch: str = format_str * len(curr_path)
-            format_list: list[tuple[int, str, str]] = [(i + 1, v[0], v[1]) for i, v in enumerate(curr_path)]
-            curr_branch: str = curr_branch.format(*[i for tpl in format_list for i in tpl])  # this is pure magic
-            curr_branch += node.label
-            branches.append(curr_branch)  # store the path
-        else:  # not a leaf -> inner node
-            for feature_value, child_node in node.children():  # for each child
-                feature_value: str
-                child_node: Union[Node, Leaf]
-
-                curr_path.append((node.feature, feature_value))  # temporary extend the path
-                dfs(child_node)  # traverse subtree recursively
-                curr_path.pop()  # remove from the path
+def format_branches(root: Union[Node, Leaf]) -> str:
+    """Formats the branches of the given tree, as generated by iter_branches, into a single string.
 
-    dfs(root)
+    :param root: root of the decision tree
+    :return: string representation of all branches, one per line
+    """
 
-    return "\n".join(branches)
+    return "\n".join(iter_branches(root))
 
 
 def format_prediction_params(params: dict) -> str:
@@ -140,12 +329,37 @@ def format_prediction_params(params: dict) -> str:
     space_separated_confusion_matrix
     """
 
-    predictions: str = " ".join(p for p in params["predictions"])
-    formatted_params: str = f"""[BRANCHES]:
-{params["branches"]}
-[PREDICTIONS]: {predictions}
+    formatted_params: io.StringIO = io.StringIO()
+    write_prediction_params(params, formatted_params)
+    return formatted_params.getvalue()
+
+
+def write_prediction_params(params: dict, file: TextIO, chunk_size: int = 65536) -> None:
+    """Writes the prediction parameters to the given file, in the same form as returned by format_prediction_params.
+
+    Branches and predictions are written out piece by piece rather than formatted into a single string first,
+    so a report of a large tree and test set doesn't need any more memory than its parts.
+
+    :param params: prediction parameters, as described by format_prediction_params. Branches can also be an
+        iterable of lines, such as the generator returned by iter_branches.
+    :param file: text file that the report is written to
+    :param chunk_size: number of predictions formatted at once
+    """
+
+    file.write("[BRANCHES]:\n")
+    branches: Union[str, Iterable[str]] = params["branches"]
+    for branch in [branches] if isinstance(branches, str) else branches:
+        file.write(branch)
+        file.write("\n")
+    file.write("[PREDICTIONS]: ")
+    predictions: Iterator[str] = iter(params["predictions"])
+    separator: str = ""
+    while chunk := list(itertools.islice(predictions, chunk_size)):
+        file.write(separator)
+        file.write(" ".join(chunk))
+        separator = " "
+    file.write(f"""
 [ACCURACY]: {params["accuracy"]:.5f}
 [CONFUSION_MATRIX]: 
 {params["confusion_matrix"]}
-"""
-    return formatted_params
+""")